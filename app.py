@@ -1,13 +1,25 @@
+import os
+
 import streamlit as st
-import pandas as pd
 import joblib
 
+from fast_predict import FastPredictor
+from features import COMPACT_MODEL_PATH
+
 # caching the loaded model so it is not reloaded on every rerun
 @st.cache_resource
 def load_model():
     return joblib.load("sdg13_rf_pipeline.pkl")
 
-model = load_model()
+# flat-array copy of the pipeline for single-row predictions;
+# the memory-mapped artifact from export_model.py loads near-instantly
+@st.cache_resource
+def load_predictor():
+    if os.path.isdir(COMPACT_MODEL_PATH):
+        return FastPredictor.load(COMPACT_MODEL_PATH)
+    return FastPredictor.from_pipeline(load_model())
+
+model = load_predictor()
 
 st.title("SDG-13: Household CO₂ Emission Estimator")
 
@@ -23,7 +35,7 @@ ac_hours = st.number_input("Average AC hours per day", min_value=0.0, max_value=
 occupants = st.number_input("Number of occupants", min_value=1, max_value=15, value=4, step=1)
 
 if st.button("Predict CO₂ emissions"):
-    input_df = pd.DataFrame([{
+    co2_pred = model.predict_one({
         "floor_area": floor_area,
         "num_rooms": num_rooms,
         "building_type": building_type,
@@ -32,9 +44,7 @@ if st.button("Predict CO₂ emissions"):
         "lpg_kg": lpg_kg,
         "ac_hours": ac_hours,
         "occupants": occupants,
-    }])
-
-    co2_pred = model.predict(input_df)[0]
+    })
     st.subheader(f"Estimated monthly CO₂ emissions: {co2_pred:.1f} kg")
 
     
\ No newline at end of file
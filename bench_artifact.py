@@ -0,0 +1,118 @@
+# bench_artifact.py
+#
+# joblib pickle vs. compact memory-mapped artifact:
+#   - size on disk
+#   - cold load time (fresh process each run)
+#   - RSS / PSS per worker with N workers alive at once
+#
+#   python export_model.py
+#   python bench_artifact.py --workers 4
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+
+from export_model import dir_size
+from features import MODEL_PATH, COMPACT_MODEL_PATH
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+LOADERS = {
+    "joblib": "import joblib; m = joblib.load({path!r})",
+    "compact": "from fast_predict import FastPredictor; m = FastPredictor.load({path!r})",
+}
+
+SAMPLE = {
+    "floor_area": 80.0, "num_rooms": 3, "building_type": "apartment",
+    "climate_zone": "hot", "elec_kwh": 300.0, "lpg_kg": 10.0,
+    "ac_hours": 4.0, "occupants": 4,
+}
+
+
+def memory_mb() -> tuple:
+    """
+    (RSS, PSS) of this process in MB. PSS splits shared pages
+    between the processes mapping them, so it shows real cost.
+    """
+    rss = pss = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Rss:"):
+                rss = int(line.split()[1])
+            elif line.startswith("Pss:"):
+                pss = int(line.split()[1])
+    return rss / 1024, pss / 1024
+
+
+def load_time(kind: str, path: str, repeats: int) -> float:
+    code = ("import time; t = time.perf_counter(); "
+            + LOADERS[kind].format(path=path)
+            + "; print(time.perf_counter() - t)")
+    times = [
+        float(subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True,
+                             text=True, check=True).stdout)
+        for _ in range(repeats)
+    ]
+    return statistics.median(times)
+
+
+def _worker(kind, path, ready, done, results):
+    if kind == "joblib":
+        import joblib
+        import pandas as pd
+        model = joblib.load(path)
+        model.predict(pd.DataFrame([SAMPLE]))
+    else:
+        from fast_predict import FastPredictor
+        model = FastPredictor.load(path)
+        # touch every tree node, as a long-running server eventually does
+        model.predict_one(SAMPLE)
+        for name in ("feature", "threshold", "left", "right", "value"):
+            getattr(model, name).sum()
+    ready.wait()
+    results.put(memory_mb())
+    done.wait()
+
+
+def worker_memory(kind: str, path: str, workers: int) -> tuple:
+    ctx = multiprocessing.get_context("spawn")
+    ready = ctx.Barrier(workers + 1)
+    done = ctx.Event()
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(kind, path, ready, done, results))
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    ready.wait()
+    samples = [results.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+    return (statistics.mean(s[0] for s in samples),
+            statistics.mean(s[1] for s in samples))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--compact", default=COMPACT_MODEL_PATH)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    paths = {"joblib": args.model, "compact": args.compact}
+    sizes = {"joblib": os.path.getsize(args.model), "compact": dir_size(args.compact)}
+
+    for kind, path in paths.items():
+        seconds = load_time(kind, path, args.repeats)
+        rss, pss = worker_memory(kind, path, args.workers)
+        print(f"{kind:>8}: {sizes[kind] / 1e6:7.1f} MB on disk   "
+              f"load {seconds * 1000:8.1f} ms   "
+              f"per worker ({args.workers} alive) RSS {rss:6.1f} MB  PSS {pss:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# bench_predict.py
+#
+# p50 / p99 latency of one interactive prediction:
+#   pipeline : pd.DataFrame + pipeline.predict (what app.py used to do)
+#   fast     : FastPredictor.predict_one
+#
+#   python bench_predict.py --model sdg13_rf_pipeline.pkl --repeats 2000
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from fast_predict import FastPredictor
+from features import MODEL_PATH
+
+SAMPLE = {
+    "floor_area": 80.0,
+    "num_rooms": 3,
+    "building_type": "apartment",
+    "climate_zone": "hot",
+    "elec_kwh": 300.0,
+    "lpg_kg": 10.0,
+    "ac_hours": 4.0,
+    "occupants": 4,
+}
+
+
+def random_rows(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "floor_area": float(rng.uniform(30, 200)),
+            "num_rooms": int(rng.integers(1, 7)),
+            "building_type": str(rng.choice(["apartment", "independent"])),
+            "climate_zone": str(rng.choice(["hot", "moderate", "cool"])),
+            "elec_kwh": float(rng.uniform(50, 600)),
+            "lpg_kg": float(rng.uniform(0, 40)),
+            "ac_hours": float(rng.uniform(0, 8)),
+            "occupants": int(rng.integers(1, 7)),
+        }
+        for _ in range(n)
+    ]
+
+
+def latencies_ms(fn, repeats: int) -> np.ndarray:
+    fn()
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    return times * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--repeats", type=int, default=1000)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    fast = FastPredictor.from_pipeline(pipeline)
+
+    rows = random_rows(500)
+    expected = pipeline.predict(pd.DataFrame(rows))
+    got = fast.predict(rows)
+    print(f"parity: max |diff| = {np.abs(expected - got).max():.2e} over {len(rows)} rows")
+
+    results = {
+        "pipeline": latencies_ms(lambda: pipeline.predict(pd.DataFrame([SAMPLE]))[0], args.repeats),
+        "fast": latencies_ms(lambda: fast.predict_one(SAMPLE), args.repeats),
+    }
+    for name, times in results.items():
+        print(f"{name:>8}: p50 {np.percentile(times, 50):7.3f} ms   "
+              f"p99 {np.percentile(times, 99):7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+# bench_suite.py
+#
+# Whole-pipeline benchmark on reproducible synthetic fixtures:
+#   preprocess  JPEG decode + letterbox, per image size
+#   detect      YOLO per image and per batch (skipped without weights)
+#   report      assemble + get_full_report per home, bulk_report for many
+#   suggestions generate_suggestions per home, evaluate_batch for many
+#   co2         FastPredictor / pipeline, single row and bulk
+#
+# Each case runs in its own fresh process, so peak RSS is the case's own.
+# Results go to JSON (latency percentiles, throughput, peak RSS) and are
+# compared against a stored baseline; the run fails if any case is more
+# than --threshold slower (or heavier) than the baseline.
+#
+#   python bench_suite.py                                  # run + compare with bench_baseline.json
+#   python bench_suite.py --only "report/*" --quick
+#   python bench_suite.py --update-baseline                # accept the current numbers
+
+import os
+
+# measure the model, not the detection cache
+os.environ.setdefault("SDG13_DETECT_CACHE_BYTES", "0")
+
+import argparse
+import fnmatch
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "sdg13-vision"))
+
+from features import COMPACT_MODEL_PATH, FEATURE_COLS, MODEL_PATH  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "bench_baseline.json")
+RESULTS_PATH = "bench_results.json"
+THRESHOLD = 0.20
+
+
+class Skip(Exception):
+    pass
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource     # Unix only
+    except ImportError:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ── fixtures ─────────────────────────────────────────────
+
+def _jpegs(size: str, density: str, n: int) -> list:
+    from fixtures import BOX_DENSITIES, IMAGE_SIZES, synthetic_jpeg
+    return [synthetic_jpeg(IMAGE_SIZES[size], BOX_DENSITIES[density], seed=i) for i in range(n)]
+
+
+def _images(size: str, density: str, n: int) -> list:
+    from preprocess import load_image
+    return [load_image(io.BytesIO(data)) for data in _jpegs(size, density, n)]
+
+
+HOME_SIZES = {"small": (2, 3), "medium": (5, 6), "large": (12, 12)}
+
+
+def _home(size: str) -> dict:
+    from fixtures import random_rooms
+    rooms, appliances = HOME_SIZES[size]
+    return random_rooms(rooms, appliances, seed=1)
+
+
+def _require_detector():
+    try:
+        import ultralytics  # noqa: F401
+    except ImportError:
+        raise Skip("ultralytics not installed")
+    import detector
+    weights = detector.get_weights_path()
+    if not os.path.exists(weights):
+        raise Skip(f"weights {weights} not found")
+    detector.warmup()
+    return detector
+
+
+def _require_pipeline(args):
+    path = args.model if os.path.isabs(args.model) else os.path.join(HERE, args.model)
+    if not os.path.exists(path):
+        raise Skip(f"model {args.model} not found")
+    import joblib
+    pipeline = joblib.load(path)
+    pipeline.named_steps["model"].n_jobs = None
+    return pipeline
+
+
+def _require_predictor(args):
+    from fast_predict import FastPredictor
+    compact = args.compact_model if os.path.isabs(args.compact_model) else os.path.join(HERE, args.compact_model)
+    if os.path.isdir(compact):
+        return FastPredictor.load(compact)
+    return FastPredictor.from_pipeline(_require_pipeline(args))
+
+
+def _households(n: int):
+    from synthetic import generate_households
+    return generate_households(n, seed=7)[FEATURE_COLS]
+
+
+# ── cases ────────────────────────────────────────────────
+# Each case does its setup and returns (fn, items per call, unit);
+# fn() is what gets timed.
+
+def case_preprocess(size):
+    def setup(args):
+        from preprocess import batch_buffer, letterbox, load_image
+        data = _jpegs(size, "dense", 1)[0]
+        out = batch_buffer(1)[0]
+        return (lambda: letterbox(load_image(io.BytesIO(data)), out=out)), 1, "images"
+    return setup
+
+
+def case_detect_single(size, density):
+    def setup(args):
+        detector = _require_detector()
+        image = _images(size, density, 1)[0]
+        return (lambda: detector.detect_appliances(image)), 1, "images"
+    return setup
+
+
+def case_detect_batch(size, density, n):
+    def setup(args):
+        detector = _require_detector()
+        images = _images(size, density, n)
+        return (lambda: detector.detect_batch(images)), n, "images"
+    return setup
+
+
+def case_report(size):
+    def setup(args):
+        from assembler import assemble_home_inventory
+        from calculator import get_full_report
+        home = _home(size)
+        return (lambda: get_full_report(assemble_home_inventory(home))), 1, "homes"
+    return setup
+
+
+def case_report_bulk(n):
+    def setup(args):
+        from assembler import assemble_home_inventory
+        from bulk_calculator import bulk_report, rooms_tensor
+        from fixtures import random_homes
+        homes = [assemble_home_inventory(h) for h in random_homes(n, rooms=4, appliances_per_room=5)]
+        return (lambda: bulk_report(rooms_tensor(homes))), n, "homes"
+    return setup
+
+
+def case_suggestions(size):
+    def setup(args):
+        from assembler import assemble_home_inventory, get_total_inventory
+        from calculator import get_full_report
+        from suggestions import generate_suggestions
+        assembled = assemble_home_inventory(_home(size))
+        total_kwh = get_full_report(assembled)["__totals__"]["total_kwh"]
+        total = get_total_inventory(assembled)
+        return (lambda: generate_suggestions(total, total_kwh)), 1, "homes"
+    return setup
+
+
+def case_suggestions_bulk(n):
+    def setup(args):
+        from assembler import assemble_home_inventory, get_total_inventory
+        from fixtures import random_homes
+        from rules import evaluate_batch
+        totals = [get_total_inventory(assemble_home_inventory(h)) for h in random_homes(n)]
+        total_kwh = np.random.default_rng(0).uniform(50, 1500, n).round(2)
+        return (lambda: evaluate_batch(totals, total_kwh)), n, "homes"
+    return setup
+
+
+def case_co2_single(backend):
+    def setup(args):
+        row = _households(1)
+        if backend == "fast":
+            predictor = _require_predictor(args)
+            record = row.to_dict("records")[0]
+            return (lambda: predictor.predict_one(record)), 1, "rows"
+        pipeline = _require_pipeline(args)
+        return (lambda: pipeline.predict(row)), 1, "rows"
+    return setup
+
+
+def case_co2_bulk(backend, n):
+    def setup(args):
+        rows = _households(n)
+        if backend == "fast":
+            predictor = _require_predictor(args)
+            records = rows.to_dict("records")
+            return (lambda: predictor.predict(records)), n, "rows"
+        pipeline = _require_pipeline(args)
+        return (lambda: pipeline.predict(rows)), n, "rows"
+    return setup
+
+
+# name -> (setup, repeats)
+CASES = {
+    "preprocess/small": (case_preprocess("small"), 200),
+    "preprocess/medium": (case_preprocess("medium"), 100),
+    "preprocess/large": (case_preprocess("large"), 30),
+    "detect/single/small-sparse": (case_detect_single("small", "sparse"), 50),
+    "detect/single/large-dense": (case_detect_single("large", "dense"), 30),
+    "detect/batch8/medium-dense": (case_detect_batch("medium", "dense", 8), 10),
+    "report/small": (case_report("small"), 2000),
+    "report/medium": (case_report("medium"), 2000),
+    "report/large": (case_report("large"), 1000),
+    "report/bulk-10k": (case_report_bulk(10_000), 10),
+    "suggestions/medium": (case_suggestions("medium"), 2000),
+    "suggestions/bulk-10k": (case_suggestions_bulk(10_000), 10),
+    "co2/single/fast": (case_co2_single("fast"), 2000),
+    "co2/single/pipeline": (case_co2_single("pipeline"), 200),
+    "co2/bulk-20k/fast": (case_co2_bulk("fast", 20_000), 5),
+    "co2/bulk-20k/pipeline": (case_co2_bulk("pipeline", 20_000), 5),
+}
+
+
+# ── running ──────────────────────────────────────────────
+
+def measure(fn, items: int, repeats: int, warmup: int = 2) -> dict:
+    for _ in range(warmup):
+        fn()
+    times = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times[i] = time.perf_counter() - start
+    p50, p90, p99 = np.percentile(times * 1000, [50, 90, 99])
+    return {
+        "repeats": repeats,
+        "items_per_call": items,
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p99_ms": round(float(p99), 4),
+        "mean_ms": round(float(times.mean() * 1000), 4),
+        "throughput": round(float(items * repeats / times.sum()), 2),
+    }
+
+
+def run_case(name: str, args) -> dict:
+    setup, repeats = CASES[name]
+    repeats = max(3, int(repeats * args.scale))
+    try:
+        fn, items, unit = setup(args)
+    except Skip as exc:
+        return {"skipped": str(exc)}
+    result = measure(fn, items, repeats)
+    result["unit"] = f"{unit}/s"
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Cases more than threshold worse than the baseline on p50 latency,
+    throughput or peak RSS. Returns (case, metric, baseline, current).
+    """
+    regressions = []
+    for name, current in results["cases"].items():
+        base = baseline.get("cases", {}).get(name)
+        if not base or "skipped" in base or "skipped" in current:
+            continue
+        if current["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append((name, "p50_ms", base["p50_ms"], current["p50_ms"]))
+        if current["throughput"] < base["throughput"] / (1 + threshold):
+            regressions.append((name, "throughput", base["throughput"], current["throughput"]))
+        if current["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            regressions.append((name, "peak_rss_mb", base["peak_rss_mb"], current["peak_rss_mb"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", action="append", help="glob over case names, repeatable")
+    parser.add_argument("--quick", action="store_true", help="a tenth of the repeats")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--compact-model", default=COMPACT_MODEL_PATH)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    args.scale = 0.1 if args.quick else 1.0
+
+    names = [
+        name for name in CASES
+        if not args.only or any(fnmatch.fnmatch(name, pattern) for pattern in args.only)
+    ]
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": args.quick,
+        },
+        "cases": {},
+    }
+
+    ctx = get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            result = pool.submit(run_case, name, args).result()
+        results["cases"][name] = result
+        if "skipped" in result:
+            print(f"{name:30s} skipped: {result['skipped']}")
+        else:
+            print(f"{name:30s} p50 {result['p50_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms  "
+                  f"{result['throughput']:14,.1f} {result['unit']:10s} rss {result['peak_rss_mb']:7.1f} MB")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for name, metric, base, current in regressions:
+        print(f"REGRESSION {name}: {metric} {base} -> {current}")
+    if regressions:
+        sys.exit(1)
+    print(f"no regressions over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
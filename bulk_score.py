@@ -0,0 +1,128 @@
+# bulk_score.py
+#
+# Scores a household dataset with sdg13_rf_pipeline.pkl, one chunk
+# at a time, so memory stays flat however large the input is.
+#   python bulk_score.py households.parquet scored.parquet --n-jobs -1
+#   python bulk_score.py households.csv scored.csv --chunk-size 200000
+
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from features import MODEL_PATH, coerce_features
+
+PRED_COL = "co2_kg_pred"
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def iter_chunks(path: str, chunk_size: int):
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet = None
+        self._first = True
+
+    def write(self, df: pd.DataFrame):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a",
+                      header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def load_pipeline(model_path: str = MODEL_PATH, n_jobs: int = None):
+    pipeline = joblib.load(model_path)
+    # RandomForestRegressor.predict spreads the trees over n_jobs threads
+    pipeline.named_steps["model"].n_jobs = n_jobs
+    return pipeline
+
+
+def score_chunk(pipeline, chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns chunk with a co2_kg_pred column. Rows that fail
+    validation get NaN instead of a prediction.
+    """
+    features, valid = coerce_features(chunk)
+    preds = np.full(len(chunk), np.nan)
+    if valid.any():
+        preds[valid] = pipeline.predict(features[valid])
+
+    out = chunk.copy()
+    out[PRED_COL] = preds
+    return out
+
+
+def score_file(input_path: str, output_path: str, model_path: str = MODEL_PATH,
+               chunk_size: int = 100_000, n_jobs: int = -1, verbose: bool = True) -> dict:
+    pipeline = load_pipeline(model_path, n_jobs)
+    writer = ChunkWriter(output_path)
+
+    rows = 0
+    invalid = 0
+    start = time.perf_counter()
+    try:
+        for chunk in iter_chunks(input_path, chunk_size):
+            scored = score_chunk(pipeline, chunk)
+            writer.write(scored)
+
+            rows += len(scored)
+            invalid += int(scored[PRED_COL].isna().sum())
+            if verbose:
+                elapsed = time.perf_counter() - start
+                print(f"{rows:>12,} rows  {rows / elapsed:>10,.0f} rows/sec")
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "invalid_rows": invalid,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(rows / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk CO2 scoring")
+    parser.add_argument("input", help="CSV or Parquet with the eight feature columns")
+    parser.add_argument("output", help="CSV or Parquet to write")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    stats = score_file(args.input, args.output, args.model, args.chunk_size, args.n_jobs)
+    print(f"done: {stats['rows']:,} rows ({stats['invalid_rows']:,} invalid) "
+          f"in {stats['seconds']} s, {stats['rows_per_sec']:,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
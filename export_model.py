@@ -0,0 +1,49 @@
+# export_model.py
+#
+# Converts the joblib pipeline into the compact, memory-mappable
+# artifact read by FastPredictor.load().
+#   python export_model.py
+#   python export_model.py --model sdg13_rf_pipeline.pkl --out sdg13_rf_compact
+
+import argparse
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from bench_predict import random_rows
+from fast_predict import FastPredictor
+from features import MODEL_PATH, COMPACT_MODEL_PATH
+
+
+def dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(path, name))
+        for name in os.listdir(path)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--out", default=COMPACT_MODEL_PATH)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    FastPredictor.from_pipeline(pipeline).save(args.out)
+
+    # the compact copy must agree with the pipeline before anyone uses it
+    rows = random_rows(2000)
+    expected = pipeline.predict(pd.DataFrame(rows))
+    got = FastPredictor.load(args.out).predict(rows)
+    max_diff = float(np.abs(expected - got).max())
+    if not np.allclose(expected, got, rtol=0, atol=1e-6):
+        raise SystemExit(f"exported model disagrees with pipeline (max diff {max_diff})")
+
+    print(f"{args.model}: {os.path.getsize(args.model) / 1e6:.1f} MB")
+    print(f"{args.out}/: {dir_size(args.out) / 1e6:.1f} MB  (max |diff| {max_diff:.1e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+# fast_predict.py
+#
+# Low-latency predictor compiled from the fitted sdg13_rf_pipeline.pkl.
+# The StandardScaler / OneHotEncoder step becomes a fixed feature
+# vector built with plain numpy, and the 300 trees become flat node
+# arrays walked for all trees at once, one depth level per step.
+
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from features import NUM_COLS, CAT_COLS
+
+ARTIFACT_VERSION = 1
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+# names the live version subdirectory (written by online_update.py)
+CURRENT_FILE = "CURRENT"
+
+
+def resolve_artifact(path: str) -> str:
+    """
+    The directory holding the live arrays: path itself for an artifact
+    from save() / export_model.py, or the version subdirectory named by
+    path/CURRENT once online_update.py has swapped in an update.
+    """
+    try:
+        with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+            return os.path.join(path, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+
+def publish(path: str, write) -> str:
+    """
+    Installs a new version of the artifact at path without a gap:
+    write(directory) fills a fresh v-<time>/ directory inside path, then
+    path/CURRENT is pointed at it with a single os.replace, so readers
+    (FastPredictor.load) see the old version or the new one, never a
+    missing or half-written one. The version being replaced is kept for
+    readers that resolved CURRENT just before the switch; older ones are
+    removed. Returns the new version's directory.
+    """
+    os.makedirs(path, exist_ok=True)
+    previous = os.path.relpath(resolve_artifact(path), path)
+    staged = tempfile.mkdtemp(prefix=time.strftime("v-%Y%m%d-%H%M%S-"), dir=path)
+    os.chmod(staged, 0o755)
+    version = os.path.basename(staged)
+    write(staged)
+
+    pointer = os.path.join(path, f".{CURRENT_FILE}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer, os.path.join(path, CURRENT_FILE))
+
+    for name in os.listdir(path):
+        if name.startswith("v-") and name not in (version, previous):
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    if previous != os.curdir:
+        # flat files from before the first publish (path itself was the
+        # live version): the first publish keeps them as the previous
+        # version, so they only go once a later one replaces v-*/
+        for name in os.listdir(path):
+            full = os.path.join(path, name)
+            if name != CURRENT_FILE and os.path.isfile(full):
+                try:
+                    os.remove(full)
+                except OSError:
+                    pass
+    return staged
+
+
+class FastPredictor:
+    """
+    Same predictions as pipeline.predict (to float tolerance),
+    without pandas or the ColumnTransformer dispatch.
+    """
+
+    def __init__(self, mean, scale, categories, feature, threshold,
+                 left, right, value, roots, max_depth):
+        self.mean = mean
+        self.scale = scale
+        self.categories = categories   # [{"apartment": 6, ...}, {...}] -> column in x
+        self.n_features = len(mean) + sum(len(c) for c in categories)
+
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_pipeline(cls, pipeline):
+        preprocess = pipeline.named_steps["preprocess"]
+        forest = pipeline.named_steps["model"]
+
+        transformers = {name: (trans, cols) for name, trans, cols in preprocess.transformers_}
+        scaler, num_cols = transformers["num"]
+        ohe, cat_cols = transformers["cat"]
+        if list(num_cols) != NUM_COLS or list(cat_cols) != CAT_COLS:
+            raise ValueError(f"unexpected pipeline columns: {num_cols} / {cat_cols}")
+
+        categories = []
+        column = len(num_cols)
+        for levels in ohe.categories_:
+            categories.append({level: column + i for i, level in enumerate(levels)})
+            column += len(levels)
+
+        return cls(
+            scaler.mean_.astype(np.float64),
+            scaler.scale_.astype(np.float64),
+            categories,
+            *flatten_forest(forest),
+        )
+
+    def transform(self, rows: list) -> np.ndarray:
+        """
+        rows: list of dicts with the eight feature columns.
+        Returns the float32 matrix the trees see.
+        """
+        n_num = len(NUM_COLS)
+        x = np.zeros((len(rows), self.n_features), dtype=np.float64)
+        for r, row in enumerate(rows):
+            x[r, :n_num] = [row[col] for col in NUM_COLS]
+            for col, levels in zip(CAT_COLS, self.categories):
+                column = levels.get(row[col])
+                if column is not None:      # unknown level -> all zeros, like handle_unknown="ignore"
+                    x[r, column] = 1.0
+        x[:, :n_num] = (x[:, :n_num] - self.mean) / self.scale
+        # sklearn trees compare float32 inputs against float64 thresholds
+        return x.astype(np.float32)
+
+    def transform_frame(self, df) -> np.ndarray:
+        """
+        Same matrix as transform(), for a whole DataFrame at once
+        (e.g. the output of features.coerce_features).
+        """
+        n_num = len(NUM_COLS)
+        x = np.zeros((len(df), self.n_features), dtype=np.float64)
+        x[:, :n_num] = df[NUM_COLS].to_numpy(dtype=np.float64)
+        x[:, :n_num] = (x[:, :n_num] - self.mean) / self.scale
+        rows = np.arange(len(df))
+        for col, levels in zip(CAT_COLS, self.categories):
+            column = df[col].map(levels).to_numpy(dtype=np.float64)
+            known = ~np.isnan(column)
+            x[rows[known], column[known].astype(np.intp)] = 1.0
+        return x.astype(np.float32)
+
+    def predict_matrix(self, x: np.ndarray) -> np.ndarray:
+        x = x.astype(np.float64)
+        rows = np.arange(len(x))[:, None]
+        node = np.broadcast_to(self.roots, (len(x), len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            go_left = x[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        return self.value[node].mean(axis=1)
+
+    def predict(self, rows: list) -> np.ndarray:
+        return self.predict_matrix(self.transform(rows))
+
+    def predict_one(self, row: dict) -> float:
+        return float(self.predict([row])[0])
+
+    def save(self, path: str):
+        """
+        Writes a compact artifact directory: meta.json plus one raw
+        .npy per node array, with narrow dtypes:
+          feature int8/int16, threshold float32, children int32.
+        Thresholds are rounded down to float32, which gives exactly
+        the same splits because the trees only ever see float32 inputs.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        threshold = self.threshold.astype(np.float32)
+        over = threshold.astype(np.float64) > self.threshold
+        threshold[over] = np.nextafter(threshold[over], np.float32(-np.inf))
+
+        arrays = {
+            "feature": self.feature.astype(np.int8 if self.n_features < 128 else np.int16),
+            "threshold": threshold,
+            "left": self.left.astype(np.int32),
+            "right": self.right.astype(np.int32),
+            "value": self.value.astype(np.float64),
+            "roots": self.roots.astype(np.int32),
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+
+        meta = {
+            "version": ARTIFACT_VERSION,
+            "num_cols": NUM_COLS,
+            "cat_cols": CAT_COLS,
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "categories": [{str(k): v for k, v in levels.items()} for levels in self.categories],
+            "max_depth": int(self.max_depth),
+        }
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        # saved over an online-updated artifact: these files are live now
+        try:
+            os.remove(os.path.join(path, CURRENT_FILE))
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """
+        Loads an artifact written by save(). With mmap=True the node
+        arrays are memory-mapped read-only, so every worker process on
+        the host shares one copy through the page cache.
+        """
+        path = resolve_artifact(path)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["version"] != ARTIFACT_VERSION:
+            raise ValueError(f"unsupported artifact version {meta['version']}")
+        if meta["num_cols"] != NUM_COLS or meta["cat_cols"] != CAT_COLS:
+            raise ValueError("artifact was built for different feature columns")
+
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in ARRAYS
+        }
+        return cls(
+            np.array(meta["mean"]),
+            np.array(meta["scale"]),
+            meta["categories"],
+            max_depth=meta["max_depth"],
+            **arrays,
+        )
+
+
+def flatten_forest(forest):
+    """
+    Concatenates every tree's node arrays into one set of flat arrays.
+    Leaves point to themselves, so walking max_depth steps from the
+    roots always ends on a leaf.
+    Returns feature, threshold, left, right, value, roots, max_depth.
+    """
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, 0.0, tree.threshold))
+        lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+        rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+        values.append(tree.value[:, 0, 0])
+        roots.append(offset)
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    return (
+        np.concatenate(features).astype(np.intp),
+        np.concatenate(thresholds).astype(np.float64),
+        np.concatenate(lefts).astype(np.intp),
+        np.concatenate(rights).astype(np.intp),
+        np.concatenate(values).astype(np.float64),
+        np.array(roots, dtype=np.intp),
+        max_depth,
+    )
@@ -0,0 +1,70 @@
+# features.py
+#
+# Input columns of sdg13_rf_pipeline.pkl, in the order used by
+# Project.ipynb and app.py.
+
+import numpy as np
+
+MODEL_PATH = "sdg13_rf_pipeline.pkl"
+COMPACT_MODEL_PATH = "sdg13_rf_compact"
+
+NUM_COLS = ["floor_area", "num_rooms", "elec_kwh", "lpg_kg", "ac_hours", "occupants"]
+CAT_COLS = ["building_type", "climate_zone"]
+
+FEATURE_COLS = [
+    "floor_area",
+    "num_rooms",
+    "building_type",
+    "climate_zone",
+    "elec_kwh",
+    "lpg_kg",
+    "ac_hours",
+    "occupants",
+]
+
+CATEGORIES = {
+    "building_type": ["apartment", "independent"],
+    "climate_zone": ["hot", "moderate", "cool"],
+}
+
+TARGET = "co2_kg"
+
+
+def normalize_category(value) -> str:
+    """
+    A category value the way coerce_features leaves it:
+    stripped, lower-case string.
+    """
+    return str(value).strip().lower()
+
+
+def coerce_features(df):
+    """
+    Picks the eight feature columns out of df and coerces them:
+    numbers to float, categories to stripped lower-case strings.
+    Returns (features, valid) where valid is a boolean array that
+    is False for rows with a missing or non-numeric value.
+    Unknown categories are kept; the pipeline's OneHotEncoder
+    ignores them.
+    """
+    import pandas as pd  # kept local so fast_predict loads without pandas
+
+    missing = [c for c in FEATURE_COLS if c not in df.columns]
+    if missing:
+        raise ValueError(f"missing feature columns: {missing}")
+
+    features = pd.DataFrame(index=df.index)
+    valid = np.ones(len(df), dtype=bool)
+
+    for col in FEATURE_COLS:
+        if col in CATEGORIES:
+            # vectorised normalize_category
+            values = df[col].astype("string").str.strip().str.lower()
+            valid &= values.notna().to_numpy()
+            features[col] = values.fillna("").astype(object)
+        else:
+            values = pd.to_numeric(df[col], errors="coerce").astype("float64")
+            valid &= values.notna().to_numpy()
+            features[col] = values.fillna(0.0)
+
+    return features, valid
@@ -0,0 +1,328 @@
+# online_update.py
+#
+# Refreshes the compact CO2 forest (sdg13_rf_compact/, see fast_predict.py)
+# with new metered households, at a cost proportional to the new rows:
+#   - the scaler mean / variance are merged with each mini-batch and kept
+#     in online.json, where they drive the drift check. The trees keep the
+#     scaling they were grown with: forest splits do not care about a
+#     per-column rescale, and moving thresholds to a new scale flips ties
+#     on integer columns such as num_rooms
+#   - category levels never seen before get a new one-hot column; older
+#     trees see it as all zeros, as they did before
+#   - --trees-per-batch new trees are grown on each mini-batch only, and
+#     the oldest trees beyond --max-trees drop out
+#   - a slice of the new rows is held out; the updated forest is swapped
+#     in only if its RMSE there is no worse than the current model's by
+#     more than --tolerance
+# Scaler counts and tree history live in online.json next to the arrays.
+# Each swap writes a new v-<time>/ subdirectory and switches the CURRENT
+# file to it with one os.replace, so app.py / service.py never find the
+# artifact missing mid-swap.
+#
+#   python online_update.py metered.parquet
+#   python online_update.py metered.csv --batch-size 50000 --trees-per-batch 20
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from bulk_score import iter_chunks
+from fast_predict import FastPredictor, flatten_forest, publish, resolve_artifact
+from features import CAT_COLS, COMPACT_MODEL_PATH, MODEL_PATH, NUM_COLS, TARGET, coerce_features
+
+STATE_FILE = "online.json"
+BATCH_SIZE = 100_000
+TREES_PER_BATCH = 30
+MAX_TREES = 300
+HOLDOUT_FRACTION = 0.1
+HOLDOUT_MAX_ROWS = 200_000
+TOLERANCE = 0.02
+DRIFT_STD = 0.5
+PREDICT_SLICE = 20_000
+
+
+class OnlineForest:
+    """
+    A FastPredictor plus what it needs to keep learning: running scaler
+    statistics over every row seen, and the batch each tree came from.
+    """
+
+    def __init__(self, predictor: FastPredictor, n_seen: int, mean: np.ndarray,
+                 var: np.ndarray, tree_batches: list, history: list):
+        self.predictor = predictor
+        self.n_seen = n_seen
+        self.mean = mean
+        self.var = var
+        self.tree_batches = tree_batches
+        self.history = history
+
+    @classmethod
+    def load(cls, path: str, n_seen: int = None):
+        predictor = FastPredictor.load(path, mmap=False)
+        for name in ("feature", "threshold", "left", "right", "value", "roots"):
+            setattr(predictor, name, np.array(getattr(predictor, name), dtype=_DTYPES[name]))
+
+        state_path = os.path.join(resolve_artifact(path), STATE_FILE)
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            return cls(predictor, state["n_seen"], np.array(state["mean"]), np.array(state["var"]),
+                       state["tree_batches"], state["history"])
+
+        # first update of an artifact straight from export_model.py
+        if n_seen is None:
+            raise ValueError(f"{path} has no {STATE_FILE}; pass the number of training rows (--seen-rows)")
+        return cls(predictor, n_seen, predictor.mean.copy(), predictor.scale ** 2,
+                   ["initial"] * len(predictor.roots), [])
+
+    def save(self, path: str):
+        self.predictor.save(path)
+        state = {
+            "n_seen": int(self.n_seen),
+            "mean": self.mean.tolist(),
+            "var": self.var.tolist(),
+            "tree_batches": self.tree_batches,
+            "history": self.history,
+        }
+        with open(os.path.join(path, STATE_FILE), "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+
+    # ── updates ──────────────────────────────────────────
+
+    def update_scaler(self, num: np.ndarray):
+        """
+        Merges a batch into the running mean / variance (Chan et al.),
+        the same numbers StandardScaler.partial_fit keeps.
+        """
+        n = len(num)
+        if n == 0:
+            return
+        batch_mean = num.mean(axis=0)
+        batch_m2 = ((num - batch_mean) ** 2).sum(axis=0)
+
+        total = self.n_seen + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.var = (self.var * self.n_seen + batch_m2 + delta ** 2 * self.n_seen * n / total) / total
+        self.n_seen = total
+
+    def add_levels(self, features: pd.DataFrame) -> list:
+        """
+        Gives every unseen category level its own new one-hot column.
+        Returns the added (column, level) pairs.
+        """
+        p = self.predictor
+        added = []
+        for col, levels in zip(CAT_COLS, p.categories):
+            for level in pd.unique(features[col]):
+                if level not in levels:
+                    levels[level] = p.n_features
+                    p.n_features += 1
+                    added.append((col, level))
+        return added
+
+    def grow(self, x: np.ndarray, y: np.ndarray, n_trees: int, batch_id: str,
+             seed: int, max_depth: int = None, n_jobs: int = -1):
+        """
+        Fits n_trees on this batch only and appends them to the forest.
+        """
+        forest = RandomForestRegressor(
+            n_estimators=n_trees, max_depth=max_depth, random_state=seed, n_jobs=n_jobs,
+        ).fit(x, y)
+        feature, threshold, left, right, value, roots, depth = flatten_forest(forest)
+
+        p = self.predictor
+        offset = len(p.feature)
+        p.feature = np.concatenate([p.feature, feature])
+        p.threshold = np.concatenate([p.threshold, threshold])
+        p.left = np.concatenate([p.left, left + offset])
+        p.right = np.concatenate([p.right, right + offset])
+        p.value = np.concatenate([p.value, value])
+        p.roots = np.concatenate([p.roots, roots + offset])
+        p.max_depth = max(p.max_depth, depth)
+        self.tree_batches.extend([batch_id] * n_trees)
+
+    def drop_oldest(self, max_trees: int) -> int:
+        """
+        Keeps the newest max_trees trees. Trees are stored back to back,
+        so this is one slice of every node array.
+        """
+        p = self.predictor
+        drop = len(p.roots) - max_trees
+        if drop <= 0:
+            return 0
+        start = p.roots[drop]
+        p.feature = p.feature[start:]
+        p.threshold = p.threshold[start:]
+        p.left = p.left[start:] - start
+        p.right = p.right[start:] - start
+        p.value = p.value[start:]
+        p.roots = p.roots[drop:] - start
+        self.tree_batches = self.tree_batches[drop:]
+        return drop
+
+
+_DTYPES = {
+    "feature": np.intp, "threshold": np.float64, "left": np.intp,
+    "right": np.intp, "value": np.float64, "roots": np.intp,
+}
+
+
+# ── evaluation ───────────────────────────────────────────
+
+def predict_frame(predictor: FastPredictor, features: pd.DataFrame) -> np.ndarray:
+    # the level-wise walk holds rows x trees node ids, so go in slices
+    out = np.empty(len(features))
+    for start in range(0, len(features), PREDICT_SLICE):
+        part = features.iloc[start:start + PREDICT_SLICE]
+        out[start:start + len(part)] = predictor.predict_matrix(predictor.transform_frame(part))
+    return out
+
+
+def rmse(y: np.ndarray, pred: np.ndarray) -> float:
+    return float(np.sqrt(np.mean((y - pred) ** 2)))
+
+
+def drift_report(mean: np.ndarray, var: np.ndarray, new_mean: np.ndarray, new_levels: list) -> dict:
+    """
+    How far the new rows' column means are from the running means
+    before this update, in units of the running std.
+    """
+    shift = np.abs(new_mean - mean) / np.sqrt(np.where(var > 0, var, 1.0))
+    return {
+        "mean_shift_std": {col: round(float(s), 4) for col, s in zip(NUM_COLS, shift)},
+        "new_levels": [f"{col}={level}" for col, level in new_levels],
+        "max_shift_std": round(float(shift.max()), 4),
+    }
+
+
+def swap_in(online: OnlineForest, path: str):
+    """
+    Publishes the updated forest as a new version of path
+    (fast_predict.publish: one atomic switch of path/CURRENT).
+    """
+    publish(path, online.save)
+
+
+def _seen_rows_from_pipeline(model_path: str):
+    if not os.path.exists(model_path):
+        return None
+    import joblib
+    scaler = joblib.load(model_path).named_steps["preprocess"].named_transformers_["num"]
+    return int(scaler.n_samples_seen_)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("data", help="CSV / Parquet of new households with the co2_kg column")
+    parser.add_argument("--model", default=COMPACT_MODEL_PATH)
+    parser.add_argument("--seen-rows", type=int,
+                        help=f"rows the artifact was trained on (first update only; default: read from {MODEL_PATH})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--trees-per-batch", type=int, default=TREES_PER_BATCH)
+    parser.add_argument("--max-trees", type=int, default=MAX_TREES)
+    parser.add_argument("--max-depth", type=int)
+    parser.add_argument("--holdout", type=float, default=HOLDOUT_FRACTION)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--dry-run", action="store_true", help="evaluate only, never swap")
+    parser.add_argument("--force", action="store_true", help="swap even if the held-out check fails")
+    args = parser.parse_args()
+    if args.holdout <= 0 and not (args.force or args.dry_run):
+        parser.error("--holdout must be > 0 to check the update (or pass --force)")
+
+    current = FastPredictor.load(args.model)
+    seen_rows = args.seen_rows
+    if seen_rows is None and not os.path.exists(os.path.join(resolve_artifact(args.model), STATE_FILE)):
+        seen_rows = _seen_rows_from_pipeline(MODEL_PATH)
+    online = OnlineForest.load(args.model, seen_rows)
+
+    mean_before, var_before = online.mean.copy(), online.var.copy()
+    new_sum = np.zeros(len(NUM_COLS))
+
+    start = time.perf_counter()
+    batch_stamp = time.strftime("%Y%m%d-%H%M%S")
+    holdout_x, holdout_y = [], []
+    held = rows = 0
+    new_levels = []
+
+    for i, chunk in enumerate(iter_chunks(args.data, args.batch_size)):
+        features, valid = coerce_features(chunk)
+        y = pd.to_numeric(chunk[TARGET], errors="coerce").to_numpy(dtype=np.float64)
+        valid &= ~np.isnan(y)
+        features, y = features[valid], y[valid]
+
+        rng = np.random.default_rng([args.seed, i])
+        hold = rng.random(len(y)) < args.holdout
+        if held >= HOLDOUT_MAX_ROWS:
+            hold[:] = False
+        holdout_x.append(features[hold])
+        holdout_y.append(y[hold])
+        held += int(hold.sum())
+
+        train_x, train_y = features[~hold], y[~hold]
+        if len(train_y) == 0:
+            continue
+        num = train_x[NUM_COLS].to_numpy(dtype=np.float64)
+        online.update_scaler(num)
+        new_sum += num.sum(axis=0)
+        new_levels += online.add_levels(train_x)
+        online.grow(online.predictor.transform_frame(train_x), train_y, args.trees_per_batch,
+                    f"{batch_stamp}/{i}", seed=args.seed * 1_000_003 + i,
+                    max_depth=args.max_depth, n_jobs=args.jobs)
+        online.drop_oldest(args.max_trees)
+        rows += len(train_y)
+        print(f"batch {i}: {len(train_y):,} rows -> {len(online.predictor.roots)} trees", flush=True)
+
+    if rows == 0:
+        raise SystemExit("no usable rows in the input")
+
+    x_hold = pd.concat(holdout_x)
+    y_hold = np.concatenate(holdout_y)
+    drift = drift_report(mean_before, var_before, new_sum / rows, new_levels)
+    if len(y_hold) == 0:
+        # nothing to compare on; RMSE would be NaN
+        if not (args.force or args.dry_run):
+            raise SystemExit(f"holdout is empty ({rows:,} rows, --holdout {args.holdout}); "
+                             f"raise --holdout, add rows, or pass --force to swap unchecked")
+        before = after = None
+        accepted = False
+        print("held-out rows 0: RMSE not checked")
+    else:
+        before = rmse(y_hold, predict_frame(current, x_hold))
+        after = rmse(y_hold, predict_frame(online.predictor, x_hold))
+        accepted = after <= before * (1 + args.tolerance)
+        print(f"held-out rows {len(y_hold):,}: RMSE current {before:.2f} -> updated {after:.2f}")
+    print(f"input drift: max mean shift {drift['max_shift_std']} std, new levels {drift['new_levels'] or 'none'}")
+    if drift["max_shift_std"] > DRIFT_STD:
+        print(f"warning: inputs moved more than {DRIFT_STD} std; consider a full retrain (train.py)")
+
+    online.history.append({
+        "time": batch_stamp,
+        "source": os.path.basename(args.data),
+        "rows": rows,
+        "holdout_rows": len(y_hold),
+        "rmse_before": round(before, 4) if before is not None else None,
+        "rmse_after": round(after, 4) if after is not None else None,
+        "drift": drift,
+        "accepted": accepted,
+        "seconds": round(time.perf_counter() - start, 2),
+    })
+
+    if args.dry_run:
+        print("dry run: artifact left unchanged")
+    elif accepted or args.force:
+        swap_in(online, args.model)
+        print(f"swapped in updated {args.model}/ ({len(online.predictor.roots)} trees)")
+    else:
+        raise SystemExit(f"held-out RMSE got worse by more than {args.tolerance:.0%}; artifact left unchanged")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,67 @@
 # app_vision.py
 
+import queue
+
 import streamlit as st
-from PIL import Image
-from detector import detect_from_multiple
-from assembler import assemble_home_inventory, get_total_inventory
-from calculator import get_full_report
-from suggestions import generate_suggestions
-from config import ROOM_TYPES, APPLIANCE_POWER
+import instrument
+from detector import detect_batch
+from incremental import IncrementalReport
+from tariffs import list_tariffs
+from uploads import SessionUploads, merge_confidences, merge_max
+from config import ROOM_TYPES, APPLIANCE_POWER, DETECT_WORKERS, DEFAULT_TARIFF, PLAN_BUDGETS, VIDEO_EXTENSIONS
+
+# pandas, the planner, uncertainty and video (OpenCV) are imported where
+# they are used, so a cold start only pays for what the page shows first
+
+
+# one pool per server process, shared by every session
+@st.cache_resource
+def get_detection_executor():
+    if DETECT_WORKERS > 0:
+        from executor import DetectionExecutor
+        return DetectionExecutor()
+    return None
+
+
+# Prometheus /metrics on SDG13_METRICS_PORT when SDG13_METRICS=1
+@st.cache_resource
+def start_metrics_endpoint():
+    if instrument.enabled():
+        instrument.serve_metrics()
+
+
+start_metrics_endpoint()
+
+
+def room_table(section: dict):
+    import pandas as pd
+
+    rows = []
+    for appliance, info in section["breakdown"].items():
+        label = APPLIANCE_POWER.get(
+            appliance, {}
+        ).get("label", appliance)
+        rows.append({
+            "Appliance": label,
+            "Count": info["count"],
+            "Monthly kWh": info["kwh"],
+            "CO₂ (kg)": info["co2"],
+        })
+    return pd.DataFrame(rows) if rows else None
+
+
+def plans_table(plans: list):
+    import pandas as pd
+
+    return pd.DataFrame([{
+        "Budget": f"₹{p['budget']:,.0f}",
+        "Plan cost": f"₹{p['cost']:,.0f}",
+        "kWh/month": f"{p['kwh_before']} → {p['kwh_after']}",
+        "Bill saved": f"₹{p['bill_saved']}/month",
+        "CO₂ saved": f"{p['co2_saved']} kg/month",
+        "Payback": f"{p['payback_months']} months" if p["payback_months"] else "—",
+    } for p in plans])
+
 
 # ─────────────────────────────────────────
 # PAGE CONFIG
@@ -27,9 +82,26 @@ st.divider()
 if "room_inventories" not in st.session_state:
     st.session_state.room_inventories = {}
 
+# YOLO box confidences behind each room's detected counts
+if "room_confidences" not in st.session_state:
+    st.session_state.room_confidences = {}
+
 if "report_ready" not in st.session_state:
     st.session_state.report_ready = False
 
+# kept in sync with room_inventories; only edited rooms get recomputed
+if "home_report" not in st.session_state:
+    st.session_state.home_report = IncrementalReport()
+
+# what the report shows, rebuilt only where home_report's diff says it
+# changed: per-room tables, uncertainty bands, upgrade plans
+if "report_sections" not in st.session_state:
+    st.session_state.report_sections = {"rooms": {}}
+
+# thumbnails + per-photo detections, decoded once per upload
+if "uploads" not in st.session_state:
+    st.session_state.uploads = SessionUploads()
+
 # ─────────────────────────────────────────
 # STEP 1: UPLOAD PHOTOS PER ROOM
 # ─────────────────────────────────────────
@@ -45,15 +117,20 @@ for room in ROOM_TYPES:
             key=f"uploader_{room}"
         )
 
-        if uploaded_files:
+        uploaded_video = st.file_uploader(
+            f"...or a short walkthrough video of {room}",
+            type=[ext.lstrip(".") for ext in VIDEO_EXTENSIONS],
+            key=f"video_{room}"
+        )
+
+        if uploaded_files or uploaded_video is not None:
             # Show thumbnails
-            cols = st.columns(min(len(uploaded_files), 4))
-            images = []
-            for i, file in enumerate(uploaded_files):
-                img = Image.open(file).convert("RGB")
-                images.append(img)
-                with cols[i % 4]:
-                    st.image(img, caption=f"Photo {i+1}", width=200)
+            if uploaded_files:
+                cols = st.columns(min(len(uploaded_files), 4))
+                for i, file in enumerate(uploaded_files):
+                    entry = st.session_state.uploads.entry(file)
+                    with cols[i % 4]:
+                        st.image(entry.thumbnail, caption=f"Photo {i+1}", width=200)
 
             # Manual plug count input
             plug_count = st.number_input(
@@ -67,13 +144,44 @@ for room in ROOM_TYPES:
 
             # Detect button per room
             if st.button(f"🔍 Detect Appliances in {room}", key=f"detect_{room}"):
-                with st.spinner(f"Analysing {len(images)} photo(s) of {room}..."):
-                    detected = detect_from_multiple(images)
+                with st.spinner(f"Analysing {room}..."), instrument.request("detect"):
+                    executor = get_detection_executor()
+                    if executor is None:
+                        def run_batch(images):
+                            return detect_batch(images, with_confidences=True)
+                    else:
+                        def run_batch(images):
+                            return executor.submit_batch(images, with_confidences=True).result()
+
+                    video_stats = None
+                    try:
+                        # photos detected before are not decoded or detected again
+                        detected, confidences = st.session_state.uploads.detect(uploaded_files or [], run_batch)
+                        if uploaded_video is not None:
+                            # distinct frames only; merged with the photos by max count
+                            from video import sample_frames
+                            frames, video_stats = sample_frames(uploaded_video)
+                            frame_counts, frame_confs = run_batch(frames) if frames else ([], [])
+                            confidences = merge_confidences([detected] + frame_counts, [confidences] + frame_confs)
+                            detected = merge_max([detected] + frame_counts)
+                    except queue.Full:
+                        st.error("⏳ The detector is busy right now. Please try again in a moment.")
+                        st.stop()
+
+                if video_stats is not None:
+                    st.caption(
+                        f"🎞️ Video: {video_stats['frames_decoded']} frames decoded, "
+                        f"{video_stats['frames_kept']} distinct frames analysed, "
+                        f"{video_stats['decode_ms'] / 1000:.1f} s to sample"
+                    )
 
                 # Add manual plug count
                 if plug_count > 0:
                     detected["plug_point"] = plug_count
 
+                st.session_state.room_confidences[room] = confidences
+                # new confidences move the bands even if the counts did not
+                st.session_state.report_sections.pop("bands", None)
                 if detected:
                     st.session_state.room_inventories[room] = detected
                     st.success(f"✅ Detected in {room}:")
@@ -129,23 +237,55 @@ st.divider()
 # ─────────────────────────────────────────
 st.header("📊 Step 3: Generate Report")
 
+tariff_names = list_tariffs()
+tariff_id = st.selectbox(
+    "⚡ Electricity tariff",
+    list(tariff_names),
+    index=list(tariff_names).index(DEFAULT_TARIFF),
+    format_func=tariff_names.get,
+)
+
 if st.button("🚀 Generate Full Report", type="primary"):
     if not st.session_state.room_inventories:
         st.error("❌ Please upload and detect appliances in at least one room first.")
     else:
-        with st.spinner("Generating your carbon report..."):
-
-            # Assemble and deduplicate
-            assembled = assemble_home_inventory(
-                st.session_state.room_inventories
-            )
-            total_inventory = get_total_inventory(assembled)
-            report = get_full_report(assembled)
+        with st.spinner("Generating your carbon report..."), instrument.request("report"):
+
+            # Assemble and deduplicate, recomputing only what changed
+            if st.session_state.home_report.tariff_id != tariff_id:
+                st.session_state.home_report = IncrementalReport(tariff_id=tariff_id)
+                st.session_state.report_sections = {"rooms": {}}
+            home = st.session_state.home_report
+            diff = home.sync(st.session_state.room_inventories)
+            report = home.report
             totals = report["__totals__"]
-            suggestions = generate_suggestions(
-                total_inventory,
-                totals["total_kwh"]
-            )
+            suggestions = home.suggestions
+
+            sections = st.session_state.report_sections
+            changed_rooms = diff["rooms"] + diff["removed_rooms"]
+            for room in changed_rooms:
+                sections["rooms"].pop(room, None)
+            if changed_rooms or diff["totals"]:
+                sections.pop("bands", None)
+                sections.pop("plans", None)
+
+            for room, data in report.items():
+                if room != "__totals__" and room not in sections["rooms"]:
+                    sections["rooms"][room] = room_table(data)
+            if "bands" not in sections:
+                from uncertainty import estimate_uncertainty, inventory_confidences
+                sections["bands"] = estimate_uncertainty(
+                    home.total_inventory,
+                    inventory_confidences(home.assembled, st.session_state.room_confidences),
+                    tariff_id=tariff_id,
+                    seed=0,
+                )
+            if "plans" not in sections:
+                from planner import best_plans
+                plans = best_plans(home.total_inventory, totals["total_kwh"], PLAN_BUDGETS, tariff_id)
+                sections["plans"] = (plans, plans_table(plans))
+            bands = sections["bands"]
+            plans, plan_rows = sections["plans"]
 
         st.divider()
         st.header("🏠 Your Home Carbon Report")
@@ -171,6 +311,13 @@ if st.button("🚀 Generate Full Report", type="primary"):
                 value=f"{totals['total_co2']} kg"
             )
 
+        st.caption(
+            f"Likely range (p10–p90), allowing for real-world wattage and usage hours: "
+            f"{bands['kwh']['p10']}–{bands['kwh']['p90']} kWh · "
+            f"₹{bands['bill']['p10']}–₹{bands['bill']['p90']} · "
+            f"{bands['co2']['p10']}–{bands['co2']['p90']} kg CO₂"
+        )
+
         st.divider()
 
         # ── ROOM BREAKDOWN ───────────────────────────
@@ -185,22 +332,9 @@ if st.button("🚀 Generate Full Report", type="primary"):
 
             with st.expander(f"🚪 {room} — {data['total_kwh']} kWh | ₹{data['bill']} | {data['total_co2']} kg CO₂"):
 
-                # Appliance table
-                rows = []
-                for appliance, info in data["breakdown"].items():
-                    label = APPLIANCE_POWER.get(
-                        appliance, {}
-                    ).get("label", appliance)
-                    rows.append({
-                        "Appliance": label,
-                        "Count": info["count"],
-                        "Monthly kWh": info["kwh"],
-                        "CO₂ (kg)": info["co2"],
-                    })
-
-                import pandas as pd
-                if rows:
-                    df = pd.DataFrame(rows)
+                # Appliance table, rebuilt only if this room changed
+                df = sections["rooms"][room]
+                if df is not None:
                     st.dataframe(df, use_container_width=True, hide_index=True)
 
         st.divider()
@@ -235,6 +369,19 @@ if st.button("🚀 Generate Full Report", type="primary"):
 
         st.divider()
 
+        # ── UPGRADE PLANS ────────────────────────────
+        st.subheader("🧮 Best Upgrade Plan for Your Budget")
+        st.markdown("Savings combined and re-billed on your tariff slabs, not added up.")
+
+        st.dataframe(plan_rows, use_container_width=True, hide_index=True)
+        for p in plans:
+            if p["actions"]:
+                with st.expander(f"Plan for ₹{p['budget']:,.0f}: {len(p['actions'])} action(s), ₹{p['cost']:,.0f}"):
+                    for action in p["actions"]:
+                        st.write(f"{action['icon']} {action['action']} (₹{action['cost']:,.0f})")
+
+        st.divider()
+
         # ── SDG-13 IMPACT SCORE ──────────────────────
         st.subheader("🌱 Your SDG-13 Impact Score")
 
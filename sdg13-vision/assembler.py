@@ -1,8 +1,10 @@
 # assembler.py
 
+import instrument
 from config import WHOLE_HOME_APPLIANCES
 
 
+@instrument.timed("assemble")
 def assemble_home_inventory(all_rooms: dict) -> dict:
     """
     Combines all room inventories.
@@ -0,0 +1,424 @@
+# batch_audit.py
+#
+# Headless audit of a surveyor photo archive, one folder per home and
+# one subfolder per room:
+#
+#   archive/
+#     home-0001/
+#       kitchen/      IMG_0001.jpg IMG_0002.jpg
+#       bedroom/      IMG_0003.jpg  walkthrough.mp4
+#     home-0002/ ...
+#
+# Videos in a room folder contribute their distinct frames
+# (video.sample_frames) alongside the photos, and count as photos in
+# the totals.
+#
+# Runs as three overlapping stages joined by bounded queues:
+#   decode   photos opened and videos sampled on a thread pool
+#   detect   one thread; photos of several homes go to YOLO together
+#            in batches of DETECT_BATCH_SIZE (detector.detect_batch)
+#   report   assemble_home_inventory -> get_full_report ->
+#            generate_suggestions, one output line per home
+# At most AUDIT_QUEUE_HOMES decoded homes wait between decode and
+# detect, so memory stays flat however big the archive is.
+#
+# Every finished home is appended (and flushed) to a JSONL file, which
+# is also the checkpoint: rerunning the same command skips the homes
+# already in it. For a .parquet output the JSONL sits next to it as
+# <output>.progress.jsonl and the Parquet file is written from it at
+# the end.
+#   python batch_audit.py /data/survey audit.jsonl
+#   python batch_audit.py /data/survey audit.parquet --tariff tangedco_domestic
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from assembler import assemble_home_inventory, get_total_inventory
+from calculator import get_full_report
+from detector import detect_batch
+from preprocess import load_image
+from suggestions import generate_suggestions
+from video import sample_frames
+from config import (
+    AUDIT_DECODE_THREADS,
+    AUDIT_QUEUE_HOMES,
+    DEFAULT_TARIFF,
+    DETECT_BATCH_SIZE,
+    PHOTO_EXTENSIONS,
+    ROOM_TYPES,
+    VIDEO_EXTENSIONS,
+)
+
+LOOSE_PHOTOS_ROOM = "Other"
+PROGRESS_EVERY_S = 10.0
+
+_ROOMS_BY_KEY = {room.lower(): room for room in ROOM_TYPES}
+
+
+# ── archive ──────────────────────────────────────────────
+
+def room_name(folder: str) -> str:
+    """
+    "living_room" / "Living-Room" -> "Living Room". Folders that are
+    not one of ROOM_TYPES keep their own name, title-cased.
+    """
+    key = " ".join(folder.replace("_", " ").replace("-", " ").split()).lower()
+    return _ROOMS_BY_KEY.get(key, key.title())
+
+
+def _photos(folder: str) -> list:
+    return sorted(
+        os.path.join(folder, name)
+        for name in os.listdir(folder)
+        if name.lower().endswith(PHOTO_EXTENSIONS + VIDEO_EXTENSIONS) and not name.startswith(".")
+    )
+
+
+def iter_homes(archive: str, skip: set = frozenset()):
+    """
+    Yields (home_id, {room: [photo paths]}) in folder-name order.
+    Photos directly inside a home folder count as LOOSE_PHOTOS_ROOM.
+    Two folders that map to the same room are merged.
+    """
+    for home_id in sorted(os.listdir(archive)):
+        home_dir = os.path.join(archive, home_id)
+        if home_id in skip or home_id.startswith(".") or not os.path.isdir(home_dir):
+            continue
+
+        rooms = {}
+        for entry in sorted(os.listdir(home_dir)):
+            path = os.path.join(home_dir, entry)
+            if os.path.isdir(path) and not entry.startswith("."):
+                photos = _photos(path)
+                if photos:
+                    rooms.setdefault(room_name(entry), []).extend(photos)
+        loose = _photos(home_dir)
+        if loose:
+            rooms.setdefault(LOOSE_PHOTOS_ROOM, []).extend(loose)
+        yield home_id, rooms
+
+
+# ── checkpoint / output ──────────────────────────────────
+
+def progress_path(output: str) -> str:
+    if output.lower().endswith(".jsonl"):
+        return output
+    return output + ".progress.jsonl"
+
+
+def read_done(path: str) -> set:
+    """
+    Home ids already written to a JSONL checkpoint. A half-written
+    last line (the run was killed mid-write) is cut off so that new
+    lines are appended after a clean newline.
+    """
+    if not os.path.exists(path):
+        return set()
+
+    done = set()
+    good_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["home_id"])
+            except (ValueError, KeyError):
+                break
+            good_bytes += len(line)
+    if good_bytes != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_bytes)
+    return done
+
+
+def write_parquet(jsonl_path: str, output: str) -> int:
+    """
+    One row per home: the headline numbers as columns, the nested
+    parts (rooms, report, suggestions) as JSON strings.
+    """
+    import pandas as pd
+
+    rows = []
+    with open(jsonl_path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            totals = record["report"]["__totals__"]
+            rows.append({
+                "home_id": record["home_id"],
+                "photos": record["photos"],
+                "failed_photos": len(record["failed_photos"]),
+                "total_kwh": totals["total_kwh"],
+                "total_co2": totals["total_co2"],
+                "total_bill": totals["total_bill"],
+                "tariff": record["tariff"],
+                "rooms": json.dumps(record["rooms"]),
+                "total_inventory": json.dumps(record["total_inventory"]),
+                "report": json.dumps(record["report"]),
+                "suggestions": json.dumps(record["suggestions"]),
+            })
+    pd.DataFrame(rows).to_parquet(output, index=False)
+    return len(rows)
+
+
+# ── stages ───────────────────────────────────────────────
+
+_DONE = object()
+
+
+class _StageError:
+    """
+    Carries an exception from a stage thread to the next stage.
+    """
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    # a plain put() would hang forever once the consumer has gone
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(q: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def _load(path: str) -> list:
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        return sample_frames(path)[0]
+    return [load_image(path)]
+
+
+def _decode_stage(homes, pool: ThreadPoolExecutor, out: queue.Queue, stop: threading.Event):
+    """
+    Submits every photo of a home to the decode pool and passes the
+    futures on. Blocking on the bounded queue is what keeps the pool
+    from running more than AUDIT_QUEUE_HOMES homes ahead.
+    """
+    try:
+        for home_id, rooms in homes:
+            if stop.is_set():
+                return
+            futures = {
+                room: [(path, pool.submit(_load, path)) for path in paths]
+                for room, paths in rooms.items()
+            }
+            _put(out, (home_id, futures), stop)
+    except BaseException as e:
+        _put(out, _StageError(e), stop)
+    finally:
+        _put(out, _DONE, stop)
+
+
+def _collect(home_id: str, futures: dict) -> tuple:
+    """
+    Waits for one home's decodes. Files that fail to open are
+    listed, not fatal.
+    """
+    room_images = {}
+    failed = []
+    for room, pending in futures.items():
+        images = room_images[room] = []
+        for path, future in pending:
+            try:
+                images.extend(future.result())
+            except Exception as e:
+                failed.append({"path": path, "error": f"{type(e).__name__}: {e}"})
+    return home_id, room_images, failed
+
+
+def _detect_stage(inp: queue.Queue, out: queue.Queue, batch_size: int,
+                  stop: threading.Event, stats: dict):
+    """
+    Takes one decoded home, plus any others already waiting, until
+    there are batch_size photos, and detects them in one go.
+    Per-room counts are the max over that room's photos, as in
+    detector.detect_rooms.
+    """
+    finished = False
+    try:
+        while not finished and not stop.is_set():
+            start = time.perf_counter()
+            item = _get(inp, stop)
+            homes = []
+            n_photos = 0
+            while True:
+                if item is _DONE or isinstance(item, _StageError):
+                    finished = True
+                    break
+                home = _collect(*item)
+                homes.append(home)
+                n_photos += sum(len(images) for images in home[1].values())
+                if n_photos >= batch_size:
+                    break
+                try:
+                    item = inp.get_nowait()
+                except queue.Empty:
+                    break
+            stats["detect_wait_s"] += time.perf_counter() - start
+
+            if homes:
+                start = time.perf_counter()
+                slots = []
+                images = []
+                for h, (_, room_images, _) in enumerate(homes):
+                    for room, room_photos in room_images.items():
+                        slots.extend([(h, room)] * len(room_photos))
+                        images.extend(room_photos)
+
+                rooms = [{room: {} for room in room_images} for _, room_images, _ in homes]
+                for (h, room), counts in zip(slots, detect_batch(images, batch_size)):
+                    combined = rooms[h][room]
+                    for appliance, count in counts.items():
+                        combined[appliance] = max(combined.get(appliance, 0), count)
+                stats["detect_s"] += time.perf_counter() - start
+
+                for (home_id, room_images, failed), inventories in zip(homes, rooms):
+                    n = sum(len(images) for images in room_images.values())
+                    _put(out, (home_id, inventories, n, failed), stop)
+
+            if isinstance(item, _StageError):
+                _put(out, item, stop)
+    except BaseException as e:
+        _put(out, _StageError(e), stop)
+    finally:
+        _put(out, _DONE, stop)
+
+
+def audit_home(home_id: str, rooms: dict, photos: int, failed: list,
+               tariff_id: str = DEFAULT_TARIFF) -> dict:
+    """
+    The report stage for one home: the same numbers the app shows.
+    """
+    assembled = assemble_home_inventory(rooms)
+    report = get_full_report(assembled, tariff_id)
+    total_inventory = get_total_inventory(assembled)
+    suggestions = generate_suggestions(
+        total_inventory, report["__totals__"]["total_kwh"], tariff_id
+    )
+    return {
+        "home_id": home_id,
+        "photos": photos,
+        "failed_photos": failed,
+        "tariff": tariff_id,
+        "rooms": assembled,
+        "total_inventory": total_inventory,
+        "report": report,
+        "suggestions": suggestions,
+    }
+
+
+def run_audit(archive: str, output: str, tariff_id: str = DEFAULT_TARIFF,
+              decode_threads: int = AUDIT_DECODE_THREADS,
+              queue_homes: int = AUDIT_QUEUE_HOMES,
+              batch_size: int = DETECT_BATCH_SIZE,
+              limit: int = None, verbose: bool = True) -> dict:
+    """
+    Audits every home in archive not already in the checkpoint.
+    Returns run statistics (homes, photos, seconds, homes_per_min, ...).
+    """
+    checkpoint = progress_path(output)
+    done = read_done(checkpoint)
+    homes = iter_homes(archive, skip=done)
+    if limit is not None:
+        homes = (home for i, home in zip(range(limit), homes))
+    if verbose and done:
+        print(f"resuming: {len(done):,} homes already in {checkpoint}", flush=True)
+
+    stats = {"homes": 0, "photos": 0, "failed_photos": 0, "detect_s": 0.0, "detect_wait_s": 0.0}
+    stop = threading.Event()
+    decoded = queue.Queue(maxsize=queue_homes)
+    detected = queue.Queue(maxsize=queue_homes)
+    pool = ThreadPoolExecutor(decode_threads, thread_name_prefix="audit-decode")
+    threads = [
+        threading.Thread(target=_decode_stage, args=(homes, pool, decoded, stop),
+                         name="audit-decode-feed", daemon=True),
+        threading.Thread(target=_detect_stage, args=(decoded, detected, batch_size, stop, stats),
+                         name="audit-detect", daemon=True),
+    ]
+
+    start = time.perf_counter()
+    last_print = start
+    try:
+        for thread in threads:
+            thread.start()
+        with open(checkpoint, "a", encoding="utf-8") as f:
+            while True:
+                item = detected.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _StageError):
+                    raise item.error
+
+                record = audit_home(*item, tariff_id=tariff_id)
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+
+                stats["homes"] += 1
+                stats["photos"] += record["photos"]
+                stats["failed_photos"] += len(record["failed_photos"])
+                now = time.perf_counter()
+                if verbose and now - last_print >= PROGRESS_EVERY_S:
+                    last_print = now
+                    print(f"{stats['homes']:>8,} homes  "
+                          f"{stats['homes'] / (now - start) * 60:>8,.1f} homes/min", flush=True)
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+        for thread in threads:
+            thread.join()
+
+    elapsed = time.perf_counter() - start
+    if not output.lower().endswith(".jsonl"):
+        write_parquet(checkpoint, output)
+
+    stats.update({
+        "resumed": len(done),
+        "seconds": round(elapsed, 2),
+        "homes_per_min": round(stats["homes"] / elapsed * 60, 1) if elapsed else 0.0,
+        "photos_per_sec": round(stats["photos"] / elapsed, 1) if elapsed else 0.0,
+        # share of wall time YOLO was busy; near 1.0 means decode keeps up
+        "detect_busy": round(stats["detect_s"] / elapsed, 3) if elapsed else 0.0,
+        "detect_s": round(stats["detect_s"], 2),
+        "detect_wait_s": round(stats["detect_wait_s"], 2),
+    })
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch home audit over a photo archive")
+    parser.add_argument("archive", help="folder with one subfolder per home, one per room inside")
+    parser.add_argument("output", help=".jsonl or .parquet")
+    parser.add_argument("--tariff", default=DEFAULT_TARIFF)
+    parser.add_argument("--decode-threads", type=int, default=AUDIT_DECODE_THREADS)
+    parser.add_argument("--queue-homes", type=int, default=AUDIT_QUEUE_HOMES)
+    parser.add_argument("--batch-size", type=int, default=DETECT_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, help="stop after this many new homes")
+    args = parser.parse_args()
+
+    stats = run_audit(args.archive, args.output, args.tariff, args.decode_threads,
+                      args.queue_homes, args.batch_size, args.limit)
+    print(f"done: {stats['homes']:,} homes, {stats['photos']:,} photos "
+          f"({stats['failed_photos']:,} unreadable, {stats['resumed']:,} homes resumed) "
+          f"in {stats['seconds']} s: {stats['homes_per_min']:,.1f} homes/min, "
+          f"{stats['photos_per_sec']:,.1f} photos/s, YOLO busy {stats['detect_busy']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
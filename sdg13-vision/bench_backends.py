@@ -0,0 +1,196 @@
+# bench_backends.py
+#
+# Parity harness for the detector backends (config.DETECT_BACKEND).
+# Each backend runs in its own spawned process over the same photos,
+# with the detection cache off, and reports
+#   latency    model load, ms per batch and per image (p50 / p95)
+#   memory     RSS added by loading the backend (libraries included)
+#              and peak RSS
+#   parity     per appliance class (YOLO_TO_APPLIANCE), the share of
+#              photos whose count matches the reference backend, and
+#              the total count each backend found
+#
+#   python bench_backends.py --photos ./survey_photos
+#   python bench_backends.py --photos ./survey_photos --backends torch,onnx-int8 --json parity.json
+#
+# Without --photos the synthetic fixtures are used; they contain no
+# real appliances, so they measure speed and memory but not accuracy.
+
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from config import DETECT_BACKEND_WEIGHTS, DETECT_BATCH_SIZE, PHOTO_EXTENSIONS
+
+
+def rss_mb(field: str = "VmRSS") -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource     # Unix only
+    except ImportError:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def photo_paths(folder: str) -> list:
+    return sorted(
+        path for path in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+        if path.lower().endswith(PHOTO_EXTENSIONS)
+    )
+
+
+def _load_images(paths: list, count: int) -> list:
+    if paths:
+        from preprocess import load_image
+        return [load_image(path) for path in paths]
+    from fixtures import BOX_DENSITIES, IMAGE_SIZES, synthetic_image
+    return [synthetic_image(IMAGE_SIZES["medium"], BOX_DENSITIES["dense"], seed=i) for i in range(count)]
+
+
+def run_backend(backend: str, paths: list, count: int, batch_size: int, repeats: int) -> dict:
+    """
+    Child process: loads one backend and times detect_batch over the
+    photos. Returns per-photo counts from the first pass plus timings.
+    """
+    # before detector / config are imported in this process
+    os.environ["SDG13_DETECT_BACKEND"] = backend
+    os.environ["SDG13_DETECT_CACHE_BYTES"] = "0"
+    os.environ.pop("SDG13_DETECT_CACHE_DIR", None)
+
+    import detector
+
+    weights = detector.get_weights_path(backend)
+    if not os.path.exists(weights):
+        return {"skipped": f"{weights} not found"}
+
+    images = _load_images(paths, count)
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    detector.warmup()
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    counts = None
+    batch_ms = []
+    image_ms = []
+    for _ in range(repeats):
+        found = []
+        for i in range(0, len(images), batch_size):
+            batch = images[i:i + batch_size]
+            start = time.perf_counter()
+            found.extend(detector.detect_batch(batch, batch_size))
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            batch_ms.append(elapsed_ms)
+            image_ms.append(elapsed_ms / len(batch))
+        if counts is None:
+            counts = found
+
+    return {
+        "weights": weights,
+        "weights_mb": round(os.path.getsize(weights) / 1024 / 1024, 1),
+        "load_s": round(load_s, 2),
+        "batch_ms_p50": round(float(np.percentile(batch_ms, 50)), 1),
+        "batch_ms_p95": round(float(np.percentile(batch_ms, 95)), 1),
+        "image_ms_p50": round(float(np.percentile(image_ms, 50)), 1),
+        "image_ms_p95": round(float(np.percentile(image_ms, 95)), 1),
+        "load_rss_mb": round(rss_loaded - rss_before, 1),
+        "peak_rss_mb": round(rss_mb("VmHWM"), 1),
+        "counts": counts,
+    }
+
+
+def compare(reference: list, candidate: list) -> dict:
+    """
+    Per appliance class: photos whose counts agree, and total counts.
+    """
+    from detector import APPLIANCE_KEYS
+
+    per_class = {}
+    for appliance in APPLIANCE_KEYS:
+        ref = np.array([c.get(appliance, 0) for c in reference])
+        cand = np.array([c.get(appliance, 0) for c in candidate])
+        per_class[appliance] = {
+            "agreement": round(float((ref == cand).mean()), 3) if len(ref) else 1.0,
+            "reference_total": int(ref.sum()),
+            "candidate_total": int(cand.sum()),
+        }
+    exact = [r == c for r, c in zip(reference, candidate)]
+    return {
+        "photos_identical": round(float(np.mean(exact)), 3) if exact else 1.0,
+        "per_class": per_class,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detector backend parity and speed")
+    parser.add_argument("--photos", help="folder of real room photos (searched recursively)")
+    parser.add_argument("--count", type=int, default=24, help="synthetic photos when no --photos")
+    parser.add_argument("--backends", default=",".join(DETECT_BACKEND_WEIGHTS),
+                        help="comma separated; the first is the reference")
+    parser.add_argument("--batch-size", type=int, default=DETECT_BATCH_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="write the full results here")
+    args = parser.parse_args()
+
+    paths = photo_paths(args.photos) if args.photos else []
+    if args.photos and not paths:
+        parser.error(f"no photos found in {args.photos}")
+    backends = args.backends.split(",")
+    print(f"{len(paths) or args.count} {'photos' if paths else 'synthetic images'}, "
+          f"batch size {args.batch_size}, {args.repeats} repeats")
+
+    results = {}
+    ctx = get_context("spawn")
+    for backend in backends:
+        with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            results[backend] = pool.submit(
+                run_backend, backend, paths, args.count, args.batch_size, args.repeats
+            ).result()
+
+    print(f"\n{'backend':<10} {'weights':>8} {'load':>6} {'ms/img p50':>11} {'p95':>7} "
+          f"{'ms/batch':>9} {'load RSS':>10} {'peak RSS':>9}")
+    for backend, r in results.items():
+        if "skipped" in r:
+            print(f"{backend:<10} skipped: {r['skipped']}")
+            continue
+        print(f"{backend:<10} {r['weights_mb']:>6.1f}MB {r['load_s']:>5.1f}s {r['image_ms_p50']:>11.1f} "
+              f"{r['image_ms_p95']:>7.1f} {r['batch_ms_p50']:>9.1f} {r['load_rss_mb']:>8.0f}MB "
+              f"{r['peak_rss_mb']:>7.0f}MB")
+
+    reference = backends[0]
+    if "skipped" in results[reference]:
+        print(f"\nno parity check: reference backend {reference} was skipped")
+    else:
+        ref = results[reference]
+        for backend in backends[1:]:
+            r = results[backend]
+            if "skipped" in r:
+                continue
+            parity = r["parity"] = compare(ref["counts"], r["counts"])
+            speedup = ref["image_ms_p50"] / r["image_ms_p50"] if r["image_ms_p50"] else float("inf")
+            print(f"\n{backend} vs {reference}: {speedup:.2f}x per image, "
+                  f"{parity['photos_identical']:.1%} of photos with identical counts")
+            for appliance, c in parity["per_class"].items():
+                if c["reference_total"] or c["candidate_total"]:
+                    print(f"  {appliance:<14} agree {c['agreement']:>6.1%}  "
+                          f"count {c['reference_total']:>4} -> {c['candidate_total']:>4}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
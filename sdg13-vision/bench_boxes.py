@@ -0,0 +1,88 @@
+# bench_boxes.py
+#
+# Per-box Python loop vs. the vectorised count_boxes() on box-heavy
+# results. Uses fake YOLO outputs, so no model or torch is needed.
+#   python bench_boxes.py --boxes 50,300,1000
+
+import argparse
+import time
+
+import numpy as np
+
+from config import DETECT_CONFIDENCE, YOLO_TO_APPLIANCE
+from detector import build_class_lut, count_boxes
+
+# COCO class names for the ids YOLO_TO_APPLIANCE cares about
+COCO_NAMES = {i: f"class_{i}" for i in range(80)}
+COCO_NAMES.update({
+    62: "tv", 63: "laptop", 67: "cell phone", 68: "microwave",
+    69: "oven", 70: "toaster", 72: "refrigerator", 74: "clock",
+})
+
+
+class FakeBoxes:
+    def __init__(self, cls, conf):
+        self.cls = cls
+        self.conf = conf
+
+    def __iter__(self):
+        for i in range(len(self.cls)):
+            yield FakeBoxes(self.cls[i:i + 1], self.conf[i:i + 1])
+
+
+def make_boxes(n: int, seed: int = 0) -> FakeBoxes:
+    rng = np.random.default_rng(seed)
+    cls = rng.integers(0, 80, n).astype(np.float32)
+    conf = rng.uniform(0.05, 0.95, n).astype(np.float32)
+    try:
+        import torch
+        return FakeBoxes(torch.from_numpy(cls), torch.from_numpy(conf))
+    except ImportError:
+        return FakeBoxes(cls, conf)
+
+
+def per_box_loop(boxes: FakeBoxes) -> dict:
+    detected = {}
+    for box in boxes:
+        class_id = int(box.cls[0])
+        class_name = COCO_NAMES[class_id]
+        confidence = float(box.conf[0])
+
+        if confidence < DETECT_CONFIDENCE:
+            continue
+
+        if class_name in YOLO_TO_APPLIANCE:
+            key = YOLO_TO_APPLIANCE[class_name]
+            detected[key] = detected.get(key, 0) + 1
+    return detected
+
+
+def median_us(fn, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--boxes", default="10,100,300,1000")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    lut = build_class_lut(COCO_NAMES)
+
+    for n in [int(b) for b in args.boxes.split(",")]:
+        boxes = make_boxes(n)
+        assert per_box_loop(boxes) == count_boxes(boxes.cls, boxes.conf, lut)
+
+        loop_us = median_us(lambda: per_box_loop(boxes), args.repeats)
+        vec_us = median_us(lambda: count_boxes(boxes.cls, boxes.conf, lut), args.repeats)
+        print(f"{n:>5} boxes: loop {loop_us:9.1f} us   vectorised {vec_us:8.1f} us   "
+              f"({loop_us / vec_us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
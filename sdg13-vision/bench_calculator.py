@@ -0,0 +1,75 @@
+# bench_calculator.py
+#
+# Scalar get_full_report loop vs. bulk_calculator.bulk_report.
+# Checks every number matches exactly, then reports households/sec.
+#   python bench_calculator.py --homes 100000
+
+import argparse
+import time
+
+import numpy as np
+
+from bulk_calculator import APPLIANCES, bulk_report, rooms_tensor
+from calculator import get_full_report
+from config import ROOM_TYPES
+
+
+def random_homes(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    homes = []
+    for _ in range(n):
+        home = {}
+        for room in ROOM_TYPES:
+            if rng.random() < 0.3:
+                continue
+            picked = rng.choice(APPLIANCES, size=rng.integers(0, 6), replace=False)
+            home[room] = {str(a): int(rng.integers(1, 5)) for a in picked}
+        homes.append(home)
+    return homes
+
+
+def check_exact(homes: list, bulk: dict):
+    for row, home in enumerate(homes):
+        report = get_full_report(home)
+        for r, room in enumerate(ROOM_TYPES):
+            if room not in home:
+                continue
+            assert report[room]["total_kwh"] == bulk["room_kwh"][row, r]
+            assert report[room]["total_co2"] == bulk["room_co2"][row, r]
+            assert report[room]["bill"] == bulk["room_bill"][row, r]
+            for appliance, info in report[room]["breakdown"].items():
+                a = APPLIANCES.index(appliance)
+                assert info["kwh"] == bulk["appliance_kwh"][row, r, a]
+                assert info["co2"] == bulk["appliance_co2"][row, r, a]
+        totals = report["__totals__"]
+        assert totals["total_kwh"] == bulk["total_kwh"][row]
+        assert totals["total_co2"] == bulk["total_co2"][row]
+        assert totals["total_bill"] == bulk["total_bill"][row]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--homes", type=int, default=100_000)
+    parser.add_argument("--check", type=int, default=20_000, help="homes to compare exactly")
+    args = parser.parse_args()
+
+    homes = random_homes(args.homes)
+    counts = rooms_tensor(homes)
+
+    start = time.perf_counter()
+    for home in homes:
+        get_full_report(home)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bulk = bulk_report(counts)
+    bulk_s = time.perf_counter() - start
+
+    check_exact(homes[:args.check], {k: v[:args.check] for k, v in bulk.items()})
+    print(f"exact match on {min(args.check, args.homes):,} homes")
+    print(f"scalar : {args.homes / scalar_s:12,.0f} homes/sec")
+    print(f"bulk   : {args.homes / bulk_s:12,.0f} homes/sec  ({scalar_s / bulk_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# bench_detector.py
+#
+# Compares the old one-image-at-a-time loop against batched detection.
+#   python bench_detector.py                     (synthetic photos)
+#   python bench_detector.py --photos ./my_room  (real jpg/png files)
+#   python bench_detector.py --workers 1,2,4     (process-pool scaling)
+
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import wait
+
+# measure the model, not the detection cache (also applies to pool workers)
+os.environ["SDG13_DETECT_CACHE_BYTES"] = "0"
+os.environ.pop("SDG13_DETECT_CACHE_DIR", None)
+
+import numpy as np
+from PIL import Image
+
+from detector import detect_appliances, detect_from_multiple
+from executor import DetectionExecutor
+
+
+def load_photos(folder: str) -> list:
+    paths = sorted(
+        glob.glob(os.path.join(folder, "*.jpg"))
+        + glob.glob(os.path.join(folder, "*.jpeg"))
+        + glob.glob(os.path.join(folder, "*.png"))
+    )
+    return [Image.open(p).convert("RGB") for p in paths]
+
+
+def synthetic_photos(count: int, width: int, height: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+        for _ in range(count)
+    ]
+
+
+def per_image_loop(images: list) -> dict:
+    combined = {}
+    for image in images:
+        for appliance, count in detect_appliances(image).items():
+            combined[appliance] = max(combined.get(appliance, 0), count)
+    return combined
+
+
+def time_it(fn, images: list, repeats: int) -> float:
+    fn(images)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(images)
+    elapsed = time.perf_counter() - start
+    return len(images) * repeats / elapsed
+
+
+def pool_throughput(images: list, workers: int, sessions: int, repeats: int) -> float:
+    """
+    Simulates `sessions` users each submitting all images as one room.
+    """
+    executor = DetectionExecutor(workers=workers, max_queue=sessions)
+    try:
+        executor.submit(images[:1]).result()  # wait for workers to load
+        start = time.perf_counter()
+        for _ in range(repeats):
+            wait([executor.submit(images) for _ in range(sessions)])
+        elapsed = time.perf_counter() - start
+    finally:
+        executor.shutdown()
+    return len(images) * sessions * repeats / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--photos", help="folder of room photos")
+    parser.add_argument("--count", type=int, default=24)
+    parser.add_argument("--width", type=int, default=1600)
+    parser.add_argument("--height", type=int, default=1200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--workers", help="e.g. 1,2,4 to benchmark the process pool")
+    parser.add_argument("--sessions", type=int, default=8)
+    args = parser.parse_args()
+
+    if args.photos:
+        images = load_photos(args.photos)
+    else:
+        images = synthetic_photos(args.count, args.width, args.height)
+
+    print(f"{len(images)} images, {args.repeats} repeats")
+
+    loop_ips = time_it(per_image_loop, images, args.repeats)
+    print(f"per-image loop      : {loop_ips:7.2f} images/sec")
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+        ips = time_it(
+            lambda imgs: detect_from_multiple(imgs, batch_size=batch_size),
+            images,
+            args.repeats,
+        )
+        print(f"batched (size {batch_size:>3}) : {ips:7.2f} images/sec  "
+              f"({ips / loop_ips:.2f}x)")
+
+    if args.workers:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            ips = pool_throughput(images, workers, args.sessions, args.repeats)
+            print(f"pool ({workers:>2} workers)   : {ips:7.2f} images/sec  "
+                  f"({args.sessions} concurrent sessions)")
+
+
+if __name__ == "__main__":
+    main()
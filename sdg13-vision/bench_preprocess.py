@@ -0,0 +1,131 @@
+# bench_preprocess.py
+#
+# Memory / latency of getting a phone photo ready for YOLO:
+#   old: Image.open(f).convert("RGB") + np.array(image)  (full resolution)
+#   new: preprocess.load_image (JPEG draft) + letterbox into a reused buffer
+#
+#   python bench_preprocess.py                    (synthetic 12 MP JPEG)
+#   python bench_preprocess.py --photo IMG_0001.jpg --detect
+
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_jpeg(width: int, height: int) -> bytes:
+    import numpy as np
+    from PIL import Image
+
+    # smooth gradient + noise compresses like a real photo, unlike pure noise
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    base = np.stack([x * 255 // width, y * 255 // height, (x + y) * 127 // (width + height)], axis=-1)
+    pixels = np.clip(base + rng.integers(-20, 20, base.shape), 0, 255).astype(np.uint8)
+
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, format="JPEG", quality=90)
+    return out.getvalue()
+
+
+def old_path(data: bytes, detect: bool):
+    import numpy as np
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    img_array = np.array(image)
+    if detect:
+        from detector import get_model
+        get_model()(img_array, verbose=False)
+
+
+def new_path(data: bytes, detect: bool):
+    from preprocess import load_image
+    if detect:
+        from detector import detect_appliances
+        detect_appliances(load_image(io.BytesIO(data)))
+    else:
+        from preprocess import batch_buffer, letterbox
+        letterbox(load_image(io.BytesIO(data)), out=batch_buffer(1)[0])
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is reset by exec, ru_maxrss can carry over the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource     # Unix only
+    except ImportError:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(mode: str, photo: str, repeats: int, detect: bool):
+    with open(photo, "rb") as f:
+        data = f.read()
+
+    fn = old_path if mode == "old" else new_path
+    if detect:
+        from detector import warmup
+        warmup()
+    fn(data, detect)
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(data, detect)
+        times.append(time.perf_counter() - start)
+
+    print(f"{statistics.median(times) * 1000:.1f} {peak_rss_mb():.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--photo", help="a JPEG to test with")
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--detect", action="store_true", help="include the YOLO pass")
+    parser.add_argument("--child", choices=["old", "new"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.photo, args.repeats, args.detect)
+        return
+
+    photo = args.photo
+    if photo is None:
+        photo = os.path.join(HERE, f"_bench_{args.width}x{args.height}.jpg")
+        with open(photo, "wb") as f:
+            f.write(make_jpeg(args.width, args.height))
+
+    # detection cache off so every repeat really runs
+    env = dict(os.environ, SDG13_DETECT_CACHE_BYTES="0")
+    env.pop("SDG13_DETECT_CACHE_DIR", None)
+
+    try:
+        for mode in ("old", "new"):
+            cmd = [sys.executable, __file__, "--child", mode, "--photo", photo,
+                   "--repeats", str(args.repeats)]
+            if args.detect:
+                cmd.append("--detect")
+            out = subprocess.run(cmd, cwd=HERE, env=env, capture_output=True,
+                                 text=True, check=True).stdout.split()
+            print(f"{mode:>3}: median {float(out[0]):8.1f} ms   peak RSS {float(out[1]):8.1f} MB")
+    finally:
+        if args.photo is None:
+            os.remove(photo)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench_startup.py
+#
+# Measures cold-start cost of the vision app in fresh processes:
+#   - importing the app modules (model not loaded)
+#   - importing + loading YOLO and running warmup()
+#   - rendering the first page of app_vision.py, with and
+#     without the vision stack loaded beforehand
+#
+#   python bench_startup.py --repeats 5
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = {
+    "import modules": """
+import detector, assembler, calculator, suggestions
+""",
+    "import + warmup (vision stack)": """
+import detector
+detector.warmup()
+""",
+    "first page render": """
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("app_vision.py", default_timeout=120).run()
+""",
+    "warmup + first page render": """
+import detector
+detector.warmup()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("app_vision.py", default_timeout=120).run()
+""",
+}
+
+TIMER = """
+import time, sys
+_t0 = time.perf_counter()
+{body}
+print(time.perf_counter() - _t0)
+print("torch" in sys.modules)
+"""
+
+
+def run_once(body: str):
+    out = subprocess.run(
+        [sys.executable, "-c", TIMER.format(body=body.strip())],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.strip().splitlines()
+    return float(out[-2]), out[-1] == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, body in SCENARIOS.items():
+        try:
+            runs = [run_once(body) for _ in range(args.repeats)]
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<32}: failed ({e.stderr.strip().splitlines()[-1]})")
+            continue
+        times = [t for t, _ in runs]
+        torch_loaded = runs[-1][1]
+        print(f"{name:<32}: median {statistics.median(times) * 1000:8.1f} ms  "
+              f"min {min(times) * 1000:8.1f} ms  torch loaded: {torch_loaded}")
+
+
+if __name__ == "__main__":
+    main()
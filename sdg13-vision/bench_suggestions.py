@@ -0,0 +1,51 @@
+# bench_suggestions.py
+#
+# Per-home generate_suggestions loop vs. one batched rule evaluation.
+#   python bench_suggestions.py --homes 50000
+
+import argparse
+import time
+
+import numpy as np
+
+from bulk_calculator import inventory_matrix
+from rules import get_rules
+from suggestions import generate_suggestions
+
+APPLIANCES = ["air conditioner", "fan", "refrigerator", "water heater", "tv", "laptop"]
+
+
+def random_inventories(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    inventories = [
+        {a: int(rng.integers(1, 5)) for a in APPLIANCES if rng.random() < 0.5}
+        for _ in range(n)
+    ]
+    total_kwh = np.round(rng.uniform(50, 1500, n), 2)
+    return inventories, total_kwh
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--homes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    inventories, total_kwh = random_inventories(args.homes)
+    rules = get_rules()
+
+    start = time.perf_counter()
+    for inventory, kwh in zip(inventories, total_kwh.tolist()):
+        generate_suggestions(inventory, kwh)
+    loop_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    counts = inventory_matrix(inventories)
+    rules.evaluate(counts, total_kwh)
+    batch_s = time.perf_counter() - start
+
+    print(f"per-home loop : {args.homes / loop_s:12,.0f} homes/sec")
+    print(f"batched arrays: {args.homes / batch_s:12,.0f} homes/sec  ({loop_s / batch_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
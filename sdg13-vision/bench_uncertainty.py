@@ -0,0 +1,53 @@
+# bench_uncertainty.py
+#
+# Latency of estimate_uncertainty per home against UNCERTAINTY_BUDGET_MS,
+# on one core (numpy / BLAS threads pinned to 1 before import).
+#   python bench_uncertainty.py --homes 200 --samples 10000
+
+import os
+
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+import argparse
+
+import numpy as np
+
+from config import APPLIANCE_POWER, UNCERTAINTY_BUDGET_MS
+from uncertainty import estimate_uncertainty
+
+APPLIANCES = list(APPLIANCE_POWER)
+
+
+def random_home(rng):
+    inventory = {a: int(rng.integers(1, 6)) for a in APPLIANCES if rng.random() < 0.6}
+    confidences = {
+        a: rng.uniform(0.35, 1.0, count).round(2).tolist()
+        for a, count in inventory.items() if rng.random() < 0.5
+    }
+    return inventory, confidences
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--homes", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    homes = [random_home(rng) for _ in range(args.homes)]
+    estimate_uncertainty(*homes[0], samples=args.samples)
+
+    elapsed = np.array([
+        estimate_uncertainty(inventory, confidences, samples=args.samples, seed=i)["elapsed_ms"]
+        for i, (inventory, confidences) in enumerate(homes)
+    ])
+    p50, p99 = np.percentile(elapsed, [50, 99])
+    over = int((elapsed > UNCERTAINTY_BUDGET_MS).sum())
+    print(f"{args.samples:,} samples/home over {args.homes} homes")
+    print(f"p50 {p50:.1f} ms  p99 {p99:.1f} ms  max {elapsed.max():.1f} ms  "
+          f"budget {UNCERTAINTY_BUDGET_MS} ms  over budget: {over}")
+
+
+if __name__ == "__main__":
+    main()
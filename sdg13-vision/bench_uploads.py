@@ -0,0 +1,112 @@
+# bench_uploads.py
+#
+# Rerun latency and memory of the app's upload handling, simulated
+# without a browser: every "rerun" walks the session's uploaded photos
+# the way app_vision.py does on each widget interaction.
+#   full      Image.open(file).convert("RGB") per photo per rerun
+#             (the original app)
+#   draft     preprocess.load_image per photo per rerun
+#   session   uploads.SessionUploads: thumbnail decoded once, then
+#             looked up
+# Each mode runs in its own spawned process. Reported per mode:
+# first / later rerun latency, peak RSS while the reruns ran, and RSS
+# still held per session afterwards. Memory Streamlit itself holds for
+# st.image payloads is not included, which flatters full and draft.
+#   python bench_uploads.py
+#   python bench_uploads.py --sessions 8 --photos 20 --reruns 5
+
+import argparse
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from bench_backends import rss_mb
+
+MODES = ("full", "draft", "session")
+
+
+class FakeUpload(io.BytesIO):
+    """
+    Stands in for streamlit's UploadedFile: bytes plus a file_id.
+    """
+
+    def __init__(self, data: bytes, file_id: str, name: str):
+        super().__init__(data)
+        self.file_id = file_id
+        self.name = name
+
+
+def run_mode(mode: str, photos: list, sessions: int, reruns: int) -> dict:
+    from PIL import Image
+    from preprocess import load_image
+    from uploads import ProcessBudget, SessionUploads
+
+    uploads = [
+        [FakeUpload(data, f"s{s}-p{p}", f"photo{p}.jpg") for p, data in enumerate(photos)]
+        for s in range(sessions)
+    ]
+    budget = ProcessBudget(1 << 40)
+    stores = [SessionUploads(budget=budget) for _ in range(sessions)]
+    baseline = rss_mb()
+
+    def rerun(s: int):
+        shown = []
+        for file in uploads[s]:
+            file.seek(0)
+            if mode == "full":
+                shown.append(Image.open(file).convert("RGB"))
+            elif mode == "draft":
+                shown.append(load_image(file))
+            else:
+                shown.append(stores[s].entry(file).thumbnail)
+        return shown
+
+    first_ms = []
+    later_ms = []
+    for r in range(reruns):
+        for s in range(sessions):
+            start = time.perf_counter()
+            rerun(s)
+            (first_ms if r == 0 else later_ms).append((time.perf_counter() - start) * 1000)
+
+    return {
+        "first_rerun_ms": round(float(np.median(first_ms)), 1),
+        "rerun_ms": round(float(np.median(later_ms)), 3) if later_ms else None,
+        "peak_rss_mb": round(rss_mb("VmHWM") - baseline, 1),
+        "held_per_session_mb": round((rss_mb() - baseline) / sessions, 2),
+        "stored_per_session_kb": round(sum(store.bytes for store in stores) / sessions / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--photos", type=int, default=12, help="photos per session")
+    parser.add_argument("--reruns", type=int, default=3)
+    parser.add_argument("--size", default="large", help="fixtures.IMAGE_SIZES key")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    from fixtures import BOX_DENSITIES, IMAGE_SIZES, synthetic_jpeg
+    photos = [
+        synthetic_jpeg(IMAGE_SIZES[args.size], BOX_DENSITIES["dense"], seed=i)
+        for i in range(args.photos)
+    ]
+    print(f"{args.sessions} sessions x {args.photos} photos {IMAGE_SIZES[args.size]}, "
+          f"{args.reruns} reruns each")
+    print(f"{'mode':<8} {'1st rerun':>10} {'rerun':>9} {'peak RSS':>9} {'held/session':>13} {'stored/session':>15}")
+
+    ctx = get_context("spawn")
+    for mode in args.modes.split(","):
+        with ProcessPoolExecutor(1, mp_context=ctx) as pool:
+            r = pool.submit(run_mode, mode, photos, args.sessions, args.reruns).result()
+        rerun = f"{r['rerun_ms']:.2f}ms" if r["rerun_ms"] is not None else "-"
+        print(f"{mode:<8} {r['first_rerun_ms']:>8.1f}ms {rerun:>9} {r['peak_rss_mb']:>7.0f}MB "
+              f"{r['held_per_session_mb']:>11.2f}MB {r['stored_per_session_kb']:>13.1f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# bulk_calculator.py
+#
+# Array version of calculator.py for running many households at once.
+# Counts live in a (households, rooms, appliances) integer array whose
+# last axis follows APPLIANCES (the order of config.APPLIANCE_POWER).
+# Every number matches the scalar functions exactly, rounding included.
+
+import numpy as np
+
+from config import (
+    APPLIANCE_POWER,
+    CO2_FACTOR,
+    DEFAULT_TARIFF,
+    ROOM_TYPES,
+)
+from calculator import calculate_monthly_kwh
+from tariffs import get_tariff, round2
+
+APPLIANCES = list(APPLIANCE_POWER)
+APPLIANCE_INDEX = {name: i for i, name in enumerate(APPLIANCES)}
+
+
+def inventory_matrix(inventories: list) -> np.ndarray:
+    """
+    List of {appliance: count} dicts -> (n, appliances) int array.
+    Appliances not in APPLIANCE_POWER are dropped (they count as 0 kWh).
+    """
+    counts = np.zeros((len(inventories), len(APPLIANCES)), dtype=np.int64)
+    for row, inventory in enumerate(inventories):
+        for appliance, count in inventory.items():
+            col = APPLIANCE_INDEX.get(appliance)
+            if col is not None:
+                counts[row, col] = count
+    return counts
+
+
+def room_names(homes: list) -> list:
+    """
+    ROOM_TYPES, then every other room name in the homes ("Bedroom 2",
+    free-form names) in the order first seen.
+    """
+    names = dict.fromkeys(ROOM_TYPES)
+    for home in homes:
+        names.update(dict.fromkeys(home))
+    return list(names)
+
+
+def rooms_tensor(homes: list, rooms: list = None) -> np.ndarray:
+    """
+    List of assembled homes ({room: {appliance: count}}) ->
+    (n, rooms, appliances) int array. Rooms a home does not have are 0.
+    rooms defaults to room_names(homes).
+    """
+    if rooms is None:
+        rooms = room_names(homes)
+    counts = np.zeros((len(homes), len(rooms), len(APPLIANCES)), dtype=np.int64)
+    room_index = {room: i for i, room in enumerate(rooms)}
+    for row, home in enumerate(homes):
+        for room, inventory in home.items():
+            if room not in room_index:
+                raise ValueError(f"room {room!r} of home {row} is not in rooms {list(rooms)}")
+            counts[row, room_index[room]] = inventory_matrix([inventory])[0]
+    return counts
+
+
+def kwh_table(max_count: int) -> np.ndarray:
+    """
+    (appliances, max_count + 1) table of calculate_monthly_kwh(a, c),
+    built with the scalar function so rounding is identical.
+    """
+    return np.array([
+        [calculate_monthly_kwh(appliance, count) for count in range(max_count + 1)]
+        for appliance in APPLIANCES
+    ])
+
+
+def appliance_kwh(counts: np.ndarray) -> np.ndarray:
+    table = kwh_table(int(counts.max(initial=0)))
+    return table[np.arange(len(APPLIANCES)), counts]
+
+
+def calculate_co2(kwh) -> np.ndarray:
+    return round2(np.asarray(kwh, dtype=np.float64) * CO2_FACTOR)
+
+
+def calculate_bill(units, tariff_id: str = DEFAULT_TARIFF) -> np.ndarray:
+    return get_tariff(tariff_id).bill(np.asarray(units, dtype=np.float64))
+
+
+def bulk_report(counts: np.ndarray, tariff_id: str = DEFAULT_TARIFF) -> dict:
+    """
+    counts: (households, rooms, appliances) int array.
+    Returns arrays with the same numbers as get_full_report:
+      appliance_kwh / appliance_co2  (n, rooms, appliances)
+      room_kwh / room_co2 / room_bill (n, rooms)
+      total_kwh / total_co2 / total_bill (n,)
+    """
+    kwh = appliance_kwh(counts)
+    room_kwh = round2(kwh.sum(axis=2))
+
+    # get_full_report adds rooms one by one and bills the unrounded sum
+    total = np.zeros(len(counts))
+    for room in range(counts.shape[1]):
+        total = total + room_kwh[:, room]
+
+    return {
+        "appliance_kwh": kwh,
+        "appliance_co2": calculate_co2(kwh),
+        "room_kwh": room_kwh,
+        "room_co2": calculate_co2(room_kwh),
+        "room_bill": calculate_bill(room_kwh, tariff_id),
+        "total_kwh": round2(total),
+        "total_co2": calculate_co2(total),
+        "total_bill": calculate_bill(total, tariff_id),
+    }
@@ -0,0 +1,149 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+
+def image_digest(image: Image.Image) -> str:
+    """
+    Hash of the decoded pixels, so the same photo re-uploaded
+    (or re-encoded with a different file name) gives the same key.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """
+    Hash of a weights file. Falls back to the name when the
+    file is not on disk yet (ultralytics downloads it on first use).
+    """
+    if not os.path.exists(path):
+        return os.path.basename(path)
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class DetectionCache:
+    """
+    LRU cache of detection results with a byte budget.
+    If disk_dir is set, results are also written there as small
+    JSON files so they survive restarts and are shared between
+    worker processes.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image: Image.Image, weights: str, confidence: float) -> str:
+        return f"{image_digest(image)}-{weights}-{confidence:.4f}"
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(self._entries[key][0])
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._put_memory(key, value)
+        return dict(value)
+
+    def put(self, key: str, value: dict):
+        value = dict(value)
+        with self._lock:
+            self._put_memory(key, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ── internals ─────────────────────────────────────
+
+    def _put_memory(self, key: str, value: dict):
+        size = len(key) + len(json.dumps(value)) + 64
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (value, size)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            _, (_, old_size) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key + ".json")
+
+    def _read_disk(self, key: str):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, value: dict):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # write-then-rename so other processes never read half a file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -3,9 +3,10 @@
 from config import (
     APPLIANCE_POWER,
     CO2_FACTOR,
-    TANGEDCO_SLABS,
-    TANGEDCO_FIXED_CHARGE,
+    DEFAULT_TARIFF,
 )
+import instrument
+from tariffs import get_tariff
 
 
 def calculate_monthly_kwh(appliance: str, count: int = 1) -> float:
@@ -27,39 +28,36 @@ def calculate_co2(kwh: float) -> float:
     return round(kwh * CO2_FACTOR, 2)
 
 
-def calculate_tangedco_bill(units: float) -> float:
-    bill = 0.0
-    previous_limit = 0
+def calculate_bill(units: float, tariff_id: str = DEFAULT_TARIFF) -> float:
+    return get_tariff(tariff_id).bill(units)
 
-    for limit, rate in TANGEDCO_SLABS:
-        if units <= previous_limit:
-            break
-        taxable = min(units, limit) - previous_limit
-        bill += taxable * rate
-        previous_limit = limit
 
-    bill += TANGEDCO_FIXED_CHARGE
-    return round(bill, 2)
+def calculate_tangedco_bill(units: float) -> float:
+    return calculate_bill(units, "tangedco_domestic")
 
 
-def get_full_report(assembled_rooms: dict) -> dict:
+@instrument.timed("report")
+def get_full_report(assembled_rooms: dict, tariff_id: str = DEFAULT_TARIFF) -> dict:
     report = {}
     total_kwh = 0.0
 
     for room, inventory in assembled_rooms.items():
-        room_kwh = calculate_room_kwh(inventory)
-        room_co2 = calculate_co2(room_kwh)
-        room_bill = calculate_tangedco_bill(room_kwh)
-
         breakdown = {}
+        room_total = 0.0
         for appliance, count in inventory.items():
             kwh = calculate_monthly_kwh(appliance, count)
+            room_total += kwh
             breakdown[appliance] = {
                 "count": count,
                 "kwh": kwh,
                 "co2": calculate_co2(kwh),
             }
 
+        # same sum, same order as calculate_room_kwh(inventory)
+        room_kwh = round(room_total, 2)
+        room_co2 = calculate_co2(room_kwh)
+        room_bill = calculate_bill(room_kwh, tariff_id)
+
         report[room] = {
             "inventory": inventory,
             "breakdown": breakdown,
@@ -72,7 +70,7 @@ def get_full_report(assembled_rooms: dict) -> dict:
     report["__totals__"] = {
         "total_kwh": round(total_kwh, 2),
         "total_co2": round(calculate_co2(total_kwh), 2),
-        "total_bill": round(calculate_tangedco_bill(total_kwh), 2),
+        "total_bill": round(calculate_bill(total_kwh, tariff_id), 2),
     }
 
     return report
@@ -1,5 +1,8 @@
 # config.py
 
+import json
+import os
+
 APPLIANCE_POWER = {
     "tv":              {"watts": 150,  "hours": 6,    "label": "Television"},
     "refrigerator":    {"watts": 250,  "hours": 24,   "label": "Refrigerator"},
@@ -18,13 +21,25 @@ APPLIANCE_POWER = {
 
 CO2_FACTOR = 0.82
 
-TANGEDCO_SLABS = [
-    (100,        0.00),
-    (200,        1.50),
-    (500,        3.00),
-    (float("inf"), 5.00),
-]
-TANGEDCO_FIXED_CHARGE = 30
+# slab tariffs live in tariffs.json, see tariffs.py
+TARIFF_FILE = "tariffs.json"
+DEFAULT_TARIFF = os.environ.get("SDG13_TARIFF", "tangedco_domestic")
+
+
+def _check_default_tariff():
+    # every calculator / report call defaults to it: fail here, clearly
+    path = TARIFF_FILE
+    if not os.path.isabs(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    with open(path, encoding="utf-8") as f:
+        known = sorted(json.load(f))
+    if DEFAULT_TARIFF not in known:
+        raise ValueError(f"SDG13_TARIFF={DEFAULT_TARIFF!r} is not in {TARIFF_FILE}; known tariffs: {known}")
+
+
+_check_default_tariff()
+
+SUGGESTION_RULES_FILE = "suggestion_rules.json"
 
 ROOM_TYPES = [
     "Living Room",
@@ -52,3 +67,79 @@ WHOLE_HOME_APPLIANCES = [
     "washing machine",
     "water heater",
 ]
+
+DETECT_WEIGHTS = "yolov8n.pt"
+
+# Which model runs detection. "torch" is the fp32 PyTorch model above;
+# "onnx" and "onnx-int8" are the exports written by export_detector.py,
+# run on onnxruntime. bench_backends.py compares them.
+DETECT_BACKEND = os.environ.get("SDG13_DETECT_BACKEND", "torch")
+DETECT_BACKEND_WEIGHTS = {
+    "torch":     DETECT_WEIGHTS,
+    "onnx":      "yolov8n.onnx",
+    "onnx-int8": "yolov8n-int8.onnx",
+}
+DETECT_CONFIDENCE = 0.35
+DETECT_IMG_SIZE = 640
+DETECT_BATCH_SIZE = 8
+
+DETECT_CACHE_BYTES = int(os.environ.get("SDG13_DETECT_CACHE_BYTES", 16 * 1024 * 1024))
+DETECT_CACHE_DIR = os.environ.get("SDG13_DETECT_CACHE_DIR")
+
+# 0 = run detection on the Streamlit script thread
+DETECT_WORKERS = int(os.environ.get("SDG13_DETECT_WORKERS", "0"))
+DETECT_QUEUE_SIZE = 16
+DETECT_TORCH_THREADS = 1
+DETECT_SUBMIT_TIMEOUT = 30
+
+# Uploaded photos in the app (uploads.py): each is decoded once into a
+# small JPEG thumbnail plus its detection result. Budgets are in bytes
+# of thumbnails kept, per browser session and per server process.
+UPLOAD_THUMB_PX = 256
+UPLOAD_SESSION_BYTES = int(os.environ.get("SDG13_UPLOAD_SESSION_BYTES", 4 * 1024 * 1024))
+UPLOAD_PROCESS_BYTES = int(os.environ.get("SDG13_UPLOAD_PROCESS_BYTES", 256 * 1024 * 1024))
+
+# Offline archive audits (batch_audit.py): decode threads, and how many
+# homes may sit decoded between the decode and detect stages.
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+AUDIT_DECODE_THREADS = 4
+AUDIT_QUEUE_HOMES = 8
+
+# Walkthrough videos (video.py). Frames are looked at VIDEO_SAMPLE_FPS
+# times a second; one is kept for detection only if its 64-bit
+# difference hash differs from the last kept frame in at least
+# VIDEO_HASH_DISTANCE bits, and at most VIDEO_MAX_FRAMES are kept.
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm")
+VIDEO_SAMPLE_FPS = 4.0
+VIDEO_HASH_DISTANCE = 10
+VIDEO_MAX_FRAMES = 12
+
+# Monte Carlo uncertainty bands (uncertainty.py). Watts and daily hours
+# are drawn from mean-preserving lognormals with these coefficients of
+# variation; hours are capped at 24.
+UNCERTAINTY_SAMPLES = 10000
+UNCERTAINTY_BUDGET_MS = 50
+UNCERTAINTY_DEFAULT_CV = {"watts": 0.15, "hours": 0.35}
+UNCERTAINTY_CV = {
+    "refrigerator":    {"watts": 0.30, "hours": 0.0},
+    "clock":           {"watts": 0.20, "hours": 0.0},
+    "plug_point":      {"watts": 0.60, "hours": 0.0},
+    "air conditioner": {"watts": 0.20, "hours": 0.45},
+    "water heater":    {"watts": 0.10, "hours": 0.50},
+}
+
+# Upgrade planner (planner.py). Every combination of upgrades is
+# scored while there are at most PLAN_MAX_COMBINATIONS; beyond that a
+# knapsack over costs rounded up to PLAN_COST_STEP ₹ is used.
+# PLAN_BUDGETS are the budgets shown in the app's report.
+PLAN_MAX_COMBINATIONS = 20_000
+PLAN_COST_STEP = 100
+PLAN_BUDGETS = (0, 10_000, 50_000, 150_000)
+
+# Instrumentation (instrument.py); everything is off unless SDG13_METRICS=1.
+METRICS_ENABLED = os.environ.get("SDG13_METRICS", "0") == "1"
+METRICS_JSONL = os.environ.get("SDG13_METRICS_JSONL") or None
+METRICS_PORT = int(os.environ.get("SDG13_METRICS_PORT", "0"))
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_SLOW_MS = float(os.environ.get("SDG13_PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = os.environ.get("SDG13_PROFILE_DIR", "profiles")
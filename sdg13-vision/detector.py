@@ -1,11 +1,173 @@
 # detector.py
 
-from ultralytics import YOLO
+import threading
+
 from PIL import Image
 import numpy as np
-from config import YOLO_TO_APPLIANCE
+import instrument
+from cache import DetectionCache, file_digest
+from preprocess import batch_buffer, letterbox
+from config import (
+    YOLO_TO_APPLIANCE,
+    DETECT_BACKEND,
+    DETECT_BACKEND_WEIGHTS,
+    DETECT_CONFIDENCE,
+    DETECT_IMG_SIZE,
+    DETECT_BATCH_SIZE,
+    DETECT_CACHE_BYTES,
+    DETECT_CACHE_DIR,
+)
+
+# Built on first use so importing this module stays cheap
+# (no torch / ultralytics until something is actually detected).
+_model = None
+_weights_id = None
+_appliance_classes = None
+_model_lock = threading.Lock()
+
+# appliance keys in a fixed order; bincount indexes into this
+APPLIANCE_KEYS = list(dict.fromkeys(YOLO_TO_APPLIANCE.values()))
+_class_lut = None  # YOLO class id -> index in APPLIANCE_KEYS, -1 if unmapped
+
+cache = DetectionCache(DETECT_CACHE_BYTES, DETECT_CACHE_DIR)
+
+
+def get_weights_path(backend: str = DETECT_BACKEND) -> str:
+    if backend not in DETECT_BACKEND_WEIGHTS:
+        raise ValueError(
+            f"unknown detector backend {backend!r}, expected one of {sorted(DETECT_BACKEND_WEIGHTS)}"
+        )
+    return DETECT_BACKEND_WEIGHTS[backend]
+
+
+def get_model():
+    """
+    Returns the YOLO model, loading it once per process. Which
+    weights (PyTorch or an ONNX export) depends on DETECT_BACKEND;
+    ultralytics runs either behind the same call.
+    """
+    global _model, _weights_id, _appliance_classes, _class_lut
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from ultralytics import YOLO
+                weights = get_weights_path()
+                model = YOLO(weights, task="detect")
+                # different backends never share cached detections
+                _weights_id = file_digest(weights)
+                _class_lut = build_class_lut(model.names)
+                _appliance_classes = np.flatnonzero(_class_lut >= 0).tolist()
+                _model = model
+    return _model
+
+
+def build_class_lut(names: dict) -> np.ndarray:
+    """
+    Lookup table from YOLO class id to an index in APPLIANCE_KEYS.
+    Classes we do not map to an appliance get -1.
+    """
+    lut = np.full(max(names) + 1, -1, dtype=np.intp)
+    for class_id, name in names.items():
+        if name in YOLO_TO_APPLIANCE:
+            lut[class_id] = APPLIANCE_KEYS.index(YOLO_TO_APPLIANCE[name])
+    return lut
+
+
+def get_weights_id() -> str:
+    if _weights_id is None:
+        get_model()
+    return _weights_id
 
-model = YOLO("yolov8n.pt")
+
+def warmup():
+    """
+    Loads the model and runs one dummy pass so the first real
+    request does not pay for it. Call at container start:
+        python detector.py
+    """
+    blank = np.full((DETECT_IMG_SIZE, DETECT_IMG_SIZE, 3), 114, dtype=np.uint8)
+    get_model()(blank, verbose=False)
+
+
+def _predict(arrays):
+    """
+    Runs YOLO on letterboxed arrays. Boxes below the confidence
+    threshold or of classes we do not map to an appliance are
+    dropped inside NMS, before any per-box Python work.
+    """
+    model = get_model()
+    with instrument.span("yolo"):
+        results = model(
+            arrays,
+            imgsz=DETECT_IMG_SIZE,
+            conf=DETECT_CONFIDENCE,
+            classes=_appliance_classes,
+            verbose=False,
+        )
+    instrument.incr("images_inferred_total", len(results))
+    return results
+
+
+def _to_numpy(values) -> np.ndarray:
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+def count_boxes(cls, conf, lut: np.ndarray) -> dict:
+    """
+    Counts appliances from whole arrays of box class ids and
+    confidences: threshold, map through the lookup table, bincount.
+    Keys come out in the order they were first seen.
+    """
+    keep = _to_numpy(conf) >= DETECT_CONFIDENCE
+    idx = lut[_to_numpy(cls)[keep].astype(np.intp)]
+    idx = idx[idx >= 0]
+    if idx.size == 0:
+        return {}
+
+    counts = np.bincount(idx)
+    found, first = np.unique(idx, return_index=True)
+    return {
+        APPLIANCE_KEYS[i]: int(counts[i])
+        for i in found[np.argsort(first)]
+    }
+
+
+def box_confidences(cls, conf, lut: np.ndarray) -> dict:
+    """
+    The confidence of every box count_boxes counts, per appliance:
+    {"fan": [0.81, 0.47]}. Same keys, one entry per counted box.
+    """
+    conf = _to_numpy(conf)
+    keep = conf >= DETECT_CONFIDENCE
+    idx = lut[_to_numpy(cls)[keep].astype(np.intp)]
+    conf = conf[keep]
+    confidences = {}
+    for i, c in zip(idx.tolist(), conf.tolist()):
+        if i >= 0:
+            confidences.setdefault(APPLIANCE_KEYS[i], []).append(round(float(c), 4))
+    return confidences
+
+
+def _count_boxes(result) -> dict:
+    get_model()
+    counts = count_boxes(result.boxes.cls, result.boxes.conf, _class_lut)
+    instrument.incr("detect_boxes_total", sum(counts.values()))
+    return counts
+
+
+def _box_confidences(result) -> dict:
+    get_model()
+    return box_confidences(result.boxes.cls, result.boxes.conf, _class_lut)
+
+
+def _merge_max(combined: dict, result: dict) -> dict:
+    for appliance, count in result.items():
+        combined[appliance] = max(
+            combined.get(appliance, 0), count
+        )
+    return combined
 
 
 def detect_appliances(image: Image.Image) -> dict:
@@ -13,39 +175,106 @@ def detect_appliances(image: Image.Image) -> dict:
     Detects appliances from a single PIL image.
     Returns dict: {"tv": 1, "fan": 2}
     """
-    img_array = np.array(image)
-    results = model(img_array, verbose=False)
+    key = cache.make_key(image, get_weights_id(), DETECT_CONFIDENCE)
+    cached = cache.get(key)
+    if cached is not None:
+        instrument.incr("detect_cache_hits_total")
+        return cached
+    instrument.incr("detect_cache_misses_total")
 
-    detected = {}
+    img_array = letterbox(image, out=batch_buffer(1)[0])
+    results = _predict(img_array)
 
+    detected = {}
     for result in results:
-        for box in result.boxes:
-            class_id = int(box.cls[0])
-            class_name = model.names[class_id]
-            confidence = float(box.conf[0])
+        for appliance, count in _count_boxes(result).items():
+            detected[appliance] = detected.get(appliance, 0) + count
+
+    cache.put(key, detected)
+    return detected
 
-            if confidence < 0.35:
-                continue
 
-            if class_name in YOLO_TO_APPLIANCE:
-                key = YOLO_TO_APPLIANCE[class_name]
-                detected[key] = detected.get(key, 0) + 1
+def detect_batch(images: list, batch_size: int = DETECT_BATCH_SIZE,
+                 with_confidences: bool = False):
+    """
+    Detects appliances from many PIL images at once.
+    Images are letterboxed to the same size and sent to
+    YOLO in batches of up to batch_size.
+    Images already in the cache are not sent to the model.
+    Returns one dict per image, in input order. With
+    with_confidences, returns (counts, confidences): the same
+    list plus one box_confidences dict per image.
+    """
+    weights_id = get_weights_id()
+    keys = [cache.make_key(img, weights_id, DETECT_CONFIDENCE) for img in images]
+    detections = [cache.get(key) for key in keys]
+    # confidences are cached next to the counts, under their own key
+    conf_keys = [key + "-conf" for key in keys]
+    confidences = [cache.get(key) if with_confidences else {} for key in conf_keys]
+    pending = [
+        i for i, (found, conf) in enumerate(zip(detections, confidences))
+        if found is None or conf is None
+    ]
+    instrument.incr("detect_cache_hits_total", len(images) - len(pending))
+    instrument.incr("detect_cache_misses_total", len(pending))
 
-    return detected
+    buffer = batch_buffer(batch_size)
 
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        batch = [letterbox(images[i], out=buffer[j]) for j, i in enumerate(chunk)]
+        results = _predict(batch)
+        for i, result in zip(chunk, results):
+            detections[i] = _count_boxes(result)
+            cache.put(keys[i], detections[i])
+            if with_confidences:
+                confidences[i] = _box_confidences(result)
+                cache.put(conf_keys[i], confidences[i])
 
-def detect_from_multiple(images: list) -> dict:
+    if with_confidences:
+        return detections, confidences
+    return detections
+
+
+def detect_from_multiple(images: list, batch_size: int = DETECT_BATCH_SIZE) -> dict:
     """
     Detects from multiple photos of same room.
     Returns MAX count seen across all photos.
     """
     combined = {}
 
-    for image in images:
-        result = detect_appliances(image)
-        for appliance, count in result.items():
-            combined[appliance] = max(
-                combined.get(appliance, 0), count
-            )
+    for result in detect_batch(images, batch_size):
+        _merge_max(combined, result)
 
     return combined
+
+
+def detect_rooms(room_images: dict, batch_size: int = DETECT_BATCH_SIZE) -> dict:
+    """
+    Detects from photos of a whole house in one go.
+    room_images: {"Kitchen": [img, img], "Bedroom": [img]}
+    Batches across rooms, then returns the MAX count per room:
+    {"Kitchen": {"refrigerator": 1}, "Bedroom": {"fan": 1}}
+    """
+    rooms = []
+    images = []
+    for room, room_photos in room_images.items():
+        rooms.extend([room] * len(room_photos))
+        images.extend(room_photos)
+
+    combined = {room: {} for room in room_images}
+    for room, result in zip(rooms, detect_batch(images, batch_size)):
+        _merge_max(combined[room], result)
+
+    return combined
+
+
+def cache_stats() -> dict:
+    """
+    Hit/miss counters of the detection cache.
+    """
+    return cache.stats()
+
+
+if __name__ == "__main__":
+    warmup()
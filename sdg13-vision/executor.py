@@ -0,0 +1,93 @@
+# executor.py
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from config import (
+    DETECT_WORKERS,
+    DETECT_QUEUE_SIZE,
+    DETECT_TORCH_THREADS,
+    DETECT_SUBMIT_TIMEOUT,
+)
+
+
+def _init_worker(torch_threads: int):
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    import detector
+    detector.warmup()
+
+
+def _detect_worker(images: list) -> dict:
+    from detector import detect_from_multiple
+    return detect_from_multiple(images)
+
+
+def _detect_batch_worker(images: list) -> list:
+    from detector import detect_batch
+    return detect_batch(images)
+
+
+def _detect_batch_conf_worker(images: list) -> tuple:
+    from detector import detect_batch
+    return detect_batch(images, with_confidences=True)
+
+
+class DetectionExecutor:
+    """
+    Pool of worker processes, each holding its own YOLO model.
+    At most max_queue requests may be pending at once; submit()
+    waits for a free slot and raises queue.Full after timeout.
+    """
+
+    def __init__(
+        self,
+        workers: int = DETECT_WORKERS,
+        max_queue: int = DETECT_QUEUE_SIZE,
+        torch_threads: int = DETECT_TORCH_THREADS,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(torch_threads,),
+        )
+
+    def submit(self, images: list, timeout: float = DETECT_SUBMIT_TIMEOUT):
+        """
+        Queues detection for the photos of one room.
+        Returns a Future whose result is the same dict as
+        detector.detect_from_multiple(images).
+        """
+        return self._submit(_detect_worker, images, timeout)
+
+    def submit_batch(self, images: list, timeout: float = DETECT_SUBMIT_TIMEOUT,
+                     with_confidences: bool = False):
+        """
+        Like submit(), but the Future's result is one dict per photo,
+        as detector.detect_batch(images, with_confidences=...).
+        """
+        worker = _detect_batch_conf_worker if with_confidences else _detect_batch_worker
+        return self._submit(worker, images, timeout)
+
+    def _submit(self, fn, images: list, timeout: float):
+        if not self._slots.acquire(timeout=timeout):
+            raise queue.Full(
+                f"detection queue is full ({self.max_queue} pending requests)"
+            )
+        try:
+            future = self._pool.submit(fn, images)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,122 @@
+# export_detector.py
+#
+# Builds the ONNX detector backends from DETECT_WEIGHTS:
+#   onnx       fp32 export with a dynamic batch axis, so detect_batch
+#              can still send DETECT_BATCH_SIZE photos per call
+#   onnx-int8  the same graph statically quantised (QDQ, per-channel
+#              int8 weights, uint8 activations) with onnxruntime,
+#              calibrated on real room photos
+#
+#   python export_detector.py --calibration ./survey_photos
+#   SDG13_DETECT_BACKEND=onnx-int8 streamlit run app_vision.py
+#
+# Check the int8 model with bench_backends.py before switching to it.
+
+import argparse
+import glob
+import os
+import shutil
+
+import numpy as np
+
+from config import DETECT_BACKEND_WEIGHTS, DETECT_IMG_SIZE, DETECT_WEIGHTS, PHOTO_EXTENSIONS
+from preprocess import letterbox, load_image
+
+CALIBRATION_IMAGES = 64
+
+
+def export_fp32(weights: str = DETECT_WEIGHTS, output: str = DETECT_BACKEND_WEIGHTS["onnx"]) -> str:
+    from ultralytics import YOLO
+    exported = YOLO(weights).export(
+        format="onnx", imgsz=DETECT_IMG_SIZE, dynamic=True, simplify=True,
+    )
+    if os.path.abspath(exported) != os.path.abspath(output):
+        shutil.move(exported, output)
+    return output
+
+
+def calibration_arrays(folder: str = None, limit: int = CALIBRATION_IMAGES) -> list:
+    """
+    (1, 3, size, size) float32 inputs, preprocessed like ultralytics
+    does at inference: letterbox, RGB -> CHW, scale to 0..1.
+    Without a folder the synthetic fixtures are used, which only
+    roughly match the activation ranges of real photos.
+    """
+    if folder:
+        paths = sorted(
+            path for path in glob.glob(os.path.join(folder, "**", "*"), recursive=True)
+            if path.lower().endswith(PHOTO_EXTENSIONS)
+        )[:limit]
+        images = [load_image(path) for path in paths]
+    else:
+        from fixtures import BOX_DENSITIES, IMAGE_SIZES, synthetic_image
+        images = [
+            synthetic_image(IMAGE_SIZES["medium"], BOX_DENSITIES["dense"], seed=i)
+            for i in range(limit)
+        ]
+    if not images:
+        raise ValueError(f"no calibration photos found in {folder}")
+    return [
+        (letterbox(image).transpose(2, 0, 1)[None].astype(np.float32) / 255.0)
+        for image in images
+    ]
+
+
+def quantize_int8(fp32_path: str, output: str, calibration: list) -> str:
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    class Reader(CalibrationDataReader):
+
+        def __init__(self, input_name: str, arrays: list):
+            self._batches = iter([{input_name: array} for array in arrays])
+
+        def get_next(self):
+            return next(self._batches, None)
+
+    fp32 = onnx.load(fp32_path)
+    quantize_static(
+        fp32_path,
+        output,
+        Reader(fp32.graph.input[0].name, calibration),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+    )
+
+    # ultralytics reads class names / stride / imgsz from the model
+    # metadata, which quantisation does not carry over
+    int8 = onnx.load(output)
+    del int8.metadata_props[:]
+    int8.metadata_props.extend(fp32.metadata_props)
+    onnx.save(int8, output)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the ONNX detector backends")
+    parser.add_argument("--weights", default=DETECT_WEIGHTS)
+    parser.add_argument("--calibration", help="folder of real room photos for int8 calibration")
+    parser.add_argument("--calibration-images", type=int, default=CALIBRATION_IMAGES)
+    parser.add_argument("--skip-int8", action="store_true")
+    args = parser.parse_args()
+
+    fp32_path = export_fp32(args.weights)
+    print(f"onnx       -> {fp32_path}")
+    if args.skip_int8:
+        return
+    if not args.calibration:
+        print("no --calibration folder: calibrating on synthetic fixtures")
+    arrays = calibration_arrays(args.calibration, args.calibration_images)
+    int8_path = quantize_int8(fp32_path, DETECT_BACKEND_WEIGHTS["onnx-int8"], arrays)
+    print(f"onnx-int8  -> {int8_path} ({len(arrays)} calibration images)")
+
+
+if __name__ == "__main__":
+    main()
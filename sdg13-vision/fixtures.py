@@ -0,0 +1,68 @@
+# fixtures.py
+#
+# Reproducible synthetic inputs for benchmarks: room photos of a given
+# size and clutter (number of box-like objects), and room inventories
+# of a given size. Same seed -> same pixels / same counts.
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from config import APPLIANCE_POWER, ROOM_TYPES, WHOLE_HOME_APPLIANCES
+
+IMAGE_SIZES = {"small": (640, 480), "medium": (1920, 1080), "large": (4032, 3024)}
+BOX_DENSITIES = {"sparse": 3, "dense": 40}
+
+
+def synthetic_image(size: tuple, boxes: int, seed: int = 0) -> Image.Image:
+    """
+    Noisy background with `boxes` filled rectangles and outlines,
+    roughly the texture and JPEG entropy of a cluttered room photo.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    base = rng.integers(60, 200, 3)
+    noise = rng.normal(0, 18, (height // 8 + 1, width // 8 + 1, 3))
+    pixels = np.clip(base + np.kron(noise, np.ones((8, 8, 1)))[:height, :width], 0, 255)
+    image = Image.fromarray(pixels.astype(np.uint8))
+
+    draw = ImageDraw.Draw(image)
+    for _ in range(boxes):
+        w = int(rng.uniform(0.05, 0.3) * width)
+        h = int(rng.uniform(0.05, 0.3) * height)
+        x = int(rng.integers(0, width - w))
+        y = int(rng.integers(0, height - h))
+        fill = tuple(int(c) for c in rng.integers(0, 256, 3))
+        draw.rectangle([x, y, x + w, y + h], fill=fill, outline=(20, 20, 20), width=3)
+    return image
+
+
+def synthetic_jpeg(size: tuple, boxes: int, seed: int = 0, quality: int = 90) -> bytes:
+    from io import BytesIO
+    out = BytesIO()
+    synthetic_image(size, boxes, seed).save(out, "JPEG", quality=quality)
+    return out.getvalue()
+
+
+def random_rooms(rooms: int, appliances_per_room: int, max_count: int = 4, seed: int = 0) -> dict:
+    """
+    {room: {appliance: count}} with `rooms` rooms (ROOM_TYPES, numbered
+    once they run out) and up to appliances_per_room appliances each.
+    Whole-home appliances may appear in several rooms, as users enter them.
+    """
+    rng = np.random.default_rng(seed)
+    appliances = list(APPLIANCE_POWER)
+    home = {}
+    for r in range(rooms):
+        name = ROOM_TYPES[r % len(ROOM_TYPES)]
+        if r >= len(ROOM_TYPES):
+            name = f"{name} {r // len(ROOM_TYPES) + 1}"
+        picked = rng.choice(len(appliances), min(appliances_per_room, len(appliances)), replace=False)
+        home[name] = {
+            appliances[i]: 1 if appliances[i] in WHOLE_HOME_APPLIANCES else int(rng.integers(1, max_count + 1))
+            for i in picked
+        }
+    return home
+
+
+def random_homes(n: int, rooms: int = 4, appliances_per_room: int = 4, seed: int = 0) -> list:
+    return [random_rooms(rooms, appliances_per_room, seed=seed * 1_000_003 + i) for i in range(n)]
@@ -0,0 +1,239 @@
+# incremental.py
+#
+# Keeps a home report up to date as single counts change, instead of
+# rerunning assemble_home_inventory -> get_full_report ->
+# generate_suggestions over the whole house. The result always equals
+# a full recompute; every update returns a diff of what changed.
+
+from calculator import calculate_monthly_kwh, calculate_co2, calculate_bill
+from config import DEFAULT_TARIFF, WHOLE_HOME_APPLIANCES
+import instrument
+from suggestions import generate_suggestions
+
+
+class IncrementalReport:
+    """
+    report          same dict as get_full_report(assembled)
+    assembled       same dict as assemble_home_inventory(rooms)
+    total_inventory same dict as get_total_inventory(assembled)
+    suggestions     same list as generate_suggestions(total_inventory, total_kwh)
+    """
+
+    def __init__(self, room_inventories: dict = None, tariff_id: str = DEFAULT_TARIFF):
+        self.tariff_id = tariff_id
+        self.rooms = {}
+        self.assembled = {}
+        self.total_inventory = {}
+        self.report = {}
+        self.suggestions = []
+        self._refresh_totals()
+        self._refresh_suggestions()
+        if room_inventories:
+            self.sync(room_inventories)
+
+    # ── public updates ───────────────────────────────────
+
+    def set_count(self, room: str, appliance: str, count: int) -> dict:
+        """
+        Sets one appliance count in one room (0 removes it).
+        """
+        inventory = dict(self.rooms.get(room, {}))
+        if count > 0:
+            inventory[appliance] = count
+        else:
+            inventory.pop(appliance, None)
+        return self.set_room(room, inventory)
+
+    def set_room(self, room: str, inventory: dict) -> dict:
+        """
+        Replaces the inventory of one room, e.g. after detection.
+        """
+        old = self.rooms.get(room)
+        if old == inventory and room in self.rooms:
+            return self._diff()
+        self.rooms[room] = dict(inventory)
+        changed = set(inventory) | set(old or {})
+        return self._apply({room: changed}, changed)
+
+    def remove_room(self, room: str) -> dict:
+        if room not in self.rooms:
+            return self._diff()
+        old = self.rooms.pop(room)
+        self.assembled.pop(room, None)
+        self.report.pop(room, None)
+        diff = self._apply({}, set(old))
+        diff["removed_rooms"].append(room)
+        return diff
+
+    def sync(self, room_inventories: dict) -> dict:
+        """
+        Brings the report in line with room_inventories (the app's
+        session state), touching only rooms whose inventory differs.
+        """
+        diff = self._diff()
+        for room in [r for r in self.rooms if r not in room_inventories]:
+            self._merge(diff, self.remove_room(room))
+
+        # room order decides who keeps a whole-home appliance; if it
+        # no longer matches, start over rather than patch
+        if [r for r in room_inventories if r in self.rooms] != list(self.rooms):
+            for room in list(self.rooms):
+                self._merge(diff, self.remove_room(room))
+
+        for room, inventory in room_inventories.items():
+            if self.rooms.get(room) != inventory or room not in self.rooms:
+                self._merge(diff, self.set_room(room, inventory))
+        return diff
+
+    # ── internals ────────────────────────────────────────
+
+    @staticmethod
+    def _diff() -> dict:
+        return {"rooms": [], "removed_rooms": [], "totals": False, "suggestions": False}
+
+    @staticmethod
+    def _merge(diff: dict, other: dict):
+        for room in other["rooms"]:
+            if room not in diff["rooms"]:
+                diff["rooms"].append(room)
+        diff["removed_rooms"].extend(other["removed_rooms"])
+        diff["totals"] |= other["totals"]
+        diff["suggestions"] |= other["suggestions"]
+
+    def _owner(self, appliance: str):
+        """
+        The first room that lists a whole-home appliance keeps it,
+        as in assemble_home_inventory.
+        """
+        for room, inventory in self.rooms.items():
+            if appliance in inventory:
+                return room
+        return None
+
+    def _apply(self, touched: dict, appliances: set) -> dict:
+        diff = self._diff()
+
+        with instrument.span("assemble"):
+            # whole-home appliances may move to / from other rooms
+            for appliance in appliances & set(WHOLE_HOME_APPLIANCES):
+                owner = self._owner(appliance)
+                for room in self.rooms:
+                    if room == owner or appliance in self.assembled.get(room, {}):
+                        touched.setdefault(room, set()).add(appliance)
+
+            for room, room_appliances in touched.items():
+                if self._update_room(room, room_appliances):
+                    diff["rooms"].append(room)
+
+            old_totals = {a: self.total_inventory.get(a) for a in appliances}
+            for appliance in appliances:
+                total = sum(
+                    inventory[appliance]
+                    for inventory in self.assembled.values()
+                    if appliance in inventory
+                )
+                if any(appliance in inventory for inventory in self.assembled.values()):
+                    self.total_inventory[appliance] = total
+                else:
+                    self.total_inventory.pop(appliance, None)
+
+        before = self.report.get("__totals__")
+        self._refresh_totals()
+        diff["totals"] = before != self.report["__totals__"]
+
+        inventory_changed = any(
+            old_totals[a] != self.total_inventory.get(a) for a in appliances
+        )
+        if diff["totals"] or inventory_changed:
+            before = self.suggestions
+            self._refresh_suggestions()
+            diff["suggestions"] = before != self.suggestions
+        return diff
+
+    def _assembled_count(self, room: str, appliance: str):
+        inventory = self.rooms.get(room, {})
+        if appliance not in inventory:
+            return None
+        if appliance in WHOLE_HOME_APPLIANCES and self._owner(appliance) != room:
+            return None
+        return inventory[appliance]
+
+    def _update_room(self, room: str, appliances: set) -> bool:
+        """
+        Applies per-appliance changes to one room's breakdown and
+        re-totals that room only. Returns True if anything changed.
+        """
+        if room not in self.rooms:
+            return False
+
+        if room not in self.report:
+            # new room: keep rooms in the same order as self.rooms
+            self.assembled[room] = {}
+            totals = self.report.pop("__totals__", None)
+            self.report[room] = {"inventory": self.assembled[room], "breakdown": {}}
+            if totals is not None:
+                self.report["__totals__"] = totals
+            changed = True
+        else:
+            changed = False
+
+        cleaned = self.assembled[room]
+        breakdown = self.report[room]["breakdown"]
+
+        for appliance in appliances:
+            count = self._assembled_count(room, appliance)
+            if count is None:
+                if appliance in cleaned:
+                    del cleaned[appliance]
+                    del breakdown[appliance]
+                    changed = True
+                continue
+            if cleaned.get(appliance) == count and appliance in breakdown:
+                continue
+            kwh = calculate_monthly_kwh(appliance, count)
+            cleaned[appliance] = count
+            breakdown[appliance] = {"count": count, "kwh": kwh, "co2": calculate_co2(kwh)}
+            changed = True
+
+        # keep dict order identical to the raw inventory, like a full recompute
+        order = [a for a in self.rooms[room] if a in cleaned]
+        if list(cleaned) != order:
+            reordered = {a: cleaned[a] for a in order}
+            cleaned.clear()
+            cleaned.update(reordered)
+            self.report[room]["breakdown"] = {a: breakdown[a] for a in order}
+            breakdown = self.report[room]["breakdown"]
+
+        if changed or "total_kwh" not in self.report[room]:
+            room_total = 0.0
+            for info in breakdown.values():
+                room_total += info["kwh"]
+            room_kwh = round(room_total, 2)
+            self.report[room].update({
+                "total_kwh": room_kwh,
+                "total_co2": calculate_co2(room_kwh),
+                "bill": calculate_bill(room_kwh, self.tariff_id),
+            })
+        return changed
+
+    @instrument.timed("report")
+    def _refresh_totals(self):
+        total_kwh = 0.0
+        for room, section in self.report.items():
+            if room != "__totals__":
+                total_kwh += section["total_kwh"]
+
+        totals = self.report.pop("__totals__", None)
+        new_totals = {
+            "total_kwh": round(total_kwh, 2),
+            "total_co2": round(calculate_co2(total_kwh), 2),
+            "total_bill": round(calculate_bill(total_kwh, self.tariff_id), 2),
+        }
+        self.report["__totals__"] = new_totals if new_totals != totals else totals
+
+    def _refresh_suggestions(self):
+        self.suggestions = generate_suggestions(
+            self.total_inventory,
+            self.report["__totals__"]["total_kwh"],
+            self.tariff_id,
+        )
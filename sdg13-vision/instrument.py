@@ -0,0 +1,308 @@
+# instrument.py
+#
+# Per-stage timings and counters for the hot path:
+#   decode, letterbox, yolo, assemble, report, suggestions
+#
+#   with instrument.span("yolo"):       # histogram stage_seconds{stage="yolo"}
+#       ...
+#   instrument.incr("detect_boxes_total", 3)
+#
+#   @instrument.timed("report")
+#   def get_full_report(...): ...
+#
+# Off unless SDG13_METRICS=1: span() then hands back one shared no-op
+# context and incr() returns at once, so the cost is a flag check.
+# When on, metrics are exported as
+#   Prometheus text   render_prometheus(), or GET /metrics on
+#                     SDG13_METRICS_PORT (started by serve_metrics())
+#   JSONL             one line per span appended to SDG13_METRICS_JSONL
+# Detector worker processes (executor.py) keep their own counters; point
+# them at the same JSONL file to see their spans.
+#
+# request("report") marks one user-facing request. With
+# SDG13_PROFILE_SLOW_MS set, requests run under cProfile and any that
+# take longer than that are dumped to SDG13_PROFILE_DIR as .prof files
+# (pstats / snakeviz / speedscope via pyprof-to-speedscope).
+
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import (
+    METRICS_BUCKETS,
+    METRICS_ENABLED,
+    METRICS_JSONL,
+    METRICS_PORT,
+    PROFILE_DIR,
+    PROFILE_SLOW_MS,
+)
+
+_lock = threading.Lock()
+_request = contextvars.ContextVar("request", default=None)  # per thread and per asyncio task
+
+_enabled = METRICS_ENABLED
+_counters = {}      # (name, labels) -> value
+_histograms = {}    # (name, labels) -> [bucket counts..., +Inf count, sum]
+_jsonl = None
+_server = None
+_profile_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(jsonl_path: str = METRICS_JSONL):
+    global _enabled, _jsonl
+    with _lock:
+        _enabled = True
+        if jsonl_path and _jsonl is None:
+            _jsonl = open(jsonl_path, "a", buffering=1, encoding="utf-8")
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+# ── counters / histograms ────────────────────────────────
+
+def incr(name: str, value: float = 1, **labels):
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(METRICS_BUCKETS) + 1) + [0.0]
+        hist[bisect.bisect_left(METRICS_BUCKETS, seconds)] += 1
+        hist[-1] += seconds
+
+
+class _NoSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        observe("stage_seconds", elapsed, stage=self.stage)
+        if _jsonl is not None:
+            _write({
+                "ts": time.time(),
+                "stage": self.stage,
+                "ms": round(elapsed * 1000, 3),
+                "request": _request.get(),
+                "pid": os.getpid(),
+            })
+        return False
+
+
+def span(stage: str):
+    """
+    Times the with-block into stage_seconds{stage=...}.
+    """
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(stage)
+
+
+def timed(stage: str):
+    """
+    Decorator form of span().
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(stage):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def _write(record: dict):
+    line = json.dumps(record) + "\n"
+    with _lock:
+        if _jsonl is not None:
+            _jsonl.write(line)
+
+
+# ── requests / profiling ─────────────────────────────────
+
+@contextmanager
+def request(name: str):
+    """
+    One user-facing request (a detect click, a report, an HTTP call).
+    Spans inside it are tagged with a request id in the JSONL log, and
+    slow ones are profiled when SDG13_PROFILE_SLOW_MS is set.
+    """
+    if not _enabled and not PROFILE_SLOW_MS:
+        yield
+        return
+
+    request_id = f"{name}-{os.getpid()}-{time.time_ns()}"
+    outer = _request.get()
+    token = _request.set(request_id)
+
+    profiler = None
+    if PROFILE_SLOW_MS and outer is None and _profile_lock.acquire(blocking=False):
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    start = time.perf_counter()
+    try:
+        with span(f"request:{name}"):
+            yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _request.reset(token)
+        incr("requests_total", request=name)
+        if profiler is not None:
+            profiler.disable()
+            try:
+                if elapsed_ms >= PROFILE_SLOW_MS:
+                    os.makedirs(PROFILE_DIR, exist_ok=True)
+                    path = os.path.join(PROFILE_DIR, f"{request_id}-{elapsed_ms:.0f}ms.prof")
+                    profiler.dump_stats(path)
+                    incr("profiles_written_total", request=name)
+            finally:
+                _profile_lock.release()
+
+
+# ── export ───────────────────────────────────────────────
+
+def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def snapshot() -> dict:
+    """
+    Counters and per-stage histogram summaries as plain dicts.
+    """
+    with _lock:
+        counters = {
+            name + _format_labels(labels): value
+            for (name, labels), value in _counters.items()
+        }
+        histograms = {}
+        for (name, labels), hist in _histograms.items():
+            count = sum(hist[:-1])
+            histograms[name + _format_labels(labels)] = {
+                "count": count,
+                "sum_s": hist[-1],
+                "mean_ms": hist[-1] / count * 1000 if count else 0.0,
+            }
+    return {"counters": counters, "histograms": histograms}
+
+
+def render_prometheus() -> str:
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((k, list(v)) for k, v in _histograms.items())
+
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE sdg13_{name} counter")
+            typed.add(name)
+        lines.append(f"sdg13_{name}{_format_labels(labels)} {value}")
+
+    for (name, labels), hist in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE sdg13_{name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip(list(METRICS_BUCKETS) + ["+Inf"], hist[:-1]):
+            cumulative += count
+            lines.append(f"sdg13_{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+        lines.append(f"sdg13_{name}_sum{_format_labels(labels)} {hist[-1]}")
+        lines.append(f"sdg13_{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def serve_metrics(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    """
+    Starts a background GET /metrics endpoint once per process.
+    """
+    global _server
+    if not port or _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), Handler)
+            except OSError:
+                # another process (e.g. a second Streamlit worker) has the port
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+if _enabled:
+    enable()
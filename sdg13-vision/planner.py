@@ -0,0 +1,285 @@
+# planner.py
+#
+# Upgrade plans: which suggestions to act on for a given one-off budget.
+#
+# generate_suggestions lists every action on its own and scales the
+# savings down to 80% of usage. The planner instead treats each active
+# rule in suggestion_rules.json as an option with a cost ("cost",
+# "cost_per") and a kWh effect, and scores whole plans:
+#   - per-appliance upgrades with a per-unit cost can be done for some
+#     of the units (2 of 4 fans); everything else is all or nothing
+#   - fixed kWh savings are taken off first, then "per total_kwh"
+#     options (rooftop solar, power strips) cover their share of what
+#     is left, so solar is not credited for units already saved
+#   - usage never drops below (1 - max_saving_fraction) of today's
+#   - every plan is re-billed through the slab tariff, so a plan that
+#     only moves units inside a free slab saves nothing on the bill
+# The best plan has the lowest bill (or kWh, objective="kwh") within
+# budget, then the lowest cost.
+#
+# Small homes: every combination is scored in one array pass.
+# Above PLAN_MAX_COMBINATIONS: a 0/1 knapsack over costs rounded up to
+# PLAN_COST_STEP gives the most fixed kWh saved for every spend, and
+# only those frontier plans (times each subset of the "per total_kwh"
+# options) are billed. Both are vectorised over plans.
+#   python planner.py          (latency over random homes)
+
+import itertools
+import math
+import time
+
+import numpy as np
+
+import instrument
+from bulk_calculator import inventory_matrix
+from config import (
+    CO2_FACTOR,
+    DEFAULT_TARIFF,
+    PLAN_BUDGETS,
+    PLAN_COST_STEP,
+    PLAN_MAX_COMBINATIONS,
+)
+from rules import get_rules
+from tariffs import get_tariff
+
+
+def upgrade_options(total_inventory: dict, total_kwh: float,
+                    tariff_id: str = DEFAULT_TARIFF) -> list:
+    """
+    The active suggestion rules of one home as plan options:
+      max_units   how many units may be chosen (1 = all or nothing)
+      unit_kwh    kWh/month saved per unit
+      fraction    share of the remaining kWh saved ("per total_kwh" rules)
+      unit_cost   one-off ₹ per unit
+    """
+    rules = get_rules()
+    result = rules.evaluate(inventory_matrix([total_inventory]), [total_kwh], tariff_id)
+
+    options = []
+    for r in np.flatnonzero(result["active"][0]):
+        rule = rules.rules[r]
+        count = int(result["count"][0, r])
+        per_unit = rule["per"] == "appliance" and rule.get("cost_per") == "appliance"
+        if rule["per"] == "total_kwh":
+            unit_kwh, fraction = 0.0, float(rule["kwh"])
+        elif rule["per"] == "appliance":
+            unit_kwh, fraction = float(rule["kwh"]) * (1 if per_unit else count), 0.0
+        else:
+            unit_kwh, fraction = float(rule["kwh"]), 0.0
+        options.append({
+            "rule": rule,
+            "count": count,
+            "per_unit": per_unit,
+            "max_units": count if per_unit else 1,
+            "unit_kwh": unit_kwh,
+            "fraction": fraction,
+            "unit_cost": float(rule.get("cost", 0.0)),
+        })
+    return options
+
+
+class _Plans:
+    """
+    Scores a (plans, options) array of chosen units.
+    """
+
+    def __init__(self, options: list, total_kwh: float, tariff_id: str):
+        self.options = options
+        self.total_kwh = float(total_kwh)
+        self.tariff = get_tariff(tariff_id)
+        self.floor = self.total_kwh * (1 - get_rules().max_saving_fraction)
+        self.bill_before = self.tariff.bill(self.total_kwh)
+
+        self.unit_kwh = np.array([o["unit_kwh"] for o in options], dtype=np.float64)
+        self.unit_cost = np.array([o["unit_cost"] for o in options], dtype=np.float64)
+        self.keep = 1.0 - np.array([o["fraction"] for o in options], dtype=np.float64)
+
+    def kwh_after(self, fixed_kwh, keep):
+        return np.maximum((self.total_kwh - fixed_kwh) * keep, self.floor)
+
+    def score(self, levels: np.ndarray) -> tuple:
+        """
+        levels: (plans, options) units chosen. Returns cost, kWh after, bill after.
+        """
+        fixed_kwh = levels @ self.unit_kwh
+        keep = np.prod(np.where(levels > 0, self.keep, 1.0), axis=1)
+        kwh_after = self.kwh_after(fixed_kwh, keep)
+        return levels @ self.unit_cost, kwh_after, self.tariff.bill(kwh_after)
+
+
+def _pick(cost, kwh_after, bill_after, budget: float, objective: str) -> int:
+    """
+    Index of the best plan within budget: lowest bill (or kWh), then
+    lowest cost, then lowest kWh. The empty plan always fits.
+    """
+    ok = np.flatnonzero(cost <= budget + 1e-9)
+    if objective == "kwh":
+        order = np.lexsort((cost[ok], kwh_after[ok]))
+    else:
+        order = np.lexsort((kwh_after[ok], cost[ok], bill_after[ok]))
+    return int(ok[order[0]])
+
+
+def _exhaustive(plans: _Plans, budgets: list, objective: str) -> tuple:
+    shape = [o["max_units"] + 1 for o in plans.options]
+    levels = np.indices(shape).reshape(len(shape), -1).T if shape else np.zeros((1, 0), dtype=np.intp)
+    cost, kwh_after, bill_after = plans.score(levels)
+    picks = [levels[_pick(cost, kwh_after, bill_after, budget, objective)] for budget in budgets]
+    return picks, len(levels)
+
+
+def _knapsack(plans: _Plans, budgets: list, objective: str) -> tuple:
+    options = plans.options
+    fixed = [i for i, o in enumerate(options) if o["fraction"] == 0]
+    shares = [i for i, o in enumerate(options) if o["fraction"] > 0]
+    steps = int(max(budgets) // PLAN_COST_STEP)
+
+    # most fixed kWh saved with at most b cost steps, one item per unit
+    items = [
+        (i, math.ceil(options[i]["unit_cost"] / PLAN_COST_STEP), options[i]["unit_kwh"])
+        for i in fixed for _ in range(options[i]["max_units"])
+    ]
+    best = np.zeros(steps + 1)
+    taken = []
+    for _, c, kwh in items:
+        new = best.copy()
+        if c == 0:
+            new += kwh
+        elif c <= steps:
+            new[c:] = np.maximum(best[c:], best[:steps + 1 - c] + kwh)
+        taken.append(new > best)
+        best = new
+
+    def units_for(b: int) -> np.ndarray:
+        levels = np.zeros(len(options), dtype=np.intp)
+        for (i, c, _), take in zip(reversed(items), reversed(taken)):
+            if take[b]:
+                levels[i] += 1
+                b -= c
+        return levels
+
+    picks = []
+    evaluated = 0
+    for budget in budgets:
+        candidates = []     # (bill, cost, kWh, b, subset) of the best plan per subset
+        for subset in itertools.product((0, 1), repeat=len(shares)):
+            subset_cost = sum(options[i]["unit_cost"] for i, s in zip(shares, subset) if s)
+            b_max = int((budget - subset_cost) // PLAN_COST_STEP)
+            if b_max < 0:
+                continue
+            b_max = min(b_max, steps)
+            keep = np.prod([plans.keep[i] for i, s in zip(shares, subset) if s])
+            kwh_after = plans.kwh_after(best[:b_max + 1], keep)
+            bill_after = plans.tariff.bill(kwh_after)
+            cost = np.arange(b_max + 1) * PLAN_COST_STEP + subset_cost
+            b = _pick(cost, kwh_after, bill_after, budget, objective)
+            evaluated += b_max + 1
+            candidates.append((bill_after[b], cost[b], kwh_after[b], b, subset))
+
+        if objective == "kwh":
+            _, _, _, b, subset = min(candidates, key=lambda c: (c[2], c[1]))
+        else:
+            _, _, _, b, subset = min(candidates, key=lambda c: (c[0], c[1], c[2]))
+        levels = units_for(b)
+        for i, s in zip(shares, subset):
+            levels[i] = s
+        picks.append(levels)
+    return picks, evaluated
+
+
+def _describe(plans: _Plans, levels: np.ndarray, budget: float) -> dict:
+    cost, kwh_after, bill_after = plans.score(levels[None, :])
+    cost, kwh_after, bill_after = float(cost[0]), float(kwh_after[0]), float(bill_after[0])
+
+    actions = []
+    for option, units in zip(plans.options, levels.tolist()):
+        if not units:
+            continue
+        rule = option["rule"]
+        fields = {
+            "count": units if option["per_unit"] else option["count"],
+            "total_kwh": plans.total_kwh,
+        }
+        actions.append({
+            "priority": rule["priority"],
+            "icon": rule["icon"],
+            "action": rule["action"].format(**fields),
+            "units": units,
+            "cost": round(units * option["unit_cost"], 2),
+            # on its own; in the plan, shares apply to what is left
+            "kwh_saved": round(units * option["unit_kwh"] + option["fraction"] * plans.total_kwh, 1),
+        })
+
+    kwh_saved = plans.total_kwh - kwh_after
+    bill_saved = round(plans.bill_before - bill_after, 2)
+    return {
+        "budget": budget,
+        "actions": actions,
+        "cost": round(cost, 2),
+        "kwh_before": round(plans.total_kwh, 2),
+        "kwh_after": round(kwh_after, 2),
+        "kwh_saved": round(kwh_saved, 1),
+        "co2_saved": round(kwh_saved * CO2_FACTOR, 1),
+        "bill_before": plans.bill_before,
+        "bill_after": round(bill_after, 2),
+        "bill_saved": bill_saved,
+        "payback_months": round(cost / bill_saved, 1) if bill_saved > 0 and cost > 0 else None,
+    }
+
+
+@instrument.timed("plan")
+def best_plans(total_inventory: dict, total_kwh: float, budgets=PLAN_BUDGETS,
+               tariff_id: str = DEFAULT_TARIFF, objective: str = "bill") -> list:
+    """
+    The best upgrade plan for each budget (one-off ₹), sharing one search.
+    objective "bill" minimises the monthly bill, "kwh" the monthly kWh.
+    """
+    start = time.perf_counter()
+    budgets = [float(b) for b in budgets]
+    options = upgrade_options(total_inventory, total_kwh, tariff_id)
+    plans = _Plans(options, total_kwh, tariff_id)
+
+    combinations = math.prod(o["max_units"] + 1 for o in options)
+    if combinations <= PLAN_MAX_COMBINATIONS:
+        picks, evaluated = _exhaustive(plans, budgets, objective)
+        search = "exhaustive"
+    else:
+        picks, evaluated = _knapsack(plans, budgets, objective)
+        search = "knapsack"
+
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+    out = []
+    for budget, levels in zip(budgets, picks):
+        plan = _describe(plans, levels, budget)
+        plan.update({
+            "search": search,
+            "combinations": combinations,
+            "plans_evaluated": evaluated,
+            "elapsed_ms": elapsed_ms,
+        })
+        out.append(plan)
+    return out
+
+
+def best_plan(total_inventory: dict, total_kwh: float, budget: float,
+              tariff_id: str = DEFAULT_TARIFF, objective: str = "bill") -> dict:
+    return best_plans(total_inventory, total_kwh, [budget], tariff_id, objective)[0]
+
+
+if __name__ == "__main__":
+    from assembler import assemble_home_inventory, get_total_inventory
+    from calculator import get_full_report
+    from fixtures import random_homes
+
+    for rooms, per_room in ((4, 4), (8, 8), (16, 12)):
+        elapsed = []
+        searches = set()
+        for home in random_homes(50, rooms, per_room, seed=rooms):
+            assembled = assemble_home_inventory(home)
+            total_kwh = get_full_report(assembled)["__totals__"]["total_kwh"]
+            plans = best_plans(get_total_inventory(assembled), total_kwh)
+            elapsed.append(plans[0]["elapsed_ms"])
+            searches.add(plans[0]["search"])
+        p50, p99 = np.percentile(elapsed, [50, 99])
+        print(f"{rooms:>2} rooms x {per_room:>2} appliances: p50 {p50:.1f} ms  p99 {p99:.1f} ms  "
+              f"({', '.join(sorted(searches))}, {len(PLAN_BUDGETS)} budgets)")
@@ -0,0 +1,63 @@
+# preprocess.py
+
+import threading
+
+import numpy as np
+from PIL import Image
+
+import instrument
+from config import DETECT_IMG_SIZE
+
+_buffers = threading.local()
+
+
+def load_image(source, size: int = DETECT_IMG_SIZE) -> Image.Image:
+    """
+    Opens an uploaded file / path as RGB, decoding JPEGs at a
+    reduced scale (1/2, 1/4, 1/8) that is still at least size
+    pixels on each side. A 12 MP phone photo decodes to about
+    1000 x 750 instead of 4000 x 3000.
+    """
+    with instrument.span("decode"):
+        image = Image.open(source)
+        image.draft("RGB", (size, size))
+        image = image.convert("RGB")
+    instrument.incr("images_decoded_total")
+    return image
+
+
+def batch_buffer(batch_size: int, size: int = DETECT_IMG_SIZE) -> np.ndarray:
+    """
+    Per-thread (batch_size, size, size, 3) uint8 buffer that is
+    reused between calls instead of allocating a new one per photo.
+    """
+    buf = getattr(_buffers, "array", None)
+    if buf is None or buf.shape[0] < batch_size or buf.shape[1] != size:
+        buf = np.empty((batch_size, size, size, 3), dtype=np.uint8)
+        _buffers.array = buf
+    return buf[:batch_size]
+
+
+@instrument.timed("letterbox")
+def letterbox(image: Image.Image, size: int = DETECT_IMG_SIZE, out: np.ndarray = None) -> np.ndarray:
+    """
+    Resizes a PIL image to fit a size x size square, keeping
+    aspect ratio and padding with grey (114) like YOLO does.
+    Writes into out if given, else a new array.
+    Returns uint8 array of shape (size, size, 3).
+    """
+    width, height = image.size
+    scale = min(size / width, size / height)
+    new_w = max(1, round(width * scale))
+    new_h = max(1, round(height * scale))
+
+    # reducing_gap does a cheap integer box-reduce first on big images
+    resized = image.resize((new_w, new_h), Image.BILINEAR, reducing_gap=2.0)
+
+    if out is None:
+        out = np.empty((size, size, 3), dtype=np.uint8)
+    out.fill(114)
+    top = (size - new_h) // 2
+    left = (size - new_w) // 2
+    out[top:top + new_h, left:left + new_w] = np.asarray(resized)
+    return out
@@ -0,0 +1,163 @@
+# rules.py
+#
+# Suggestion rules read from suggestion_rules.json and compiled into
+# arrays, so a whole batch of homes is evaluated with numpy instead of
+# one if-block per rule per home. Analysts add rules by editing the
+# JSON; each rule is:
+#
+#   "priority", "icon", "action", "reason"   text; action/reason may use
+#                                            {count} and {total_kwh}
+#   "appliance": "fan"          only when the home has at least one
+#   "total_kwh_above": 300      only when monthly kWh is above this
+#   "per": "appliance"          kWh saved = kwh x appliance count
+#          "total_kwh"          kWh saved = kwh x monthly kWh
+#          "home"               kWh saved = kwh
+#   "kwh": 13.5
+#   "co2": 11.1                 CO2 saved per unit, like kwh
+#   "co2_per_kwh": 0.82         ... or CO2 saved = kWh saved x this
+#   "cost": 3500                one-off ₹ for the upgrade planner
+#   "cost_per": "appliance"     cost per unit (default: once per home)
+
+import json
+import os
+
+import numpy as np
+
+from bulk_calculator import APPLIANCE_INDEX, inventory_matrix
+from config import DEFAULT_TARIFF, SUGGESTION_RULES_FILE
+from tariffs import get_tariff, round_to
+
+_PER = {"appliance": 0, "total_kwh": 1, "home": 2}
+
+
+class RuleSet:
+
+    def __init__(self, rules: list, priority_order: list, max_saving_fraction: float):
+        rank = {priority: i for i, priority in enumerate(priority_order)}
+        # suggestions are shown by priority; a stable sort of the
+        # rules once here is the same as sorting every result list
+        self.rules = sorted(rules, key=lambda r: rank.get(r["priority"], len(rank)))
+        self.max_saving_fraction = max_saving_fraction
+
+        self.appliance = np.array([
+            APPLIANCE_INDEX[r["appliance"]] if "appliance" in r else -1
+            for r in self.rules
+        ], dtype=np.intp)
+        self.kwh_above = np.array([
+            r.get("total_kwh_above", -np.inf) for r in self.rules
+        ], dtype=np.float64)
+        self.per = np.array([_PER[r["per"]] for r in self.rules], dtype=np.intp)
+        self.kwh = np.array([r["kwh"] for r in self.rules], dtype=np.float64)
+        self.co2_from_kwh = np.array(["co2_per_kwh" in r for r in self.rules])
+        self.co2 = np.array([
+            r.get("co2_per_kwh", r.get("co2", 0.0)) for r in self.rules
+        ], dtype=np.float64)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["rules"], data["priority_order"], data["max_saving_fraction"])
+
+    def evaluate(self, counts: np.ndarray, total_kwh, tariff_id: str = DEFAULT_TARIFF) -> dict:
+        """
+        counts: (homes, appliances) int array (bulk_calculator order).
+        total_kwh: (homes,) monthly kWh.
+        Returns (homes, rules) arrays in display order:
+          active, kwh_saved, co2_saved, bill_saved, count
+        """
+        total_kwh = np.asarray(total_kwh, dtype=np.float64)
+        n = len(total_kwh)
+
+        count = np.where(
+            self.appliance >= 0,
+            counts[:, np.maximum(self.appliance, 0)],
+            0,
+        )
+        active = (
+            ((self.appliance < 0) | (count > 0))
+            & (total_kwh[:, None] > self.kwh_above)
+        )
+
+        basis = np.select(
+            [self.per == 0, self.per == 1],
+            [count, np.broadcast_to(total_kwh[:, None], (n, len(self.rules)))],
+            default=1,
+        )
+        kwh_raw = basis * self.kwh
+        co2_raw = np.where(self.co2_from_kwh, kwh_raw * self.co2, basis * self.co2)
+        kwh_saved = round_to(kwh_raw, 1)
+        co2_saved = round_to(co2_raw, 1)
+
+        # cap the combined saving at max_saving_fraction of usage, adding
+        # the rules up in display order like the original per-home loop
+        total_suggested = np.zeros(n)
+        for r in range(len(self.rules)):
+            total_suggested = total_suggested + np.where(active[:, r], kwh_saved[:, r], 0.0)
+
+        cap = total_kwh * self.max_saving_fraction
+        over = total_suggested > cap
+        if over.any():
+            scale = np.ones(n)
+            scale[over] = cap[over] / total_suggested[over]
+            kwh_saved = np.where(over[:, None], round_to(kwh_saved * scale[:, None], 1), kwh_saved)
+            co2_saved = np.where(over[:, None], round_to(co2_saved * scale[:, None], 1), co2_saved)
+
+        tariff = get_tariff(tariff_id)
+        bill_saved = round_to(tariff.savings(total_kwh[:, None], kwh_saved), 1)
+
+        return {
+            "active": active,
+            "kwh_saved": kwh_saved,
+            "co2_saved": co2_saved,
+            "bill_saved": bill_saved,
+            "count": count,
+        }
+
+    def suggestions(self, result: dict, row: int, total_kwh: float) -> list:
+        """
+        Turns one home's row of evaluate() into the list of
+        suggestion dicts the app renders.
+        """
+        out = []
+        for r in np.flatnonzero(result["active"][row]):
+            rule = self.rules[r]
+            fields = {"count": int(result["count"][row, r]), "total_kwh": total_kwh}
+            out.append({
+                "priority": rule["priority"],
+                "icon": rule["icon"],
+                "action": rule["action"].format(**fields),
+                "reason": rule["reason"].format(**fields),
+                "kwh_saved": float(result["kwh_saved"][row, r]),
+                "co2_saved": float(result["co2_saved"][row, r]),
+                "bill_saved": float(result["bill_saved"][row, r]),
+            })
+        return out
+
+
+_rules = None
+
+
+def get_rules() -> RuleSet:
+    """
+    The rule table, compiled once per process.
+    """
+    global _rules
+    if _rules is None:
+        path = SUGGESTION_RULES_FILE
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        _rules = RuleSet.load(path)
+    return _rules
+
+
+def evaluate_batch(inventories: list, total_kwh, tariff_id: str = DEFAULT_TARIFF) -> list:
+    """
+    Suggestions for many homes at once.
+    inventories: list of total inventories, total_kwh: matching kWh.
+    Returns one suggestion list per home.
+    """
+    rules = get_rules()
+    total_kwh = list(total_kwh)
+    result = rules.evaluate(inventory_matrix(inventories), total_kwh, tariff_id)
+    return [rules.suggestions(result, row, kwh) for row, kwh in enumerate(total_kwh)]
@@ -0,0 +1,180 @@
+# tariffs.py
+#
+# Electricity tariffs loaded once from tariffs.json.
+# Each tariff is compiled into slab breakpoints with the cost of all
+# full slabs below them, so a bill is one binary search, for a single
+# number or a whole array of households.
+#
+# tariffs.json format:
+#   "id": {
+#     "name": "...",
+#     "telescopic": true,            # false = all units at the final slab's rate
+#     "slabs": [[limit, rate], ..., [null, rate]],
+#     "fixed_charge": 30             # or [[max_load_kw, charge], ..., [null, charge]]
+#   }
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from config import TARIFF_FILE, DEFAULT_TARIFF
+
+
+def _limit(value) -> float:
+    return float("inf") if value is None else float(value)
+
+
+def round_to(values, ndigits: int) -> np.ndarray:
+    """
+    Same result as Python's round(x, ndigits) for every element.
+    np.round can differ from round() when the scaled value lands on
+    .5 after float error, so those few elements are re-rounded in Python.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 10 ** ndigits
+    out = np.rint(scaled) / 10 ** ndigits
+
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        out[near_half] = [round(v, ndigits) for v in values[near_half].tolist()]
+    return out
+
+
+def round2(values) -> np.ndarray:
+    return round_to(values, 2)
+
+
+class Tariff:
+    """
+    A compiled slab tariff. bill(), marginal_rate() and savings()
+    take a number or a numpy array.
+    """
+
+    def __init__(self, tariff_id: str, name: str, slabs: list,
+                 fixed_charge, telescopic: bool = True):
+        self.id = tariff_id
+        self.name = name
+        self.telescopic = telescopic
+
+        self.limits = [_limit(limit) for limit, _ in slabs]
+        self.rates = [float(rate) for _, rate in slabs]
+        self.lowers = [0.0] + self.limits[:-1]
+
+        # cost of all full slabs below slab i, summed in slab order
+        # like calculator.calculate_tangedco_bill always did
+        self.cumulative = [0.0]
+        for lower, upper, rate in zip(self.lowers[:-1], self.limits[:-1], self.rates[:-1]):
+            self.cumulative.append(self.cumulative[-1] + (upper - lower) * rate)
+
+        if isinstance(fixed_charge, (int, float)):
+            fixed_charge = [[None, fixed_charge]]
+        self.load_limits = [_limit(load) for load, _ in fixed_charge]
+        self.fixed_charges = [float(charge) for _, charge in fixed_charge]
+
+        self._np = {
+            name: np.array(getattr(self, name))
+            for name in ("limits", "rates", "lowers", "cumulative", "load_limits", "fixed_charges")
+        }
+
+    @classmethod
+    def from_dict(cls, tariff_id: str, data: dict):
+        return cls(
+            tariff_id,
+            data.get("name", tariff_id),
+            data["slabs"],
+            data.get("fixed_charge", 0),
+            data.get("telescopic", True),
+        )
+
+    def fixed_charge(self, connected_load_kw=None):
+        if connected_load_kw is None:
+            return self.fixed_charges[0]
+        if np.ndim(connected_load_kw) == 0:
+            return self.fixed_charges[bisect_left(self.load_limits, connected_load_kw)]
+        band = np.searchsorted(self._np["load_limits"], connected_load_kw, side="left")
+        return self._np["fixed_charges"][band]
+
+    def energy_charge(self, units):
+        """
+        Bill without the fixed charge, unrounded.
+        """
+        if np.ndim(units) == 0:
+            if units <= 0:
+                return 0.0
+            slab = bisect_left(self.limits, units)
+            if self.telescopic:
+                return self.cumulative[slab] + (units - self.lowers[slab]) * self.rates[slab]
+            return units * self.rates[slab]
+
+        t = self._np
+        units = np.asarray(units, dtype=np.float64)
+        slab = np.searchsorted(t["limits"], units, side="left")
+        if self.telescopic:
+            charge = t["cumulative"][slab] + (units - t["lowers"][slab]) * t["rates"][slab]
+        else:
+            charge = units * t["rates"][slab]
+        return np.where(units > 0, charge, 0.0)
+
+    def bill(self, units, connected_load_kw=None):
+        """
+        Monthly bill in ₹, rounded to paise.
+        """
+        total = self.energy_charge(units) + self.fixed_charge(connected_load_kw)
+        if np.ndim(total) == 0:
+            return round(float(total), 2)
+        return round2(total)
+
+    def marginal_rate(self, units):
+        """
+        ₹ per kWh charged for the next unit above `units`.
+        """
+        if np.ndim(units) == 0:
+            return self.rates[min(bisect_right(self.limits, units), len(self.rates) - 1)]
+        slab = np.searchsorted(self._np["limits"], units, side="right")
+        return self._np["rates"][np.minimum(slab, len(self.rates) - 1)]
+
+    def savings(self, units, kwh_saved):
+        """
+        ₹ saved on the bill when usage drops from units by kwh_saved,
+        priced against the slabs it actually comes off.
+        """
+        if np.ndim(units) == 0 and np.ndim(kwh_saved) == 0:
+            after = max(units - kwh_saved, 0.0)
+            return round(self.energy_charge(units) - self.energy_charge(after), 2)
+
+        units, kwh_saved = np.broadcast_arrays(
+            np.asarray(units, dtype=np.float64), np.asarray(kwh_saved, dtype=np.float64)
+        )
+        after = np.maximum(units - kwh_saved, 0.0)
+        return round2(self.energy_charge(units) - self.energy_charge(after))
+
+
+def load_tariffs(path: str = TARIFF_FILE) -> dict:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {tariff_id: Tariff.from_dict(tariff_id, entry) for tariff_id, entry in data.items()}
+
+
+_registry = None
+
+
+def get_tariff(tariff_id: str = DEFAULT_TARIFF) -> Tariff:
+    """
+    Looks up a tariff, loading tariffs.json on first use.
+    """
+    global _registry
+    if _registry is None:
+        path = TARIFF_FILE
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+        _registry = load_tariffs(path)
+    if tariff_id not in _registry:
+        raise KeyError(f"unknown tariff {tariff_id!r}, known: {sorted(_registry)}")
+    return _registry[tariff_id]
+
+
+def list_tariffs() -> dict:
+    get_tariff()
+    return {tariff_id: tariff.name for tariff_id, tariff in _registry.items()}
@@ -0,0 +1,119 @@
+# uncertainty.py
+#
+# p10 / p50 / p90 bands for a home's monthly kWh, bill and CO2.
+# All samples are drawn and priced in one numpy pass per home:
+#   watts, hours  mean-preserving lognormals around APPLIANCE_POWER
+#   counts        fixed, or for detected appliances one Bernoulli draw
+#                 per YOLO box with p = its confidence
+
+import time
+
+import numpy as np
+
+from config import (
+    APPLIANCE_POWER,
+    CO2_FACTOR,
+    DEFAULT_TARIFF,
+    UNCERTAINTY_BUDGET_MS,
+    UNCERTAINTY_CV,
+    UNCERTAINTY_DEFAULT_CV,
+    UNCERTAINTY_SAMPLES,
+)
+from tariffs import get_tariff
+
+PERCENTILES = (10, 50, 90)
+
+
+def _lognormal(rng, nominal: np.ndarray, cv: np.ndarray, samples: int) -> np.ndarray:
+    """
+    (samples, len(nominal)) draws with mean = nominal and the given
+    coefficient of variation. cv = 0 gives the nominal value.
+    """
+    sigma = np.sqrt(np.log1p(cv ** 2))
+    mu = np.log(nominal) - sigma ** 2 / 2
+    return np.exp(mu + sigma * rng.standard_normal((samples, len(nominal))))
+
+
+def _sample_counts(rng, counts: np.ndarray, confidences: list, samples: int) -> np.ndarray:
+    """
+    Counts with no confidences are fixed. For detected appliances each
+    box is kept with probability = its confidence; counts above the
+    number of boxes (manual additions) are always kept.
+    """
+    drawn = np.broadcast_to(counts.astype(np.float64), (samples, len(counts))).copy()
+
+    boxed = [i for i, conf in enumerate(confidences) if conf]
+    if boxed:
+        conf = np.concatenate([np.asarray(confidences[i], dtype=np.float64) for i in boxed])
+        owner = np.repeat(np.arange(len(boxed)), [len(confidences[i]) for i in boxed])
+        kept = (rng.random((samples, len(conf))) < conf).astype(np.float64)
+
+        onehot = np.zeros((len(conf), len(boxed)))
+        onehot[np.arange(len(conf)), owner] = 1.0
+        per_appliance = kept @ onehot
+        sure = np.array([max(counts[i] - len(confidences[i]), 0) for i in boxed])
+        drawn[:, boxed] = per_appliance + sure
+    return drawn
+
+
+def inventory_confidences(assembled_rooms: dict, room_confidences: dict) -> dict:
+    """
+    Box confidences for the total inventory of assembled rooms
+    ({room: {appliance: count}}, after deduplication). Each room keeps
+    at most as many boxes as its count, most confident first, so an
+    appliance removed or lowered by hand is not sampled back in.
+    """
+    total = {}
+    for room, inventory in assembled_rooms.items():
+        confs = room_confidences.get(room, {})
+        for appliance, count in inventory.items():
+            boxes = sorted(confs.get(appliance, []), reverse=True)[:max(int(count), 0)]
+            if boxes:
+                total.setdefault(appliance, []).extend(boxes)
+    return total
+
+
+def estimate_uncertainty(total_inventory: dict, confidences: dict = None,
+                         samples: int = UNCERTAINTY_SAMPLES, tariff_id: str = DEFAULT_TARIFF,
+                         seed: int = None) -> dict:
+    """
+    total_inventory: {"fan": 3, "tv": 1}
+    confidences: optional {"tv": [0.91], "fan": [0.8, 0.55, 0.4]} from YOLO.
+    Returns {"kwh": {"p10": .., "p50": .., "p90": ..}, "bill": {...},
+             "co2": {...}, "samples": n, "elapsed_ms": t}
+    """
+    start = time.perf_counter()
+    confidences = confidences or {}
+    rng = np.random.default_rng(seed)
+
+    appliances = [
+        a for a, count in total_inventory.items()
+        if a in APPLIANCE_POWER and (count > 0 or confidences.get(a))
+    ]
+    if appliances:
+        watts = np.array([APPLIANCE_POWER[a]["watts"] for a in appliances], dtype=np.float64)
+        hours = np.array([APPLIANCE_POWER[a]["hours"] for a in appliances], dtype=np.float64)
+        watts_cv = np.array([UNCERTAINTY_CV.get(a, UNCERTAINTY_DEFAULT_CV)["watts"] for a in appliances])
+        hours_cv = np.array([UNCERTAINTY_CV.get(a, UNCERTAINTY_DEFAULT_CV)["hours"] for a in appliances])
+        counts = np.array([total_inventory[a] for a in appliances])
+
+        watt_draws = _lognormal(rng, watts, watts_cv, samples)
+        hour_draws = np.minimum(_lognormal(rng, hours, hours_cv, samples), 24.0)
+        count_draws = _sample_counts(rng, counts, [confidences.get(a) for a in appliances], samples)
+
+        kwh = (watt_draws * hour_draws * count_draws).sum(axis=1) * 30 / 1000
+    else:
+        kwh = np.zeros(samples)
+
+    bill = get_tariff(tariff_id).bill(kwh)
+    co2 = kwh * CO2_FACTOR
+
+    bands = {}
+    for name, values in (("kwh", kwh), ("bill", bill), ("co2", co2)):
+        p = np.percentile(values, PERCENTILES)
+        bands[name] = {f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, p)}
+
+    bands["samples"] = samples
+    bands["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    bands["within_budget"] = bands["elapsed_ms"] <= UNCERTAINTY_BUDGET_MS
+    return bands
@@ -0,0 +1,257 @@
+# uploads.py
+#
+# What the app keeps of each uploaded photo: a small JPEG thumbnail and,
+# once detected, its appliance counts and box confidences. Not the
+# decoded image.
+#
+# Streamlit reruns the whole script on every widget change. Before, each
+# rerun decoded every uploaded photo at full size just to show it at
+# 200 px. Now a photo is decoded once for its thumbnail (a JPEG draft
+# decode at 1/8 scale) and again only when it is sent to the detector
+# for the first time. Both results are looked up by file id on later
+# reruns.
+#
+# Memory is bounded twice:
+#   per session   UPLOAD_SESSION_BYTES, least recently used photos go first
+#   per process   UPLOAD_PROCESS_BYTES over all live sessions, evicting
+#                 the least recently used photo of any session
+# An evicted photo is simply decoded again if it is still on screen.
+# bench_uploads.py measures rerun latency and per-session RSS.
+
+import hashlib
+import io
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from PIL import Image
+
+import instrument
+from preprocess import load_image
+from config import UPLOAD_PROCESS_BYTES, UPLOAD_SESSION_BYTES, UPLOAD_THUMB_PX
+
+# bookkeeping per entry on top of the thumbnail bytes
+ENTRY_OVERHEAD = 512
+
+
+def upload_key(file) -> str:
+    """
+    Streamlit's file_id for an UploadedFile (new per upload, free to
+    read); a hash of the bytes for anything else.
+    """
+    file_id = getattr(file, "file_id", None)
+    if file_id:
+        return file_id
+    data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def make_thumbnail(file, size: int = UPLOAD_THUMB_PX) -> bytes:
+    """
+    JPEG bytes of the photo shrunk to fit size x size.
+    """
+    file.seek(0)
+    image = load_image(file, size)
+    image.thumbnail((size, size), Image.BILINEAR)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+def merge_max(results) -> dict:
+    """
+    Per-photo counts -> MAX count per appliance, as detect_from_multiple.
+    """
+    combined = {}
+    for result in results:
+        for appliance, count in result.items():
+            combined[appliance] = max(combined.get(appliance, 0), count)
+    return combined
+
+
+def merge_confidences(results, confidences) -> dict:
+    """
+    Per-photo box confidences -> for each appliance, those of the photo
+    merge_max took its count from (the first with the highest count).
+    """
+    best = {}
+    combined = {}
+    for result, confs in zip(results, confidences):
+        for appliance, count in result.items():
+            if count > best.get(appliance, 0):
+                best[appliance] = count
+                combined[appliance] = list(confs.get(appliance, []))
+    return combined
+
+
+class UploadEntry:
+
+    __slots__ = ("key", "thumbnail", "detections", "confidences", "nbytes", "last_used")
+
+    def __init__(self, key: str, thumbnail: bytes):
+        self.key = key
+        self.thumbnail = thumbnail
+        self.detections = None
+        self.confidences = None
+        self.nbytes = len(thumbnail) + ENTRY_OVERHEAD
+        self.last_used = time.monotonic()
+
+
+class ProcessBudget:
+    """
+    Byte budget shared by every SessionUploads of this process.
+    Sessions are held weakly, so a closed browser tab frees its
+    share as soon as Streamlit drops its session state.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._sessions = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def register(self, session: "SessionUploads"):
+        with self._lock:
+            self._sessions.add(session)
+
+    def bytes(self) -> int:
+        with self._lock:
+            return sum(session.bytes for session in list(self._sessions))
+
+    def enforce(self):
+        with self._lock:
+            sessions = list(self._sessions)
+            total = sum(session.bytes for session in sessions)
+            while total > self.max_bytes:
+                oldest = min(
+                    (s for s in sessions if s.bytes),
+                    key=lambda s: s.oldest_use(),
+                    default=None,
+                )
+                if oldest is None:
+                    break
+                total -= oldest.evict_oldest()
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions = list(self._sessions)
+        return {
+            "sessions": len(sessions),
+            "bytes": sum(session.bytes for session in sessions),
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+process_budget = ProcessBudget(UPLOAD_PROCESS_BYTES)
+
+
+class SessionUploads:
+    """
+    One browser session's uploaded photos, kept in st.session_state.
+    """
+
+    def __init__(self, max_bytes: int = UPLOAD_SESSION_BYTES, budget: ProcessBudget = process_budget):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()   # key -> UploadEntry, least recently used first
+        self._lock = threading.RLock()
+        self._budget = budget
+
+        self.hits = 0
+        self.decodes = 0
+        self.evictions = 0
+
+        budget.register(self)
+
+    def entry(self, file) -> UploadEntry:
+        """
+        The thumbnail entry for an uploaded file, decoding it only
+        the first time it is seen (or after it was evicted).
+        """
+        key = upload_key(file)
+        with self._lock:
+            found = self._entries.get(key)
+            if found is not None:
+                self._entries.move_to_end(key)
+                found.last_used = time.monotonic()
+                self.hits += 1
+                return found
+
+        found = UploadEntry(key, make_thumbnail(file))
+        with self._lock:
+            self.decodes += 1
+            self._add(found)
+            self._evict(self.max_bytes)
+        self._budget.enforce()
+        return found
+
+    def detect(self, files: list, detect_batch) -> tuple:
+        """
+        Room counts for files (MAX over photos) and the box confidences
+        behind them. Only photos without a stored result are decoded and
+        passed to detect_batch, which takes a list of PIL images and
+        returns (counts, confidences), one dict per image in each, as
+        detector.detect_batch(images, with_confidences=True).
+        """
+        entries = [self.entry(file) for file in files]
+        pending = [(entry, file) for entry, file in zip(entries, files) if entry.detections is None]
+        if pending:
+            images = []
+            for _, file in pending:
+                file.seek(0)
+                images.append(load_image(file))
+            results, confidences = detect_batch(images)
+            del images
+            with self._lock:
+                for (entry, _), result, confs in zip(pending, results, confidences):
+                    entry.detections = result
+                    entry.confidences = confs
+        detections = [entry.detections for entry in entries]
+        return merge_max(detections), merge_confidences(detections, [entry.confidences for entry in entries])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "photos": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "decodes": self.decodes,
+                "evictions": self.evictions,
+            }
+
+    # ── eviction ─────────────────────────────────────────
+
+    def _add(self, entry: UploadEntry):
+        old = self._entries.pop(entry.key, None)
+        if old is not None:
+            self.bytes -= old.nbytes
+        self._entries[entry.key] = entry
+        self.bytes += entry.nbytes
+
+    def _evict(self, max_bytes: int):
+        # never evict the entry just added, even if it alone is over budget
+        while self.bytes > max_bytes and len(self._entries) > 1:
+            self.evict_oldest()
+
+    def oldest_use(self) -> float:
+        with self._lock:
+            for entry in self._entries.values():
+                return entry.last_used
+            return float("inf")
+
+    def evict_oldest(self) -> int:
+        """
+        Drops the least recently used photo. Returns bytes freed.
+        """
+        with self._lock:
+            if not self._entries:
+                return 0
+            _, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.nbytes
+            self.evictions += 1
+        instrument.incr("upload_evictions_total")
+        return entry.nbytes
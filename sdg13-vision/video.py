@@ -0,0 +1,191 @@
+# video.py
+#
+# Walkthrough video of a room -> a handful of distinct frames for the
+# detector. Running YOLO on every frame of a 30 s clip (900 frames)
+# would take minutes; consecutive frames are nearly identical anyway.
+#
+#   decode    frames are read as a stream; only VIDEO_SAMPLE_FPS of
+#             them per second are converted and looked at
+#   dedupe    each sampled frame gets a 64-bit difference hash (dHash
+#             of a 9 x 8 grey thumbnail); it is kept only if it differs
+#             from the last kept frame in >= VIDEO_HASH_DISTANCE bits
+#   cap       at most VIDEO_MAX_FRAMES kept frames, spread evenly over
+#             the clip
+#
+# The kept frames go through detector.detect_from_multiple, so counts
+# are the MAX seen in any frame, exactly as for several photos.
+#   python video.py kitchen.mp4
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+from PIL import Image
+
+import instrument
+from config import (
+    DETECT_BATCH_SIZE,
+    DETECT_IMG_SIZE,
+    VIDEO_HASH_DISTANCE,
+    VIDEO_MAX_FRAMES,
+    VIDEO_SAMPLE_FPS,
+)
+
+
+def frame_hash(frame: np.ndarray) -> int:
+    """
+    64-bit difference hash of a BGR frame: shrink to 9 x 8 grey,
+    one bit per horizontally adjacent pair (left brighter than right).
+    Robust to exposure changes and JPEG noise, not to a camera pan.
+    """
+    small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+    grey = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    bits = np.packbits(grey[:, :-1] > grey[:, 1:])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hash_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _to_image(frame: np.ndarray, size: int = DETECT_IMG_SIZE) -> Image.Image:
+    """
+    BGR frame -> RGB PIL image no larger than size on its long side,
+    which is all letterbox() would keep of it anyway.
+    """
+    height, width = frame.shape[:2]
+    scale = size / max(width, height)
+    if scale < 1:
+        frame = cv2.resize(frame, (round(width * scale), round(height * scale)),
+                           interpolation=cv2.INTER_AREA)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def _spread(kept: list, count: int) -> list:
+    """
+    At most count of the (frame_index, image) pairs, those nearest to
+    count evenly spaced times between the first and the last.
+    """
+    if len(kept) <= count:
+        return kept
+    times = np.array([index for index, _ in kept])
+    targets = np.linspace(times[0], times[-1], count)
+    right = np.clip(np.searchsorted(times, targets), 1, len(times) - 1)
+    nearest = np.where(targets - times[right - 1] <= times[right] - targets, right - 1, right)
+    return [kept[i] for i in np.unique(nearest)]
+
+
+@contextmanager
+def _as_path(source):
+    """
+    OpenCV only reads from files; uploads (file-like objects) are
+    spooled to a temporary file first.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+    suffix = os.path.splitext(getattr(source, "name", ""))[1] or ".mp4"
+    # closed before OpenCV opens it by name: Windows cannot open a
+    # NamedTemporaryFile a second time while it is still open
+    f = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        with f:
+            if hasattr(source, "seek"):
+                source.seek(0)
+            shutil.copyfileobj(source, f)
+        yield f.name
+    finally:
+        os.unlink(f.name)
+
+
+def sample_frames(source, max_frames: int = VIDEO_MAX_FRAMES,
+                  sample_fps: float = VIDEO_SAMPLE_FPS,
+                  distance: int = VIDEO_HASH_DISTANCE) -> tuple:
+    """
+    Returns (frames, stats): up to max_frames distinct PIL frames of
+    a video (a path or an uploaded file), in playback order, and
+    {"frames_decoded", "frames_compared", "frames_kept", "duration_s", "decode_ms"}.
+    """
+    start = time.perf_counter()
+    with _as_path(source) as path, instrument.span("video_decode"):
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            raise ValueError(f"cannot open video {getattr(source, 'name', source)!r}")
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(1, round(fps / sample_fps)) if sample_fps else 1
+
+        kept = []
+        last_hash = None
+        decoded = compared = 0
+        next_sample = 0
+        try:
+            # grab() decodes without the copy / colour conversion of
+            # retrieve(), so frames between samples stay cheap
+            while capture.grab():
+                decoded += 1
+                if decoded - 1 < next_sample:
+                    continue
+                next_sample = decoded - 1 + step
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                compared += 1
+                h = frame_hash(frame)
+                if last_hash is not None and hash_distance(h, last_hash) < distance:
+                    continue
+                last_hash = h
+                kept.append((decoded - 1, _to_image(frame)))
+                if len(kept) >= 2 * max_frames:
+                    # a busy clip: thin out evenly in time rather than stop
+                    # reading, and sample the rest of it at half the rate
+                    # so later frames are not denser than the earlier ones
+                    kept = _spread(kept, max_frames)
+                    step *= 2
+        finally:
+            capture.release()
+
+    kept = [image for _, image in _spread(kept, max_frames)]
+
+    instrument.incr("video_frames_decoded_total", decoded)
+    return kept, {
+        "frames_decoded": decoded,
+        "frames_compared": compared,
+        "frames_kept": len(kept),
+        "duration_s": round(decoded / fps, 2),
+        "decode_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+def detect_from_video(source, max_frames: int = VIDEO_MAX_FRAMES,
+                      batch_size: int = DETECT_BATCH_SIZE) -> tuple:
+    """
+    Detects appliances in a walkthrough video of one room.
+    Returns (counts, stats): counts is the same kind of dict as
+    detect_from_multiple (MAX count over the kept frames); stats adds
+    frames_inferred, detect_ms and total_ms to sample_frames' stats.
+    """
+    from detector import detect_from_multiple
+
+    start = time.perf_counter()
+    frames, stats = sample_frames(source, max_frames)
+    detect_start = time.perf_counter()
+    counts = detect_from_multiple(frames, batch_size) if frames else {}
+    end = time.perf_counter()
+
+    stats.update({
+        "frames_inferred": len(frames),
+        "detect_ms": round((end - detect_start) * 1000, 1),
+        "total_ms": round((end - start) * 1000, 1),
+    })
+    return counts, stats
+
+
+if __name__ == "__main__":
+    for video_path in sys.argv[1:]:
+        found, video_stats = detect_from_video(video_path)
+        print(video_path, found, video_stats)
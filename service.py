@@ -0,0 +1,559 @@
+# service.py
+#
+# Standalone HTTP service for both models, standard library only:
+#   POST /predict-co2   {"floor_area": 80, ..., "occupants": 4}  (or a list of them)
+#   POST /detect        raw image bytes, or {"images": ["<base64>", ...]}
+#   POST /report        {"rooms": {"Bedroom": {"fan": 2}}, "tariff": "...", "uncertainty": false}
+#   GET  /health
+#   GET  /metrics       Prometheus text (SDG13_METRICS=1, see sdg13-vision/instrument.py)
+#
+# Concurrent /predict-co2 and /detect requests are coalesced by a
+# micro-batcher: the first request opens a window of a few ms, and
+# everything that arrives in it goes to one predict() / YOLO batch.
+# Queues are bounded (503 when full) and every request has a timeout (504).
+#   python service.py --port 8000 --warmup
+
+import argparse
+import asyncio
+import base64
+import binascii
+import io
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "sdg13-vision"))
+
+import instrument  # noqa: E402
+from features import (  # noqa: E402
+    CAT_COLS,
+    COMPACT_MODEL_PATH,
+    FEATURE_COLS,
+    MODEL_PATH,
+    NUM_COLS,
+    normalize_category,
+)
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+HEADER_TIMEOUT = 10
+KEEPALIVE_TIMEOUT = 30
+
+CO2_MAX_BATCH = 256
+CO2_MAX_WAIT_MS = 2
+CO2_MAX_QUEUE = 4096
+CO2_TIMEOUT = 5
+CO2_MAX_ROWS = 1024
+
+DETECT_MAX_WAIT_MS = 10
+DETECT_MAX_QUEUE = 64
+DETECT_TIMEOUT = 30
+DETECT_MAX_IMAGES = 16
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MicroBatcher:
+    """
+    Collects submitted items for up to max_wait_ms (or until max_batch
+    are waiting) and runs fn(items) -> results once for all of them on
+    a dedicated thread, so the event loop never blocks on the model.
+    """
+
+    def __init__(self, name: str, fn, max_batch: int, max_wait_ms: float, max_queue: int):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(max_queue)
+        self._pool = ThreadPoolExecutor(1, thread_name_prefix=name)
+        self._task = None
+        self.stats = {"requests": 0, "batches": 0, "batched_items": 0,
+                      "rejected": 0, "timeouts": 0, "errors": 0}
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run_in_thread(self, fn, *args):
+        """
+        Runs fn on the batcher's model thread (e.g. warmup).
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def submit(self, item, timeout: float):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE,
+                            f"{self.name} queue is full ({self.queue.maxsize} pending)")
+        self.stats["requests"] += 1
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT,
+                            f"{self.name} did not answer within {timeout}s")
+
+    async def submit_all(self, items: list, timeout: float) -> list:
+        """
+        submit() for several items of one request. If any of them is
+        rejected or fails, the others are cancelled (and dropped from
+        the queue) before the error is raised.
+        """
+        tasks = [asyncio.ensure_future(self.submit(item, timeout)) for item in items]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _collect(self) -> list:
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # requests that timed out while queued are not worth computing
+        return [(item, future) for item, future in batch if not future.done()]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            self.stats["batches"] += 1
+            self.stats["batched_items"] += len(items)
+            try:
+                results = await self.run_in_thread(self.fn, items)
+            except Exception as exc:
+                self.stats["errors"] += 1
+                if len(batch) == 1:
+                    self._resolve(batch[0][1], exc=exc)
+                    continue
+                # one bad item must not fail everyone batched with it:
+                # run them one at a time so only that request errors
+                for item, future in batch:
+                    if future.done():
+                        continue
+                    try:
+                        result = (await self.run_in_thread(self.fn, [item]))[0]
+                    except Exception as item_exc:
+                        self._resolve(future, exc=item_exc)
+                    else:
+                        self._resolve(future, result)
+                continue
+            for (_, future), result in zip(batch, results):
+                self._resolve(future, result)
+
+    @staticmethod
+    def _resolve(future, result=None, exc: Exception = None):
+        if future.done():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    def health(self) -> dict:
+        stats = dict(self.stats)
+        stats["queued"] = self.queue.qsize()
+        stats["max_queue"] = self.queue.maxsize
+        stats["mean_batch"] = round(stats["batched_items"] / max(stats["batches"], 1), 2)
+        return stats
+
+
+# ── models ───────────────────────────────────────────────
+
+def _resolve(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(HERE, path)
+
+
+def load_predictor(model_path: str = MODEL_PATH, compact_path: str = COMPACT_MODEL_PATH):
+    """
+    Same model as app.load_predictor(): the compact artifact from
+    export_model.py if present, otherwise the pickled pipeline.
+    """
+    from fast_predict import FastPredictor
+
+    compact_path = _resolve(compact_path)
+    if os.path.isdir(compact_path):
+        return FastPredictor.load(compact_path)
+    import joblib
+    return FastPredictor.from_pipeline(joblib.load(_resolve(model_path)))
+
+
+def parse_co2_row(row, levels: list = None) -> dict:
+    """
+    Validates one household. Categories are normalised as in
+    bulk_score.py (features.coerce_features); with levels (one
+    collection per CAT_COLS entry) unknown ones are rejected.
+    """
+    if not isinstance(row, dict):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "each household must be a JSON object")
+    missing = [col for col in FEATURE_COLS if col not in row]
+    if missing:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"missing fields: {missing}")
+    parsed = {col: row[col] for col in FEATURE_COLS}
+    for col in NUM_COLS:
+        value = parsed[col]
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{col} must be a number")
+        # json.loads accepts NaN / Infinity
+        if not math.isfinite(value):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{col} must be a finite number")
+    for i, col in enumerate(CAT_COLS):
+        if not isinstance(parsed[col], str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"{col} must be a string")
+        parsed[col] = normalize_category(parsed[col])
+        if levels is not None and parsed[col] not in levels[i]:
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f"unknown {col} {parsed[col]!r}, expected one of {sorted(levels[i])}")
+    return parsed
+
+
+def decode_images(payloads: list) -> list:
+    from preprocess import load_image
+
+    images = []
+    for i, payload in enumerate(payloads):
+        try:
+            images.append(load_image(io.BytesIO(payload)))
+        except Exception as exc:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"image {i} could not be decoded: {exc}")
+    return images
+
+
+def build_report(rooms: dict, tariff_id: str, uncertainty: bool) -> dict:
+    from assembler import assemble_home_inventory, get_total_inventory
+    from calculator import get_full_report
+    from suggestions import generate_suggestions
+
+    assembled = assemble_home_inventory(rooms)
+    report = get_full_report(assembled, tariff_id)
+    total_inventory = get_total_inventory(assembled)
+    out = {
+        "report": report,
+        "suggestions": generate_suggestions(
+            total_inventory, report["__totals__"]["total_kwh"], tariff_id
+        ),
+    }
+    if uncertainty:
+        from uncertainty import estimate_uncertainty
+        out["uncertainty"] = estimate_uncertainty(total_inventory, tariff_id=tariff_id)
+    return out
+
+
+# ── HTTP ─────────────────────────────────────────────────
+
+class Service:
+
+    def __init__(self, args):
+        self.args = args
+        self.started = time.time()
+        self.predictor = None
+        self.detector_ready = False
+        self.co2 = None
+        self.detect = None
+        self._cpu = ThreadPoolExecutor(args.cpu_threads, thread_name_prefix="cpu")
+
+    async def start(self):
+        self.predictor = load_predictor(self.args.model, self.args.compact_model)
+        self.co2 = MicroBatcher(
+            "predict-co2", lambda rows: self.predictor.predict(rows).tolist(),
+            self.args.co2_batch, self.args.co2_wait_ms, self.args.co2_queue,
+        )
+        self.detect = MicroBatcher(
+            "detect", self._detect_batch,
+            self.args.detect_batch, self.args.detect_wait_ms, self.args.detect_queue,
+        )
+        self.co2.start()
+        self.detect.start()
+        if self.args.warmup:
+            import detector
+            await self.detect.run_in_thread(detector.warmup)
+            self.detector_ready = True
+
+    async def stop(self):
+        await self.co2.stop()
+        await self.detect.stop()
+        self._cpu.shutdown(wait=False)
+
+    def _detect_batch(self, images: list) -> list:
+        import detector
+        results = detector.detect_batch(images)
+        self.detector_ready = True
+        return results
+
+    async def _in_cpu_pool(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._cpu, fn, *args)
+
+    # ── endpoints ────────────────────────────────────────
+
+    async def health(self, headers: dict, body: bytes) -> dict:
+        return {
+            "status": "ok",
+            "uptime_s": round(time.time() - self.started, 1),
+            "co2_model": self.predictor is not None,
+            "detector_loaded": self.detector_ready,
+            "batchers": {"predict-co2": self.co2.health(), "detect": self.detect.health()},
+        }
+
+    async def metrics(self, headers: dict, body: bytes) -> str:
+        if not instrument.enabled():
+            raise HTTPError(HTTPStatus.NOT_FOUND, "metrics are off, start with SDG13_METRICS=1")
+        return instrument.render_prometheus()
+
+    async def predict_co2(self, headers: dict, body: bytes) -> dict:
+        payload = _json(body)
+        rows = payload if isinstance(payload, list) else [payload]
+        if not rows:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "no households given")
+        if len(rows) > self.args.co2_max_rows:
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f"at most {self.args.co2_max_rows} households per request")
+        levels = [set(c) for c in self.predictor.categories]
+        rows = [parse_co2_row(row, levels) for row in rows]
+        predictions = await self.co2.submit_all(rows, self.args.co2_timeout)
+        if isinstance(payload, list):
+            return {"co2_kg": predictions}
+        return {"co2_kg": predictions[0]}
+
+    async def detect_images(self, headers: dict, body: bytes) -> dict:
+        if headers.get("content-type", "").startswith("application/json"):
+            payload = _json(body)
+            encoded = payload.get("images") if isinstance(payload, dict) else None
+            if not isinstance(encoded, list) or not encoded:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, '"images" must be a non-empty list')
+            try:
+                payloads = [base64.b64decode(item, validate=True) for item in encoded]
+            except (binascii.Error, TypeError, ValueError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "images must be base64 strings")
+        else:
+            payloads = [body]
+        if len(payloads) > self.args.detect_max_images:
+            raise HTTPError(HTTPStatus.BAD_REQUEST,
+                            f"at most {self.args.detect_max_images} images per request")
+
+        images = await self._in_cpu_pool(decode_images, payloads)
+        per_image = await self.detect.submit_all(images, self.args.detect_timeout)
+        # photos of the same room: MAX count seen, like detect_from_multiple
+        combined = {}
+        for result in per_image:
+            for appliance, count in result.items():
+                combined[appliance] = max(combined.get(appliance, 0), count)
+        return {"appliances": combined, "per_image": per_image}
+
+    async def report(self, headers: dict, body: bytes) -> dict:
+        payload = _json(body)
+        rooms = payload.get("rooms") if isinstance(payload, dict) else None
+        if not isinstance(rooms, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '"rooms" must be an object of room inventories')
+        for room, inventory in rooms.items():
+            if not isinstance(inventory, dict) or not all(
+                isinstance(count, int) and not isinstance(count, bool) and count >= 0
+                for count in inventory.values()
+            ):
+                raise HTTPError(HTTPStatus.BAD_REQUEST,
+                                f"room {room!r} must map appliance names to counts >= 0")
+
+        from config import DEFAULT_TARIFF
+        from tariffs import list_tariffs
+        tariff_id = payload.get("tariff", DEFAULT_TARIFF)
+        if not isinstance(tariff_id, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, '"tariff" must be a string')
+        if tariff_id not in list_tariffs():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"unknown tariff {tariff_id!r}")
+        return await self._in_cpu_pool(build_report, rooms, tariff_id, bool(payload.get("uncertainty")))
+
+    # ── connection handling ──────────────────────────────
+
+    def routes(self) -> dict:
+        return {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/predict-co2"): self.predict_co2,
+            ("POST", "/detect"): self.detect_images,
+            ("POST", "/report"): self.report,
+        }
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        routes = self.routes()
+        try:
+            first = True
+            while True:
+                try:
+                    request = await _read_request(reader, HEADER_TIMEOUT if first else KEEPALIVE_TIMEOUT)
+                except HTTPError as exc:
+                    await _respond(writer, exc.status, {"error": exc.message}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                first = False
+                method, path, headers, body = request
+
+                handler = routes.get((method, path))
+                try:
+                    if handler is None:
+                        known = {p for _, p in routes}
+                        if path in known:
+                            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+                        raise HTTPError(HTTPStatus.NOT_FOUND, f"no endpoint {path}")
+                    with instrument.request(path.strip("/")):
+                        status, payload = HTTPStatus.OK, await handler(headers, body)
+                except HTTPError as exc:
+                    status, payload = exc.status, {"error": exc.message}
+                except Exception as exc:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"}
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await _respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def _json(body: bytes):
+    try:
+        return json.loads(body or b"null")
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {exc}")
+
+
+async def _read_request(reader: asyncio.StreamReader, timeout: float):
+    """
+    Reads one HTTP/1.1 request. Returns None when the client closed
+    the connection between requests.
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    except asyncio.TimeoutError:
+        return None
+    except asyncio.IncompleteReadError as exc:
+        if not exc.partial:
+            return None
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "incomplete request")
+    except asyncio.LimitOverrunError:
+        raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "chunked bodies are not supported")
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"body over {MAX_BODY_BYTES} bytes")
+    try:
+        body = await asyncio.wait_for(reader.readexactly(length), timeout) if length else b""
+    except asyncio.TimeoutError:
+        raise HTTPError(HTTPStatus.REQUEST_TIMEOUT, "body not received in time")
+
+    return method.upper(), target.split("?", 1)[0], headers, body
+
+
+async def _respond(writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool):
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+
+async def serve(args):
+    service = Service(args)
+    await service.start()
+    server = await asyncio.start_server(service.handle, args.host, args.port, limit=64 * 1024)
+    print(f"listening on http://{args.host}:{args.port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--compact-model", default=COMPACT_MODEL_PATH)
+    parser.add_argument("--warmup", action="store_true", help="load YOLO before accepting requests")
+    parser.add_argument("--cpu-threads", type=int, default=2, help="threads for image decode and reports")
+    parser.add_argument("--co2-batch", type=int, default=CO2_MAX_BATCH)
+    parser.add_argument("--co2-wait-ms", type=float, default=CO2_MAX_WAIT_MS)
+    parser.add_argument("--co2-queue", type=int, default=CO2_MAX_QUEUE)
+    parser.add_argument("--co2-timeout", type=float, default=CO2_TIMEOUT)
+    parser.add_argument("--co2-max-rows", type=int, default=CO2_MAX_ROWS,
+                        help="households per /predict-co2 request")
+    parser.add_argument("--detect-batch", type=int, default=None, help="default: config.DETECT_BATCH_SIZE")
+    parser.add_argument("--detect-wait-ms", type=float, default=DETECT_MAX_WAIT_MS)
+    parser.add_argument("--detect-queue", type=int, default=DETECT_MAX_QUEUE)
+    parser.add_argument("--detect-timeout", type=float, default=DETECT_TIMEOUT)
+    parser.add_argument("--detect-max-images", type=int, default=DETECT_MAX_IMAGES)
+    args = parser.parse_args()
+    if args.co2_max_rows > args.co2_queue:
+        parser.error("--co2-max-rows must not exceed --co2-queue, or such requests could never be queued")
+    if args.detect_max_images > args.detect_queue:
+        parser.error("--detect-max-images must not exceed --detect-queue, or such requests could never be queued")
+
+    if args.detect_batch is None:
+        from config import DETECT_BATCH_SIZE
+        args.detect_batch = DETECT_BATCH_SIZE
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
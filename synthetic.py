@@ -0,0 +1,197 @@
+# synthetic.py
+#
+# The synthetic household generator from Project.ipynb, as a function.
+# generate_households(2000, seed=42) returns exactly the notebook's df
+# (same draws, same order), so benchmarks and retraining see the data
+# the shipped model was trained on.
+#
+# For scale tests, stream_households() / the CLI write the same
+# distributions in fixed-size chunks. Chunk i draws from its own RNG
+# stream (SeedSequence(seed).spawn order i), worker processes build
+# chunks in any order and the parent writes them back in order, so the
+# file is byte-identical for a given seed whatever --workers is, and
+# memory stays at a few chunks.
+#   python synthetic.py households.parquet --rows 100000000 --workers 8
+#   python synthetic.py households.csv --rows 10000000 --seed 7
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_COLS, TARGET
+
+N_SAMPLES = 2000
+SEED = 42
+CHUNK_SIZE = 1_000_000
+
+BUILDING_TYPES = np.array(["apartment", "independent"], dtype=object)
+CLIMATE_ZONES = np.array(["hot", "moderate", "cool"], dtype=object)
+
+
+def co2_formula(elec_kwh, lpg_kg, floor_area, ac_hours, occupants, noise):
+    """
+    The notebook's target, terms added in the notebook's order.
+    """
+    return (
+        elec_kwh * 0.82
+        + lpg_kg * 2.95
+        + floor_area * 0.3
+        + ac_hours * 5.0
+        + occupants * 10.0
+        + noise
+    )
+
+
+def generate_households(n_samples: int = N_SAMPLES, seed: int = SEED) -> pd.DataFrame:
+    """
+    Household features plus the co2_kg target, columns in FEATURE_COLS order.
+    """
+    rng = np.random.RandomState(seed)
+
+    floor_area = rng.uniform(30, 200, n_samples)
+    num_rooms = rng.randint(1, 7, n_samples)
+    building_type = rng.choice(["apartment", "independent"], n_samples)
+    climate_zone = rng.choice(["hot", "moderate", "cool"], n_samples)
+    elec_kwh = rng.uniform(50, 600, n_samples)
+    lpg_kg = rng.uniform(0, 40, n_samples)
+    ac_hours = rng.uniform(0, 8, n_samples)
+    occupants = rng.randint(1, 7, n_samples)
+
+    co2_kg = co2_formula(elec_kwh, lpg_kg, floor_area, ac_hours, occupants,
+                         rng.normal(0, 50, n_samples))
+
+    df = pd.DataFrame({
+        "floor_area": floor_area,
+        "num_rooms": num_rooms,
+        "building_type": building_type,
+        "climate_zone": climate_zone,
+        "elec_kwh": elec_kwh,
+        "lpg_kg": lpg_kg,
+        "ac_hours": ac_hours,
+        "occupants": occupants,
+        TARGET: co2_kg,
+    })
+    return df[FEATURE_COLS + [TARGET]]
+
+
+def generate_chunk(index: int, chunk_size: int = CHUNK_SIZE, n_rows: int = None,
+                   seed: int = SEED, target: bool = True) -> pd.DataFrame:
+    """
+    Rows [index * chunk_size, ...) of a streamed dataset. Depends only on
+    (seed, index, chunk_size), never on which process builds it.
+    """
+    start = index * chunk_size
+    n = chunk_size if n_rows is None else max(0, min(chunk_size, n_rows - start))
+    rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(index,))))
+
+    columns = {
+        "floor_area": rng.uniform(30, 200, n),
+        "num_rooms": rng.integers(1, 7, n),
+        "building_type": BUILDING_TYPES[rng.integers(0, len(BUILDING_TYPES), n)],
+        "climate_zone": CLIMATE_ZONES[rng.integers(0, len(CLIMATE_ZONES), n)],
+        "elec_kwh": rng.uniform(50, 600, n),
+        "lpg_kg": rng.uniform(0, 40, n),
+        "ac_hours": rng.uniform(0, 8, n),
+        "occupants": rng.integers(1, 7, n),
+    }
+    noise = rng.normal(0, 50, n)
+    df = pd.DataFrame({col: columns[col] for col in FEATURE_COLS})
+    if target:
+        df[TARGET] = co2_formula(
+            columns["elec_kwh"], columns["lpg_kg"], columns["floor_area"],
+            columns["ac_hours"], columns["occupants"], noise,
+        )
+    return df
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _encode_chunk(index: int, chunk_size: int, n_rows: int, seed: int, target: bool, fmt: str):
+    """
+    Worker side: build chunk `index` and serialise it, so the parent
+    only concatenates. CSV comes back as bytes, Parquet as an Arrow table.
+    """
+    df = generate_chunk(index, chunk_size, n_rows, seed, target)
+    if fmt == "csv":
+        return df.to_csv(index=False, header=index == 0).encode()
+    import pyarrow as pa
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def stream_households(path: str, n_rows: int, chunk_size: int = CHUNK_SIZE, seed: int = SEED,
+                      workers: int = 0, target: bool = True) -> int:
+    """
+    Writes n_rows households to path (.csv or .parquet), chunk by chunk.
+    workers = 0 builds chunks in this process. Returns rows written.
+    """
+    if n_rows < 1:
+        # no chunk would ever be written: not even a header or schema
+        raise ValueError(f"n_rows must be at least 1, got {n_rows}")
+    fmt = "parquet" if _is_parquet(path) else "csv"
+    n_chunks = -(-n_rows // chunk_size)
+    args = (chunk_size, n_rows, seed, target, fmt)
+
+    writer = None
+    with open(path, "wb") as out:
+        def write(encoded):
+            nonlocal writer
+            if fmt == "csv":
+                out.write(encoded)
+                return
+            import pyarrow.parquet as pq
+            if writer is None:
+                writer = pq.ParquetWriter(out, encoded.schema)
+            writer.write_table(encoded)
+
+        if workers <= 0:
+            for index in range(n_chunks):
+                write(_encode_chunk(index, *args))
+        else:
+            # at most 2 chunks per worker in flight, written in index order
+            with ProcessPoolExecutor(workers) as pool:
+                pending = {}
+                next_submit = 0
+                for index in range(n_chunks):
+                    while next_submit < n_chunks and next_submit < index + 2 * workers:
+                        pending[next_submit] = pool.submit(_encode_chunk, next_submit, *args)
+                        next_submit += 1
+                    write(pending.pop(index).result())
+
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output", help=".csv or .parquet")
+    parser.add_argument("--rows", type=int, default=N_SAMPLES)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-target", action="store_true", help="features only, like bulk_score.py input")
+    args = parser.parse_args()
+    if args.rows < 1:
+        parser.error("--rows must be at least 1")
+
+    start = time.perf_counter()
+    rows = stream_households(args.output, args.rows, args.chunk_size, args.seed,
+                             args.workers, target=not args.no_target)
+    elapsed = time.perf_counter() - start
+    try:
+        import resource     # Unix only; train.load_data imports this module
+        peak = f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB"
+    except ImportError:
+        peak = "n/a"
+    print(f"{rows:,} rows -> {args.output} in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} rows/s, parent peak RSS {peak})")
+
+
+if __name__ == "__main__":
+    main()
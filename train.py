@@ -0,0 +1,452 @@
+# train.py
+#
+# The training half of Project.ipynb as a command-line pipeline:
+#   1. load      notebook synthetic data (or --data households.csv/.parquet)
+#   2. preprocess  ColumnTransformer fit once on the train split; the
+#                transformed matrices are cached under .train_cache/
+#   3. cv        k-fold grid search for every candidate, all (model,
+#                params, fold) fits in parallel, each fold fitting its own
+#                scaler / encoder on its training rows; finished fits are kept
+#                in cv_results.jsonl so an interrupted search resumes
+#   4. evaluate  best params per model fit on the train split, scored on
+#                the held-out test split (these fits also give importances)
+#   5. refit     the deployed model on all rows, like the notebook did
+#   6. save      artifacts/<version>/ with the pipeline, manifest.json
+#                and (for forests) the compact FastPredictor copy
+#
+#   python train.py
+#   python train.py --data households.parquet --jobs 8 --install
+#   python train.py --run-dir artifacts/20260101-120000-ab12cd34   # resume
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, ParameterGrid, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from features import CAT_COLS, FEATURE_COLS, MODEL_PATH, COMPACT_MODEL_PATH, NUM_COLS, TARGET
+
+ARTIFACT_DIR = "artifacts"
+CACHE_DIR = ".train_cache"
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CV_FOLDS = 5
+
+# the only model FastPredictor (app.py, service.py) can serve
+INSTALLABLE_MODEL = "RandomForest"
+
+# notebook settings first in every grid
+PARAM_GRIDS = {
+    "LinearRegression": {},
+    "RandomForest": {
+        "n_estimators": [300],
+        "max_depth": [None, 16],
+        "min_samples_leaf": [1, 3],
+        "max_features": [1.0, 0.5],
+    },
+    "XGBRegressor": {
+        "n_estimators": [400],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [4, 6],
+        "subsample": [0.8],
+        "colsample_bytree": [0.8],
+    },
+}
+
+
+def make_model(name: str, params: dict, n_jobs: int = 1):
+    if name == "LinearRegression":
+        return LinearRegression(**params)
+    if name == "RandomForest":
+        return RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=n_jobs, **params)
+    if name == "XGBRegressor":
+        from xgboost import XGBRegressor
+        return XGBRegressor(random_state=RANDOM_STATE, n_jobs=n_jobs, tree_method="hist", **params)
+    raise ValueError(f"unknown model {name!r}")
+
+
+def available_models(names: list) -> list:
+    out = []
+    for name in names:
+        if name == "XGBRegressor":
+            try:
+                import xgboost  # noqa: F401
+            except ImportError:
+                print("xgboost not installed, skipping XGBRegressor")
+                continue
+        out.append(name)
+    return out
+
+
+def make_preprocess() -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ("num", StandardScaler(), NUM_COLS),
+            ("cat", OneHotEncoder(handle_unknown="ignore"), CAT_COLS),
+        ]
+    )
+
+
+class StageTimer:
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, name: str):
+        print(f"[{name}] ...", flush=True)
+        start = time.perf_counter()
+        yield
+        self.seconds[name] = round(time.perf_counter() - start, 3)
+        print(f"[{name}] {self.seconds[name]:.2f}s", flush=True)
+
+
+def _key(obj) -> str:
+    return hashlib.blake2b(json.dumps(obj, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+# ── data / preprocessing ─────────────────────────────────
+
+def load_data(path: str = None, samples: int = None, seed: int = None) -> pd.DataFrame:
+    if path is None:
+        from synthetic import N_SAMPLES, SEED, generate_households
+        return generate_households(samples or N_SAMPLES, SEED if seed is None else seed)
+    if path.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def data_key(df: pd.DataFrame) -> str:
+    hashed = pd.util.hash_pandas_object(df[FEATURE_COLS + [TARGET]], index=False).values
+    return hashlib.blake2b(hashed.tobytes(), digest_size=8).hexdigest()
+
+
+def _dense(matrix) -> np.ndarray:
+    if hasattr(matrix, "toarray"):
+        matrix = matrix.toarray()
+    return np.ascontiguousarray(matrix, dtype=np.float64)
+
+
+def preprocess_cached(df: pd.DataFrame, key: str, cache_dir: str = CACHE_DIR) -> dict:
+    """
+    Splits like the notebook, fits the ColumnTransformer on the train
+    split once and caches the transformed matrices by data key.
+    train_frame is the untransformed train split, for cross-validation.
+    """
+    X = df[FEATURE_COLS]
+    y = df[TARGET].to_numpy(dtype=np.float64)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE
+    )
+
+    path = os.path.join(cache_dir, f"{key}-{TEST_SIZE}-{RANDOM_STATE}")
+    if os.path.exists(os.path.join(path, "preprocess.pkl")):
+        arrays = np.load(os.path.join(path, "arrays.npz"))
+        return {
+            "preprocess": joblib.load(os.path.join(path, "preprocess.pkl")),
+            **{name: arrays[name] for name in arrays.files},
+            "train_frame": X_train,
+            "cached": True,
+        }
+
+    preprocess = make_preprocess().fit(X_train)
+    out = {
+        "preprocess": preprocess,
+        "train_frame": X_train,
+        "X_train": _dense(preprocess.transform(X_train)),
+        "X_test": _dense(preprocess.transform(X_test)),
+        "y_train": y_train,
+        "y_test": y_test,
+    }
+
+    os.makedirs(path, exist_ok=True)
+    np.savez(os.path.join(path, "arrays.npz"),
+             **{name: out[name] for name in ("X_train", "X_test", "y_train", "y_test")})
+    joblib.dump(preprocess, os.path.join(path, "preprocess.pkl"))
+    out["cached"] = False
+    return out
+
+
+def feature_names(preprocess: ColumnTransformer) -> list:
+    ohe = preprocess.named_transformers_["cat"]
+    return NUM_COLS + list(ohe.get_feature_names_out(CAT_COLS))
+
+
+# ── cross-validated search ───────────────────────────────
+
+def _cv_fit(name: str, params: dict, fold: int, X: pd.DataFrame, y: np.ndarray,
+            train_idx: np.ndarray, valid_idx: np.ndarray) -> dict:
+    start = time.perf_counter()
+    # scaler / encoder fit on the fold's training rows only, so the
+    # validation rows do not leak into the scaling
+    model = Pipeline(steps=[("preprocess", make_preprocess()), ("model", make_model(name, params))])
+    model.fit(X.iloc[train_idx], y[train_idx])
+    pred = model.predict(X.iloc[valid_idx])
+    return {
+        "model": name,
+        "params": params,
+        "fold": fold,
+        "rmse": float(np.sqrt(mean_squared_error(y[valid_idx], pred))),
+        "mae": float(mean_absolute_error(y[valid_idx], pred)),
+        "r2": float(r2_score(y[valid_idx], pred)),
+        "fit_s": round(time.perf_counter() - start, 3),
+    }
+
+
+def cross_validate(models: list, X: pd.DataFrame, y: np.ndarray, key: str,
+                   results_path: str, jobs: int) -> list:
+    """
+    X is the untransformed train split; every (model, params, fold)
+    fit runs as its own parallel task with its own preprocessing.
+    Results already in results_path (from an interrupted run) are reused.
+    """
+    done = {}
+    if os.path.exists(results_path):
+        with open(results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue    # last line of a killed run
+                done[record["task"]] = record
+
+    folds = list(KFold(CV_FOLDS, shuffle=True, random_state=RANDOM_STATE).split(X))
+    tasks = []
+    for name in models:
+        for params in ParameterGrid(PARAM_GRIDS[name]):
+            for fold, (train_idx, valid_idx) in enumerate(folds):
+                task = _key({"data": key, "model": name, "params": params, "fold": fold, "folds": CV_FOLDS,
+                             "preprocess": "per-fold"})
+                if task not in done:
+                    tasks.append((task, name, params, fold, train_idx, valid_idx))
+
+    print(f"cv: {len(done)} fits resumed, {len(tasks)} to run on {jobs} workers", flush=True)
+    with open(results_path, "a", encoding="utf-8") as f:
+        # return_as="generator" writes each fit as soon as it lands, so an
+        # interrupted search loses at most the fits in flight
+        results = Parallel(n_jobs=jobs, return_as="generator")(
+            delayed(_cv_fit)(name, params, fold, X, y, train_idx, valid_idx)
+            for _, name, params, fold, train_idx, valid_idx in tasks
+        )
+        for (task, *_), record in zip(tasks, results):
+            record["task"] = task
+            done[task] = record
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+
+    return list(done.values())
+
+
+def summarize_cv(records: list, models: list) -> dict:
+    """
+    Mean CV scores per params; best params (lowest mean RMSE) per model.
+    """
+    grouped = {}
+    for record in records:
+        if record["model"] not in models:
+            continue
+        grouped.setdefault((record["model"], _key(record["params"])), []).append(record)
+
+    summary = {}
+    for (name, _), runs in grouped.items():
+        if len(runs) < CV_FOLDS:
+            continue
+        entry = {
+            "params": runs[0]["params"],
+            "rmse": float(np.mean([r["rmse"] for r in runs])),
+            "rmse_std": float(np.std([r["rmse"] for r in runs])),
+            "mae": float(np.mean([r["mae"] for r in runs])),
+            "r2": float(np.mean([r["r2"] for r in runs])),
+        }
+        summary.setdefault(name, {"candidates": []})["candidates"].append(entry)
+
+    for name, info in summary.items():
+        info["candidates"].sort(key=lambda c: c["rmse"])
+        info["best"] = info["candidates"][0]
+    return summary
+
+
+# ── evaluation / refit ───────────────────────────────────
+
+def _eval_fit(name: str, params: dict, data: dict):
+    model = make_model(name, params)
+    model.fit(data["X_train"], data["y_train"])
+    pred = model.predict(data["X_test"])
+    y_test = data["y_test"]
+    metrics = {
+        "MAE": float(mean_absolute_error(y_test, pred)),
+        "RMSE": float(np.sqrt(mean_squared_error(y_test, pred))),
+        "R2": float(r2_score(y_test, pred)),
+    }
+    return name, model, metrics
+
+
+def importances(model, names: list) -> list:
+    values = getattr(model, "feature_importances_", None)
+    if values is None:
+        values = np.abs(getattr(model, "coef_", np.zeros(len(names))))
+    order = np.argsort(values)[::-1]
+    return [{"feature": names[i], "importance": float(values[i])} for i in order]
+
+
+def install(model_path: str, compact_path: str):
+    """
+    Copies a run's artifacts to where app.py / service.py load them.
+    Neither is ever missing or half-written: the pickle is copied next
+    to MODEL_PATH and renamed over it, the compact copy is published as
+    a new version of COMPACT_MODEL_PATH (fast_predict.publish).
+    """
+    from fast_predict import publish
+
+    staged = f"{MODEL_PATH}.tmp-{os.getpid()}"
+    try:
+        shutil.copyfile(model_path, staged)
+        os.replace(staged, MODEL_PATH)
+    finally:
+        if os.path.exists(staged):
+            os.remove(staged)
+    publish(COMPACT_MODEL_PATH, lambda directory: shutil.copytree(compact_path, directory, dirs_exist_ok=True))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", help="CSV / Parquet with the feature columns and co2_kg; default: notebook synthetic data")
+    parser.add_argument("--samples", type=int, help="synthetic rows (default 2000, as in the notebook)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--models", nargs="+", default=list(PARAM_GRIDS))
+    parser.add_argument("--deploy", default="RandomForest", help='model to ship, or "best" (lowest CV RMSE)')
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--run-dir", help="resume an earlier run instead of starting a new version")
+    parser.add_argument("--no-refit", action="store_true", help="ship the train-split fit instead of refitting on all rows")
+    parser.add_argument("--install", action="store_true",
+                        help=f"also copy the pipeline to {MODEL_PATH} and {COMPACT_MODEL_PATH}/ for app.py "
+                             f"(RandomForest only)")
+    args = parser.parse_args()
+    if args.install and args.deploy not in (INSTALLABLE_MODEL, "best"):
+        parser.error(f"--install needs --deploy {INSTALLABLE_MODEL}: app.py and service.py "
+                     f"only serve forests (FastPredictor)")
+
+    stage = StageTimer()
+    jobs = joblib.cpu_count() if args.jobs < 0 else args.jobs
+    models = available_models(args.models)
+
+    with stage("load"):
+        df = load_data(args.data, args.samples, args.seed)
+        key = data_key(df)
+        print(f"{len(df):,} rows, data key {key}")
+
+    run_dir = args.run_dir or os.path.join(ARTIFACT_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{key}")
+    os.makedirs(run_dir, exist_ok=True)
+
+    with stage("preprocess"):
+        data = preprocess_cached(df, key)
+        print(f"train {data['X_train'].shape}, test {data['X_test'].shape}"
+              f"{' (from cache)' if data['cached'] else ''}")
+
+    with stage("cv"):
+        records = cross_validate(models, data["train_frame"], data["y_train"], key,
+                                 os.path.join(run_dir, "cv_results.jsonl"), jobs)
+        cv = summarize_cv(records, models)
+        for name in models:
+            best = cv[name]["best"]
+            print(f"  {name:18s} cv RMSE {best['rmse']:.2f} ± {best['rmse_std']:.2f}  {best['params']}")
+
+    with stage("evaluate"):
+        fits = Parallel(n_jobs=min(jobs, len(models)))(
+            delayed(_eval_fit)(name, cv[name]["best"]["params"], data) for name in models
+        )
+        eval_models = {name: model for name, model, _ in fits}
+        test_metrics = {name: metrics for name, _, metrics in fits}
+        for name, metrics in test_metrics.items():
+            print(f"  {name:18s} test MAE {metrics['MAE']:.2f}  RMSE {metrics['RMSE']:.2f}  R2 {metrics['R2']:.4f}")
+
+    deploy = min(models, key=lambda m: cv[m]["best"]["rmse"]) if args.deploy == "best" else args.deploy
+    if deploy not in eval_models:
+        raise SystemExit(f"--deploy {deploy} was not trained (models: {models})")
+    if args.install and deploy != INSTALLABLE_MODEL:
+        raise SystemExit(f"--deploy best picked {deploy}; --install needs {INSTALLABLE_MODEL} "
+                         f"(app.py and service.py only serve forests)")
+
+    with stage("importances"):
+        # the evaluation fit already has them; no extra RF fit
+        names = feature_names(data["preprocess"])
+        feature_importance = importances(eval_models[deploy], names)
+
+    with stage("refit"):
+        if args.no_refit:
+            pipeline = Pipeline(steps=[("preprocess", data["preprocess"]), ("model", eval_models[deploy])])
+        else:
+            pipeline = Pipeline(steps=[
+                ("preprocess", make_preprocess()),
+                ("model", make_model(deploy, cv[deploy]["best"]["params"], n_jobs=jobs)),
+            ])
+            pipeline.fit(df[FEATURE_COLS], df[TARGET])
+        if hasattr(pipeline.named_steps["model"], "n_jobs"):
+            pipeline.named_steps["model"].n_jobs = None
+
+    with stage("save"):
+        model_path = os.path.join(run_dir, MODEL_PATH)
+        joblib.dump(pipeline, model_path)
+        compact_path = None
+        if isinstance(pipeline.named_steps["model"], RandomForestRegressor):
+            from fast_predict import FastPredictor
+            compact_path = os.path.join(run_dir, COMPACT_MODEL_PATH)
+            FastPredictor.from_pipeline(pipeline).save(compact_path)
+
+    manifest = {
+        "version": os.path.basename(os.path.normpath(run_dir)),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "data": {"source": args.data or "synthetic", "rows": len(df), "key": key},
+        "deployed": {
+            "model": deploy,
+            "params": cv[deploy]["best"]["params"],
+            "refit_on_all_rows": not args.no_refit,
+            "pipeline": MODEL_PATH,
+            "compact": COMPACT_MODEL_PATH if compact_path else None,
+        },
+        "cv": {"folds": CV_FOLDS, "models": cv},
+        "test": {"size": TEST_SIZE, "random_state": RANDOM_STATE, "metrics": test_metrics},
+        "feature_importance": feature_importance,
+        "stage_seconds": stage.seconds,
+        "versions": {"python": platform.python_version(), "sklearn": sklearn.__version__, "numpy": np.__version__},
+    }
+    with open(os.path.join(run_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    if args.install:
+        install(model_path, compact_path)
+        print(f"installed {MODEL_PATH} and {COMPACT_MODEL_PATH}/")
+
+    print(f"wrote {run_dir}/ ({deploy})")
+    print("stage seconds: " + ", ".join(f"{k} {v:.2f}" for k, v in stage.seconds.items()))
+
+
+if __name__ == "__main__":
+    main()